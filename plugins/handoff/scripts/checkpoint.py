@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Incremental handoff checkpoints.
+
+Each memory file records how far into the session transcript it was built,
+as a header line:
+
+    **Checkpoint**: <transcript path> @ <byte offset> (sha256:<hash>)
+
+The hash covers the bytes just before the offset, so a follow-up handoff can
+cheaply confirm the transcript still matches and extract only the events
+written since. If the transcript was rewritten or truncated the checkpoint
+is ignored and the whole transcript is extracted.
+
+The file signals ranking.py needs (touched files and mentions, in touch
+order) are saved to `handoff-digest.json` in the memory directory, so the
+ranking does not read the transcript a second time. An incremental run
+adds its new turns to the signals the previous run saved.
+
+Usage:
+    python3 checkpoint.py [TRANSCRIPT] [--goal GOAL] [--memory-dir .claude]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from tracing import Tracer, bytes_tokens
+from transcript import Digest, extract, find_latest_transcript
+
+MEMORY_GLOB = "handoff-memory.*.md"
+DIGEST_NAME = "handoff-digest.json"
+DIGEST_VERSION = 1
+HASH_WINDOW = 4096
+
+CHECKPOINT_PATTERN = re.compile(
+    r"^\*\*Checkpoint\*\*: (?P<transcript>.+) @ (?P<offset>\d+) "
+    r"\(sha256:(?P<hash>[0-9a-f]+)\)\s*$",
+    re.MULTILINE,
+)
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """Position in a transcript that a memory file already covers."""
+
+    transcript: str
+    offset: int
+    hash: str
+
+    def header(self) -> str:
+        """Return the memory file header line for this checkpoint."""
+        return f"**Checkpoint**: {self.transcript} @ {self.offset} (sha256:{self.hash})"
+
+    def matches(self, path: Path) -> bool:
+        """Return True if path still contains the bytes this checkpoint saw."""
+        try:
+            if path.stat().st_size < self.offset:
+                return False
+        except OSError:
+            return False
+        return window_hash(path, self.offset) == self.hash
+
+
+def window_hash(path: Path, offset: int) -> str:
+    """Hash the HASH_WINDOW bytes of path that end at offset."""
+    start = max(0, offset - HASH_WINDOW)
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        data = handle.read(offset - start)
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_checkpoint(path: Path, offset: int) -> Checkpoint:
+    """Create a checkpoint for path at the given byte offset."""
+    return Checkpoint(str(path.resolve()), offset, window_hash(path, offset))
+
+
+def read_checkpoint(memory_file: Path) -> Checkpoint | None:
+    """Parse the checkpoint header of a memory file, if it has one."""
+    try:
+        # The header sits at the top of the file; no need to read the rest
+        with open(memory_file, encoding="utf-8") as handle:
+            head = handle.read(4096)
+    except OSError:
+        return None
+    match = CHECKPOINT_PATTERN.search(head)
+    if match is None:
+        return None
+    return Checkpoint(
+        match.group("transcript"), int(match.group("offset")), match.group("hash")
+    )
+
+
+def find_previous(memory_dir: Path, transcript: Path) -> tuple[Path, Checkpoint] | None:
+    """Return the newest memory file whose checkpoint covers transcript."""
+    target = str(transcript.resolve())
+    # Filenames embed a sortable timestamp, newest last
+    for memory_file in sorted(memory_dir.glob(MEMORY_GLOB), reverse=True):
+        checkpoint = read_checkpoint(memory_file)
+        if checkpoint and checkpoint.transcript == target:
+            return memory_file, checkpoint
+    return None
+
+
+@dataclass
+class Delta:
+    """Result of an incremental extraction."""
+
+    digest: Digest
+    checkpoint: Checkpoint
+    previous: Path | None = None
+    start: int = 0
+
+
+def extract_delta(transcript: Path, memory_dir: Path) -> Delta:
+    """Extract the events not yet covered by a previous memory file."""
+    previous = find_previous(memory_dir, transcript) if memory_dir.is_dir() else None
+    start = 0
+    memory_file = None
+    if previous is not None and previous[1].matches(transcript):
+        memory_file, start = previous[0], previous[1].offset
+
+    digest = extract(transcript, start)
+    return Delta(
+        digest=digest,
+        checkpoint=make_checkpoint(transcript, digest.end_offset),
+        previous=memory_file,
+        start=start,
+    )
+
+
+def _read_digest(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == DIGEST_VERSION else None
+
+
+def save_digest(memory_dir: Path, delta: Delta) -> Path:
+    """Write the session's file signals for ranking.py --digest."""
+    path = memory_dir / DIGEST_NAME
+    files: OrderedDict = OrderedDict()
+    mentions: OrderedDict = OrderedDict()
+    previous = _read_digest(path) if delta.start else None
+    # Carry over the turns before the checkpoint only if they are this transcript's
+    if (
+        previous
+        and previous.get("transcript") == delta.checkpoint.transcript
+        and previous.get("end_offset") == delta.start
+    ):
+        files.update((name, Counter(counts)) for name, counts in previous["files"])
+        mentions.update((name, count) for name, count in previous["mentions"])
+
+    for name, counts in delta.digest.files.items():
+        merged = files.pop(name, Counter())
+        merged.update(counts)
+        files[name] = merged
+    for name, count in delta.digest.mentions.items():
+        mentions[name] = mentions.pop(name, 0) + count
+    for table in (files, mentions):
+        while len(table) > delta.digest.max_files:
+            table.popitem(last=False)
+
+    memory_dir.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "version": DIGEST_VERSION,
+        "transcript": delta.checkpoint.transcript,
+        "end_offset": delta.checkpoint.offset,
+        "files": [[name, dict(counts)] for name, counts in files.items()],
+        "mentions": [[name, count] for name, count in mentions.items()],
+    }) + "\n", encoding="utf-8")
+    return path
+
+
+def load_digest(path: Path) -> Digest | None:
+    """Rebuild the saved file signals as a Digest, or None if unusable."""
+    data = _read_digest(path)
+    if data is None:
+        return None
+    return Digest(
+        end_offset=data["end_offset"],
+        files=OrderedDict((name, Counter(counts)) for name, counts in data["files"]),
+        mentions=OrderedDict((name, count) for name, count in data["mentions"]),
+    )
+
+
+def render(delta: Delta, goal: str | None = None) -> str:
+    """Render a delta as markdown for the handoff command."""
+    if delta.previous is None:
+        mode = "full (no usable previous checkpoint)"
+    else:
+        mode = f"incremental from offset {delta.start}"
+    lines = [
+        delta.checkpoint.header(),
+        f"**Previous Memory**: {delta.previous or 'none'}",
+        f"**Mode**: {mode}",
+        "",
+    ]
+    return "\n".join(lines) + delta.digest.to_markdown(goal)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("transcript", nargs="?", type=Path,
+                        help="session transcript (.jsonl)")
+    parser.add_argument("--goal", help="handoff goal to include in the digest")
+    parser.add_argument("--memory-dir", type=Path, default=Path(".claude"),
+                        help="directory holding handoff memory files")
+    args = parser.parse_args(argv)
+
+    path = args.transcript or find_latest_transcript()
+    if path is None or not path.is_file():
+        print("Error: no session transcript found", file=sys.stderr)
+        return 1
+
+    with Tracer(args.memory_dir).span("summarise") as span:
+        delta = extract_delta(path, args.memory_dir)
+        output = render(delta, args.goal)
+        span.bytes_written = save_digest(args.memory_dir, delta).stat().st_size
+        span.tokens_in = bytes_tokens(delta.digest.end_offset - delta.start)
+        span.tokens_out = bytes_tokens(len(output.encode()))
+    sys.stdout.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Retention and compaction for handoff memory files.
+
+Older memory files are folded into a rolling summary
+(`.claude/handoff-summary.md`) and moved to `.claude/handoff-archive/`,
+where `/handoff search` still finds them, once they fall outside the
+retention policy. Their warm-start snapshots are removed. The newest memory
+file is always kept. When the summary grows past max_summary_entries its
+oldest entries are dropped and the run says so; the archived files keep
+their full text. A small manifest (`.claude/handoff-manifest.json`)
+records the latest memory file, the summary and the policy, so a new
+session only needs to load those two files instead of globbing the whole
+directory.
+
+The policy is read from the manifest and can be overridden per run;
+overrides are only written back to the manifest with --save-policy:
+
+    max_count            keep at most this many memory files
+    max_age_days         fold memory files older than this
+    max_bytes            keep the retained memory files under this total size
+    max_summary_entries  keep at most this many entries in the summary
+
+Usage:
+    python3 compaction.py [--memory-dir .claude] [--max-count N]
+                          [--max-age-days N] [--max-bytes N] [--save-policy]
+                          [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+
+from checkpoint import MEMORY_GLOB
+from memory_index import ARCHIVE_NAME, parse_sections
+from snapshot import snapshot_path
+from tracing import Tracer
+
+MANIFEST_NAME = "handoff-manifest.json"
+SUMMARY_NAME = "handoff-summary.md"
+STAMP_FORMAT = "%Y-%m-%d-%H-%M-%S"
+
+# Sections carried into the summary, with the most lines kept for each
+SUMMARY_SECTIONS = (
+    ("Key Decisions", 8),
+    ("Current State", 5),
+    ("Relevant Files", 10),
+)
+SUMMARY_HEADER = (
+    "# Handoff Summary\n\n"
+    "Rolling summary of compacted handoff memory files, newest first.\n"
+)
+ENTRY_PATTERN = re.compile(r"^## ", re.MULTILINE)
+
+
+@dataclass
+class RetentionPolicy:
+    """Limits on the memory files kept in full."""
+
+    max_count: int | None = 20
+    max_age_days: float | None = 30
+    max_bytes: int | None = 1_000_000
+    max_summary_entries: int = 100
+
+    @classmethod
+    def from_dict(cls, data: dict) -> RetentionPolicy:
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+@dataclass
+class MemoryFile:
+    path: Path
+    stamp: str
+    created: float
+    size: int
+
+
+def memory_stamp(path: Path) -> str:
+    """Return the timestamp part of handoff-memory.<stamp>.md."""
+    return path.name[len("handoff-memory."):-len(".md")]
+
+
+def list_memory_files(memory_dir: Path) -> list[MemoryFile]:
+    """Return memory files newest first."""
+    files = []
+    for path in memory_dir.glob(MEMORY_GLOB):
+        stat = path.stat()
+        stamp = memory_stamp(path)
+        try:
+            created = datetime.strptime(stamp, STAMP_FORMAT).timestamp()
+        except ValueError:
+            created = stat.st_mtime
+        files.append(MemoryFile(path, stamp, created, stat.st_size))
+    files.sort(key=lambda f: (f.created, f.stamp), reverse=True)
+    return files
+
+
+def select_evictions(
+    files: list[MemoryFile], policy: RetentionPolicy, now: float | None = None
+) -> list[MemoryFile]:
+    """Return the files (newest first) that fall outside the policy."""
+    now = time.time() if now is None else now
+    evicted = []
+    total = 0
+    for position, memory in enumerate(files):
+        total += memory.size
+        if position == 0:
+            continue  # The latest memory file is always kept
+        too_many = policy.max_count is not None and position >= policy.max_count
+        too_old = (
+            policy.max_age_days is not None
+            and now - memory.created > policy.max_age_days * 86400
+        )
+        too_big = policy.max_bytes is not None and total > policy.max_bytes
+        if too_many or too_old or too_big:
+            evicted.append(memory)
+    return evicted
+
+
+def summary_entry(memory: MemoryFile) -> str:
+    """Condense one memory file into a summary entry."""
+    sections = parse_sections(memory.path.read_text(encoding="utf-8", errors="replace"))
+    lines = [f"## {memory.stamp} — {sections.get('Goal', 'no goal recorded')}"]
+    for name, limit in SUMMARY_SECTIONS:
+        body = [line for line in sections.get(name, "").splitlines() if line.strip()]
+        if not body:
+            continue
+        lines.extend(["", f"**{name}**"])
+        lines.extend(body[:limit])
+        if len(body) > limit:
+            lines.append(f"- … {len(body) - limit} more")
+    return "\n".join(lines) + "\n"
+
+
+def read_summary_entries(summary: Path) -> list[str]:
+    """Return the existing summary entries, newest first."""
+    if not summary.exists():
+        return []
+    text = summary.read_text(encoding="utf-8")
+    starts = [m.start() for m in ENTRY_PATTERN.finditer(text)]
+    return [
+        text[start:end].rstrip() + "\n"
+        for start, end in zip(starts, starts[1:] + [len(text)])
+    ]
+
+
+def write_summary(summary: Path, entries: list[str]) -> None:
+    summary.write_text(SUMMARY_HEADER + "".join("\n" + e for e in entries))
+
+
+def load_policy(memory_dir: Path) -> RetentionPolicy:
+    """Read the retention policy from the manifest, falling back to defaults."""
+    manifest = memory_dir / MANIFEST_NAME
+    try:
+        data = json.loads(manifest.read_text())
+    except (OSError, ValueError):
+        return RetentionPolicy()
+    return RetentionPolicy.from_dict(data.get("policy", {}))
+
+
+def compact(
+    memory_dir: Path,
+    policy: RetentionPolicy | None = None,
+    now: float | None = None,
+    dry_run: bool = False,
+    saved_policy: RetentionPolicy | None = None,
+) -> dict:
+    """
+    Fold evicted memory files into the summary, archive them and rewrite
+    the manifest.
+
+    The manifest records saved_policy, or the policy applied when none is given.
+    """
+    policy = policy or load_policy(memory_dir)
+    files = list_memory_files(memory_dir)
+    evicted = select_evictions(files, policy, now)
+    retained = [f for f in files if f not in evicted]
+    summary = memory_dir / SUMMARY_NAME
+    archive = memory_dir / ARCHIVE_NAME
+    entries = [summary_entry(f) for f in evicted] + read_summary_entries(summary) \
+        if evicted else []
+
+    manifest = {
+        "latest": retained[0].path.name if retained else None,
+        "summary": SUMMARY_NAME if evicted or summary.exists() else None,
+        "retained": [f.path.name for f in retained],
+        "policy": asdict(saved_policy or policy),
+        "compacted": [f.path.name for f in evicted],
+        "archive": ARCHIVE_NAME if evicted or archive.is_dir() else None,
+        "summary_trimmed": max(len(entries) - policy.max_summary_entries, 0),
+    }
+    if dry_run:
+        return manifest
+
+    if evicted:
+        write_summary(summary, entries[: policy.max_summary_entries])
+        archive.mkdir(exist_ok=True)
+        for memory in evicted:
+            memory.path.rename(archive / memory.path.name)
+            snapshot_path(memory.path).unlink(missing_ok=True)
+
+    (memory_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--memory-dir", type=Path, default=Path(".claude"),
+                        help="directory holding handoff memory files")
+    parser.add_argument("--max-count", type=int)
+    parser.add_argument("--max-age-days", type=float)
+    parser.add_argument("--max-bytes", type=int)
+    parser.add_argument("--save-policy", action="store_true",
+                        help="record the overridden limits in the manifest")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what would be compacted without changing files")
+    args = parser.parse_args(argv)
+
+    if not args.memory_dir.is_dir():
+        print(f"Error: {args.memory_dir} does not exist", file=sys.stderr)
+        return 1
+
+    saved = load_policy(args.memory_dir)
+    policy = RetentionPolicy(**asdict(saved))
+    for name in ("max_count", "max_age_days", "max_bytes"):
+        value = getattr(args, name)
+        if value is not None:
+            # Zero or negative disables a limit
+            setattr(policy, name, value if value > 0 else None)
+
+    if args.save_policy:
+        saved = policy
+    if args.dry_run:
+        manifest = compact(args.memory_dir, policy, dry_run=True, saved_policy=saved)
+    else:
+        with Tracer(args.memory_dir).span("compact") as span:
+            manifest = compact(args.memory_dir, policy, saved_policy=saved)
+            written = [args.memory_dir / MANIFEST_NAME]
+            if manifest["compacted"]:
+                written.append(args.memory_dir / SUMMARY_NAME)
+            span.bytes_written = sum(path.stat().st_size for path in written)
+    verb = "Would compact" if args.dry_run else "Compacted"
+    print(f"{verb} {len(manifest['compacted'])} memory file(s); "
+          f"{len(manifest['retained'])} retained")
+    print(f"Latest: {manifest['latest'] or 'none'}")
+    if manifest["summary"]:
+        print(f"Summary: {args.memory_dir / manifest['summary']}")
+    if manifest["summary_trimmed"]:
+        drop = "Would drop" if args.dry_run else "Dropped"
+        print(f"{drop} the {manifest['summary_trimmed']} oldest summary entries "
+              f"(max_summary_entries); their memory files stay in "
+              f"{args.memory_dir / ARCHIVE_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
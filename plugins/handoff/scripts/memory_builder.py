@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted builder for handoff memory files.
+
+Takes a drafted memory file and rewrites it to fit a target token budget.
+Tokens are estimated locally. The header (Created, Goal, Checkpoint, ...)
+is always kept; the sections are then filled in priority order:
+
+    Key Decisions > Current State > Relevant Files > Next Steps to Consider
+    > Technical Details > any other section
+
+A section only gets room once every higher-priority section is in full,
+or cannot fit another line. A section that does not fit is first
+condensed (code blocks dropped, long lines clipped) and then truncated at
+line boundaries; one with no room even for a placeholder is dropped, so
+the total never exceeds the budget once the header fits. The tokens each
+section used are reported, and the total is recorded in the header so the
+new session's startup cost is known.
+
+Usage:
+    python3 memory_builder.py MEMORY_FILE [--budget 2000] [--output PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from tracing import Tracer
+
+DEFAULT_BUDGET = 2000
+CONDENSED_LINE = 120
+
+PRIORITY = (
+    "Key Decisions",
+    "Current State",
+    "Relevant Files",
+    "Next Steps to Consider",
+    "Technical Details",
+)
+
+SECTION_PATTERN = re.compile(r"^### (.+?)\s*$", re.MULTILINE)
+CODE_BLOCK_PATTERN = re.compile(r"^```.*?^```[ \t]*\n?", re.MULTILINE | re.DOTALL)
+TOKENS_PATTERN = re.compile(r"^\*\*Tokens\*\*:.*\n", re.MULTILINE)
+OMITTED = "_Omitted to fit the token budget._\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text without a tokenizer.
+
+    Uses the larger of ~4 characters per token and ~1.3 tokens per word,
+    which tracks real tokenizers closely for both prose and code.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 1.3))
+
+
+@dataclass
+class Section:
+    title: str
+    body: str
+    tokens: int = 0
+    original: int = 0
+    status: str = "full"
+
+    def render(self) -> str:
+        if self.status == "dropped":
+            return ""
+        return f"### {self.title}\n{self.body}"
+
+
+def split_memory(text: str) -> tuple[str, list[Section]]:
+    """Split a memory file into its header and ### sections, in order."""
+    matches = list(SECTION_PATTERN.finditer(text))
+    if not matches:
+        return text, []
+    header = text[: matches[0].start()]
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end() + 1:end]
+        sections.append(Section(match.group(1), body))
+    return header, sections
+
+
+def condense(body: str) -> str:
+    """Drop code blocks and clip long lines."""
+    body = CODE_BLOCK_PATTERN.sub("", body)
+    lines = []
+    for line in body.splitlines():
+        if len(line) > CONDENSED_LINE:
+            line = line[: CONDENSED_LINE - 1].rstrip() + "…"
+        lines.append(line)
+    return "\n".join(lines).rstrip() + "\n\n"
+
+
+def truncate(body: str, budget: int) -> str:
+    """Keep whole lines of body that fit in budget tokens."""
+    lines = [line for line in body.splitlines() if line.strip()]
+    kept = []
+    for position, line in enumerate(lines):
+        remaining = len(lines) - position
+        marker = f"- … {remaining} more omitted (token budget)"
+        candidate = "\n".join(kept + [line]) + "\n"
+        if estimate_tokens(candidate) + estimate_tokens(marker) > budget:
+            if not kept:
+                return OMITTED + "\n"
+            return "\n".join(kept + [marker]) + "\n\n"
+        kept.append(line)
+    return "\n".join(kept) + "\n\n"
+
+
+def fit(section: Section, budget: int) -> None:
+    """Shrink a section in place until it fits budget tokens."""
+    section.original = estimate_tokens(section.render())
+    if section.original <= budget:
+        section.tokens = section.original
+        return
+
+    heading = estimate_tokens(f"### {section.title}\n")
+    condensed = condense(section.body)
+    if estimate_tokens(condensed) + heading <= budget:
+        section.body, section.status = condensed, "condensed"
+    else:
+        # Line-by-line estimates can round below the whole; tighten until it fits
+        room = budget - heading
+        while True:
+            body = truncate(condensed, room)
+            if body.startswith(OMITTED) or estimate_tokens(body) + heading <= budget:
+                break
+            room -= 1
+        section.body = body
+        section.status = "omitted" if body.startswith(OMITTED) else "truncated"
+    section.tokens = estimate_tokens(section.render())
+    if section.tokens > budget:
+        section.status, section.tokens = "dropped", 0
+
+
+def priority(section: Section) -> int:
+    try:
+        return PRIORITY.index(section.title)
+    except ValueError:
+        return len(PRIORITY)
+
+
+def build(text: str, budget: int = DEFAULT_BUDGET) -> tuple[str, dict]:
+    """Fit a memory file into budget tokens and report per-section usage."""
+    header, sections = split_memory(TOKENS_PATTERN.sub("", text))
+    # Leave room for the **Tokens** line added to the header below
+    header_tokens = estimate_tokens(header) + 12
+    available = max(budget - header_tokens, 0)
+
+    # Highest priority first; lower sections only get what is left over
+    for section in sorted(sections, key=priority):
+        fit(section, available)
+        available -= section.tokens
+
+    total = header_tokens + sum(s.tokens for s in sections)
+    tokens_line = f"**Tokens**: ~{total} (budget {budget})\n"
+    header = _add_header_line(header, tokens_line)
+    body = header + "".join(s.render() for s in sections)
+    report = {
+        "budget": budget,
+        "total": total,
+        "header": header_tokens,
+        "sections": [
+            {"title": s.title, "tokens": s.tokens, "original": s.original,
+             "status": s.status}
+            for s in sections
+        ],
+    }
+    return body, report
+
+
+def _add_header_line(header: str, line: str) -> str:
+    """Insert line after the last **Field**: line of the header."""
+    fields = list(re.finditer(r"^\*\*[^*]+\*\*:.*\n", header, re.MULTILINE))
+    if not fields:
+        return header + line
+    end = fields[-1].end()
+    return header[:end] + line + header[end:]
+
+
+def format_report(report: dict) -> str:
+    """Render the per-section token report as a table."""
+    lines = [
+        "| Section | Tokens | Original | Status |",
+        "|---------|--------|----------|--------|",
+        f"| (header) | {report['header']} | {report['header']} | kept |",
+    ]
+    for s in report["sections"]:
+        lines.append(f"| {s['title']} | {s['tokens']} | {s['original']} | {s['status']} |")
+    lines.append(f"| **Total** | **{report['total']}** | | budget {report['budget']} |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("memory_file", type=Path)
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET,
+                        help=f"target token budget (default {DEFAULT_BUDGET})")
+    parser.add_argument("--output", type=Path,
+                        help="write here instead of rewriting the memory file")
+    args = parser.parse_args(argv)
+
+    if not args.memory_file.is_file():
+        print(f"Error: {args.memory_file} not found", file=sys.stderr)
+        return 1
+
+    target = args.output or args.memory_file
+    with Tracer(target.parent).span("write-memory") as span:
+        text = args.memory_file.read_text(encoding="utf-8")
+        body, report = build(text, args.budget)
+        target.write_text(body, encoding="utf-8")
+        span.bytes_written = target.stat().st_size
+        span.tokens_in = estimate_tokens(text)
+        span.tokens_out = report["total"]
+    sys.stdout.write(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Full-text index over accumulated handoff memory files.
+
+Memory files are split into the sections the handoff command writes (Goal,
+Key Decisions, Current State, Relevant Files, Technical Details, Next Steps
+to Consider) and stored in a SQLite FTS5 table next to them. Memory files
+that compaction moved into handoff-archive/ are indexed too, so search
+still reaches every handoff. The index is refreshed incrementally: files
+whose mtime and size are unchanged are skipped, and files whose content
+hash is unchanged are not re-parsed.
+
+Usage:
+    python3 memory_index.py search QUERY [--section NAME] [--limit N]
+    python3 memory_index.py update
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from checkpoint import MEMORY_GLOB
+
+INDEX_NAME = "handoff-index.sqlite"
+ARCHIVE_NAME = "handoff-archive"
+
+SECTIONS = (
+    "Key Decisions",
+    "Current State",
+    "Relevant Files",
+    "Technical Details",
+    "Next Steps to Consider",
+)
+
+HEADING_PATTERN = re.compile(r"^#{2,3}\s+(.+?)\s*$", re.MULTILINE)
+GOAL_PATTERN = re.compile(r"^\*\*Goal\*\*:\s*(.+)$", re.MULTILINE)
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    goal TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_sections USING fts5(
+    path UNINDEXED,
+    section,
+    body,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def parse_sections(text: str) -> dict[str, str]:
+    """Split a memory file into its goal and known sections."""
+    sections = {}
+    goal = GOAL_PATTERN.search(text)
+    if goal:
+        sections["Goal"] = goal.group(1).strip()
+
+    headings = list(HEADING_PATTERN.finditer(text))
+    for i, heading in enumerate(headings):
+        name = heading.group(1)
+        if name not in SECTIONS:
+            continue
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[heading.end():end].strip()
+        if body:
+            sections[name] = body
+    return sections
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query that ANDs each quoted word."""
+    return " ".join(f'"{token}"' for token in TOKEN_PATTERN.findall(query))
+
+
+@dataclass
+class SearchResult:
+    """One matching section of a memory file."""
+
+    path: str
+    section: str
+    goal: str | None
+    snippet: str
+
+
+class MemoryIndex:
+    """SQLite FTS5 index of the memory files in one directory."""
+
+    def __init__(self, memory_dir: Path, db_path: Path | None = None):
+        self.memory_dir = memory_dir
+        self.db_path = db_path or memory_dir / INDEX_NAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> MemoryIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def memory_files(self) -> Iterator[tuple[str, Path]]:
+        """Kept and archived memory files, keyed by their path under memory_dir."""
+        for directory in (self.memory_dir, self.memory_dir / ARCHIVE_NAME):
+            for path in directory.glob(MEMORY_GLOB):
+                yield path.relative_to(self.memory_dir).as_posix(), path
+
+    def update(self) -> dict[str, int]:
+        """Bring the index in line with the memory directory."""
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT path, mtime_ns, size, hash FROM memory_files"
+            )
+        }
+        seen = set()
+
+        with self.conn:
+            for key, memory_file in self.memory_files():
+                seen.add(key)
+                stat = memory_file.stat()
+                previous = known.get(key)
+                if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+
+                data = memory_file.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                if previous and previous[2] == digest:
+                    # Touched but not edited; just remember the new mtime
+                    self.conn.execute(
+                        "UPDATE memory_files SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (stat.st_mtime_ns, stat.st_size, key),
+                    )
+                    stats["unchanged"] += 1
+                    continue
+
+                if previous:
+                    # FTS5 deletes scan the table, so only pay for them on edits
+                    self._delete(key)
+                self._store(key, data.decode("utf-8", "replace"), stat, digest)
+                stats["updated" if previous else "added"] += 1
+
+            for key in set(known) - seen:
+                self._delete(key)
+                stats["removed"] += 1
+        return stats
+
+    def _store(self, key: str, text: str, stat, digest: str) -> None:
+        sections = parse_sections(text)
+        self.conn.execute(
+            "INSERT INTO memory_files (path, mtime_ns, size, hash, goal) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, stat.st_mtime_ns, stat.st_size, digest, sections.get("Goal")),
+        )
+        self.conn.executemany(
+            "INSERT INTO memory_sections (path, section, body) VALUES (?, ?, ?)",
+            [(key, name, body) for name, body in sections.items()],
+        )
+
+    def _delete(self, key: str) -> None:
+        self.conn.execute("DELETE FROM memory_files WHERE path = ?", (key,))
+        self.conn.execute("DELETE FROM memory_sections WHERE path = ?", (key,))
+
+    def search(
+        self, query: str, section: str | None = None, limit: int = 10
+    ) -> list[SearchResult]:
+        """Return the best matching sections, most relevant first."""
+        match = to_match_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT s.path, s.section, f.goal, "
+            "snippet(memory_sections, 2, '**', '**', '…', 16) "
+            "FROM memory_sections s JOIN memory_files f ON f.path = s.path "
+            "WHERE memory_sections MATCH ?"
+        )
+        params: list = [match]
+        if section:
+            sql += " AND s.section = ?"
+            params.append(section)
+        sql += " ORDER BY bm25(memory_sections), s.path DESC LIMIT ?"
+        params.append(limit)
+        return [SearchResult(*row) for row in self.conn.execute(sql, params)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--memory-dir", type=Path, default=Path(".claude"),
+                        help="directory holding handoff memory files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="search memory files")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--section", choices=("Goal",) + SECTIONS,
+                        help="only search one section")
+    search.add_argument("--limit", type=int, default=10)
+    commands.add_parser("update", help="refresh the index")
+    args = parser.parse_args(argv)
+
+    if not args.memory_dir.is_dir():
+        print(f"Error: {args.memory_dir} does not exist", file=sys.stderr)
+        return 1
+
+    with MemoryIndex(args.memory_dir) as index:
+        stats = index.update()
+        if args.command == "update":
+            print(", ".join(f"{name} {count}" for name, count in stats.items()))
+            return 0
+
+        results = index.search(" ".join(args.query), args.section, args.limit)
+        if not results:
+            print("No matching handoff memory found.")
+            return 0
+        for result in results:
+            print(f"- {args.memory_dir / result.path} — {result.section}")
+            if result.goal:
+                print(f"  Goal: {result.goal}")
+            print(f"  {' '.join(result.snippet.split())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
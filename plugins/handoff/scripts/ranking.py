@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Deterministic relevant-file ranking for the handoff command.
+
+Scores files in the repository from local signals instead of asking a model
+to guess them:
+
+- Write/Edit and Read tool calls in the session transcript
+- Mentions of the file in user and assistant messages
+- Recency: files touched later in the session score higher
+- Co-change: files that `git log` shows changing together with the files
+  edited in the session
+
+The co-change table is built from recent history once per commit and
+cached in `.claude/handoff-rank-cache.json`, so re-ranking at the same HEAD
+only costs the transcript pass. Files that no longer exist are dropped.
+
+With --digest the file signals come from the `handoff-digest.json` that
+checkpoint.py saved in the same handoff, and the transcript is not read
+again.
+
+Usage:
+    python3 ranking.py [TRANSCRIPT] [--digest .claude/handoff-digest.json]
+                       [--repo .] [--limit 10] [--cache-dir .claude]
+                       [--format markdown|json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from checkpoint import load_digest
+from tracing import Tracer, bytes_tokens
+from transcript import Digest, extract, find_latest_transcript
+
+CACHE_NAME = "handoff-rank-cache.json"
+CACHE_VERSION = 1
+
+# Commits considered for co-change, and the size above which a commit is
+# treated as a bulk change (formatting, renames) and ignored
+HISTORY_DEPTH = 500
+MAX_COMMIT_FILES = 50
+# Pairs seen together fewer times than this are treated as coincidence
+MIN_COCHANGE = 2
+
+WEIGHTS = {
+    "edit": 5.0,
+    "write": 5.0,
+    "read": 2.0,
+    "mention": 1.0,
+    "recency": 3.0,
+    "cochange": 4.0,
+}
+
+
+@dataclass
+class RankedFile:
+    """A candidate file with its score and the signals behind it."""
+
+    path: str
+    score: float = 0.0
+    signals: dict = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """Summarise the signals as a short human-readable reason."""
+        parts = []
+        for action in ("edit", "write", "read"):
+            count = self.signals.get(action)
+            if count:
+                parts.append(f"{action} ×{count}")
+        if self.signals.get("mention"):
+            parts.append(f"mentioned ×{self.signals['mention']}")
+        partners = self.signals.get("cochange_with")
+        if partners:
+            parts.append("changes with " + ", ".join(f"`{p}`" for p in partners))
+        return "; ".join(parts) or "related"
+
+
+def git(repo: Path, *args: str) -> str | None:
+    """Run a git command in repo, returning stdout or None on failure."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(repo), *args],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def build_cochange(repo: Path) -> dict:
+    """Count how often each pair of files changed in the same commit."""
+    log = git(repo, "log", f"-n{HISTORY_DEPTH}", "--no-merges", "--relative",
+              "--name-only", "--format=%x00")
+    touches: Counter = Counter()
+    pairs: dict[str, Counter] = defaultdict(Counter)
+    for commit in (log or "").split("\0"):
+        files = sorted({line for line in commit.splitlines() if line.strip()})
+        if not files or len(files) > MAX_COMMIT_FILES:
+            continue
+        touches.update(files)
+        for name in files:
+            for other in files:
+                if other != name:
+                    pairs[name][other] += 1
+    return {"touches": dict(touches), "pairs": {k: dict(v) for k, v in pairs.items()}}
+
+
+def load_cochange(repo: Path, cache_dir: Path | None) -> dict:
+    """Return the co-change table for HEAD, using the per-commit cache."""
+    head = (git(repo, "rev-parse", "HEAD") or "").strip()
+    if not head:
+        return {"touches": {}, "pairs": {}}
+
+    cache = cache_dir / CACHE_NAME if cache_dir else None
+    if cache and cache.exists():
+        try:
+            data = json.loads(cache.read_text())
+            if data.get("version") == CACHE_VERSION and data.get("head") == head:
+                return data["cochange"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    cochange = build_cochange(repo)
+    if cache:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text(json.dumps(
+            {"version": CACHE_VERSION, "head": head, "cochange": cochange}
+        ))
+    return cochange
+
+
+def normalise(path: str, repo: Path) -> str | None:
+    """Return path relative to repo, or None if it lies outside it."""
+    candidate = Path(path)
+    if not candidate.is_absolute():
+        candidate = repo / candidate
+    try:
+        return candidate.resolve().relative_to(repo).as_posix()
+    except ValueError:
+        return None
+
+
+def rank(
+    digest: Digest, repo: Path, cochange: dict | None = None, limit: int = 10
+) -> list[RankedFile]:
+    """Score candidate files and return the top limit, best first."""
+    repo = repo.resolve()
+    candidates: dict[str, RankedFile] = {}
+
+    def candidate(path: str) -> RankedFile | None:
+        relative = normalise(path, repo)
+        if relative is None:
+            return None
+        return candidates.setdefault(relative, RankedFile(relative))
+
+    # Tool calls, with recency taken from touch order (most recent last)
+    touched = list(digest.files.items())
+    for position, (path, counts) in enumerate(touched):
+        ranked = candidate(path)
+        if ranked is None:
+            continue
+        for action, count in counts.items():
+            ranked.signals[action] = ranked.signals.get(action, 0) + count
+        recency = (position + 1) / len(touched)
+        ranked.signals["recency"] = max(ranked.signals.get("recency", 0), recency)
+
+    for path, count in digest.mentions.items():
+        ranked = candidate(path.removeprefix("./"))
+        if ranked is not None:
+            ranked.signals["mention"] = ranked.signals.get("mention", 0) + count
+
+    # Co-change with the files the session edited
+    cochange = cochange or {"touches": {}, "pairs": {}}
+    edited = [
+        r.path for r in candidates.values()
+        if r.signals.get("edit") or r.signals.get("write")
+    ]
+    for source in edited:
+        total = cochange["touches"].get(source)
+        if not total:
+            continue
+        for other, count in cochange["pairs"].get(source, {}).items():
+            if count < MIN_COCHANGE:
+                continue
+            ranked = candidates.setdefault(other, RankedFile(other))
+            ranked.signals["cochange"] = ranked.signals.get("cochange", 0) + count / total
+            ranked.signals.setdefault("cochange_with", []).append(source)
+
+    results = []
+    for ranked in candidates.values():
+        if not (repo / ranked.path).is_file():
+            continue
+        signals = ranked.signals
+        ranked.score = round(
+            WEIGHTS["edit"] * signals.get("edit", 0)
+            + WEIGHTS["write"] * signals.get("write", 0)
+            + WEIGHTS["read"] * signals.get("read", 0)
+            + WEIGHTS["mention"] * signals.get("mention", 0)
+            + WEIGHTS["recency"] * signals.get("recency", 0)
+            + WEIGHTS["cochange"] * min(signals.get("cochange", 0), 1.0),
+            4,
+        )
+        if "cochange_with" in signals:
+            signals["cochange_with"] = sorted(signals["cochange_with"])[:3]
+        results.append(ranked)
+
+    results.sort(key=lambda r: (-r.score, r.path))
+    return results[:limit]
+
+
+def to_markdown(ranked: list[RankedFile]) -> str:
+    """Render ranked files as the memory file's Relevant Files list."""
+    if not ranked:
+        return "- No relevant files identified\n"
+    return "".join(f"- `{r.path}` — {r.describe()}\n" for r in ranked)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("transcript", nargs="?", type=Path,
+                        help="session transcript (.jsonl)")
+    parser.add_argument("--digest", type=Path,
+                        help="file signals saved by checkpoint.py, instead of the transcript")
+    parser.add_argument("--repo", type=Path, default=Path("."),
+                        help="repository root (default: current directory)")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--cache-dir", type=Path, default=Path(".claude"),
+                        help="directory for the per-commit co-change cache")
+    parser.add_argument("--format", choices=("markdown", "json"),
+                        default="markdown")
+    args = parser.parse_args(argv)
+
+    digest = load_digest(args.digest) if args.digest else None
+    path = None
+    if digest is None:
+        path = args.transcript or find_latest_transcript()
+        if path is None or not path.is_file():
+            print("Error: no session transcript found", file=sys.stderr)
+            return 1
+
+    with Tracer(args.cache_dir).span("rank") as span:
+        cochange = load_cochange(args.repo, args.cache_dir)
+        if digest is None:
+            digest = extract(path)
+            span.tokens_in = bytes_tokens(digest.end_offset)
+        else:
+            span.tokens_in = bytes_tokens(args.digest.stat().st_size)
+        ranked = rank(digest, args.repo, cochange, args.limit)
+        if args.format == "json":
+            output = json.dumps([asdict(r) for r in ranked], indent=2) + "\n"
+        else:
+            output = to_markdown(ranked)
+        span.tokens_out = bytes_tokens(len(output.encode()))
+    sys.stdout.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Repository warm-start snapshots for handoff.
+
+Alongside each memory file the handoff writes a snapshot
+(`.claude/handoff-snapshot.<stamp>.json`) holding the repository file tree
+with sizes and content hashes, plus a short digest (line count, top-level
+symbols, leading comment) of each relevant file. The new session verifies
+the snapshot against the working tree and re-reads only the files that
+changed, instead of re-exploring the repository.
+
+Hashes are git blob ids, so in a git repository unmodified tracked files
+are hashed by git's index rather than by reading them.
+
+Usage:
+    python3 snapshot.py create MEMORY_FILE [--repo .] [--files PATH ...]
+    python3 snapshot.py verify SNAPSHOT [--repo .]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from memory_index import parse_sections
+from ranking import git
+from tracing import Tracer
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PREFIX = "handoff-snapshot."
+
+MAX_SYMBOLS = 12
+SYMBOL_PATTERN = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?"
+    r"(?:def|class|function|interface|type|struct|enum|fn|func)\s+([A-Za-z_][\w]*)"
+    r"|^(#{1,3})\s+(.+)$",
+    re.MULTILINE,
+)
+COMMENT_PATTERN = re.compile(r'^\s*(?:#!.*\n)?\s*(?:"""|\'\'\'|/\*\*?|//|#|<!--)\s*(.+)')
+BACKTICK_PATH = re.compile(r"`([^`\s]+)`")
+SKIP_DIRS = {".git", ".claude", "node_modules", "__pycache__", ".venv", "venv"}
+
+
+def blob_hash(data: bytes) -> str:
+    """Return the git blob id of data."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _hash_file(path: Path) -> str | None:
+    try:
+        return blob_hash(path.read_bytes())
+    except OSError:
+        return None
+
+
+def file_tree(repo: Path) -> dict[str, tuple[int, str]]:
+    """Map each repository file to (size, blob hash)."""
+    staged = git(repo, "ls-files", "-s", "-z")
+    if staged is None:
+        return _walk_tree(repo)
+
+    hashes = {}
+    for entry in staged.split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        hashes[path] = meta.split()[1]
+
+    # Files that differ from the index, and untracked files, are hashed from disk
+    dirty = set((git(repo, "diff", "--name-only", "--relative", "-z") or "").split("\0"))
+    untracked = (git(repo, "ls-files", "-o", "--exclude-standard", "-z") or "").split("\0")
+    dirty.update(untracked)
+    dirty.discard("")
+
+    tree = {}
+    for path in sorted(set(hashes) | dirty):
+        if path.split("/", 1)[0] in SKIP_DIRS:
+            continue
+        full = repo / path
+        try:
+            size = full.stat().st_size
+        except OSError:
+            continue  # Deleted in the working tree
+        if not full.is_file():
+            continue
+        digest = _hash_file(full) if path in dirty or path not in hashes else hashes[path]
+        if digest:
+            tree[path] = (size, digest)
+    return tree
+
+
+def _walk_tree(repo: Path) -> dict[str, tuple[int, str]]:
+    tree = {}
+    for root, dirs, files in os.walk(repo):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            full = Path(root) / name
+            digest = _hash_file(full)
+            if digest:
+                tree[full.relative_to(repo).as_posix()] = (full.stat().st_size, digest)
+    return tree
+
+
+def file_digest(path: Path) -> dict:
+    """Summarise a file in a few fields the new session can read instead."""
+    text = path.read_text(encoding="utf-8", errors="replace")
+    symbols = []
+    for match in SYMBOL_PATTERN.finditer(text):
+        symbols.append(match.group(1) or match.group(3).strip())
+        if len(symbols) == MAX_SYMBOLS:
+            break
+    digest = {"lines": len(text.splitlines())}
+    if symbols:
+        digest["symbols"] = symbols
+    comment = COMMENT_PATTERN.match(text)
+    if comment:
+        digest["summary"] = comment.group(1).strip().rstrip("\"'*/-> ").strip()[:160]
+    return digest
+
+
+def relevant_files(memory_file: Path) -> list[str]:
+    """Return the backticked paths listed under Relevant Files."""
+    sections = parse_sections(memory_file.read_text(encoding="utf-8"))
+    return BACKTICK_PATH.findall(sections.get("Relevant Files", ""))
+
+
+def snapshot_path(memory_file: Path) -> Path:
+    """Return the snapshot path that pairs with a memory file."""
+    stamp = memory_file.name[len("handoff-memory."):-len(".md")]
+    return memory_file.with_name(f"{SNAPSHOT_PREFIX}{stamp}.json")
+
+
+def create(repo: Path, files: list[str]) -> dict:
+    """Build a snapshot of repo with digests for the given files."""
+    repo = repo.resolve()
+    tree = file_tree(repo)
+    digests = {}
+    for name in files:
+        path = name.lstrip("/")
+        if path in tree:
+            digests[path] = {"hash": tree[path][1], **file_digest(repo / path)}
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "head": (git(repo, "rev-parse", "HEAD") or "").strip() or None,
+        "tree": [[path, size, digest] for path, (size, digest) in tree.items()],
+        "relevant": digests,
+    }
+
+
+def verify(snapshot: dict, repo: Path) -> dict[str, list[str]]:
+    """Compare a snapshot to the working tree."""
+    current = file_tree(repo.resolve())
+    recorded = {path: digest for path, _, digest in snapshot["tree"]}
+    report = {"unchanged": [], "changed": [], "added": [], "removed": []}
+    for path, digest in recorded.items():
+        if path not in current:
+            report["removed"].append(path)
+        elif current[path][1] == digest:
+            report["unchanged"].append(path)
+        else:
+            report["changed"].append(path)
+    report["added"] = sorted(set(current) - set(recorded))
+    return report
+
+
+def render_verify(snapshot: dict, report: dict[str, list[str]]) -> str:
+    """Render a verification report for the new session."""
+    lines = [
+        f"Snapshot from {snapshot['created']}"
+        + (f" at {snapshot['head'][:12]}" if snapshot.get("head") else ""),
+        f"Unchanged: {len(report['unchanged'])} files (trust the snapshot)",
+    ]
+    for key, title in (
+        ("changed", "Changed (re-read these)"),
+        ("added", "Added"),
+        ("removed", "Removed"),
+    ):
+        if report[key]:
+            lines.append(f"{title}:")
+            lines.extend(f"- {path}" for path in report[key])
+
+    unchanged = set(report["unchanged"])
+    if snapshot["relevant"]:
+        lines.extend(["", "Relevant files:"])
+    for path, digest in snapshot["relevant"].items():
+        state = "unchanged" if path in unchanged else "CHANGED"
+        detail = f"{digest['lines']} lines"
+        if digest.get("symbols"):
+            detail += "; " + ", ".join(digest["symbols"])
+        lines.append(f"- `{path}` ({state}) — {detail}")
+        if digest.get("summary"):
+            lines.append(f"  {digest['summary']}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create_cmd = commands.add_parser("create", help="write a snapshot for a memory file")
+    create_cmd.add_argument("memory_file", type=Path)
+    create_cmd.add_argument("--repo", type=Path, default=Path("."))
+    create_cmd.add_argument("--files", nargs="*",
+                            help="files to digest (default: the memory file's Relevant Files)")
+
+    verify_cmd = commands.add_parser("verify", help="compare a snapshot to the working tree")
+    verify_cmd.add_argument("snapshot", type=Path)
+    verify_cmd.add_argument("--repo", type=Path, default=Path("."))
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        if not args.memory_file.is_file():
+            print(f"Error: {args.memory_file} not found", file=sys.stderr)
+            return 1
+        target = snapshot_path(args.memory_file)
+        with Tracer(target.parent).span("snapshot") as span:
+            files = args.files if args.files is not None else relevant_files(args.memory_file)
+            snapshot = create(args.repo, files)
+            target.write_text(json.dumps(snapshot, separators=(",", ":")) + "\n")
+            span.bytes_written = target.stat().st_size
+        print(f"Snapshot: {target} ({len(snapshot['tree'])} files, "
+              f"{len(snapshot['relevant'])} digests)")
+        return 0
+
+    try:
+        snapshot = json.loads(args.snapshot.read_text())
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read snapshot: {e}", file=sys.stderr)
+        return 1
+    sys.stdout.write(render_verify(snapshot, verify(snapshot, args.repo)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
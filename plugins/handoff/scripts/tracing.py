@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Per-step latency traces for /handoff.
+
+Every handoff appends one span per step to `.claude/handoff-trace.jsonl`:
+
+    {"run": "20260301-101500-4f2a", "step": "summarise", "started": 1772360100.2,
+     "seconds": 0.412, "tokens_in": 120431, "tokens_out": 1873, "bytes_written": 0}
+
+The local steps time themselves: checkpoint.py (summarise), ranking.py
+(rank), memory_builder.py (write-memory), snapshot.py (snapshot) and
+compaction.py (compact). The model steps, the Haiku extraction and the
+handoff prompt, are timed by running `begin` before them and `end` after;
+`end` estimates tokens from the files given with --input and --output, or
+takes --tokens-in and --tokens-out as reported by the model.
+
+`start` opens a run, and every span until the next `start` carries its id.
+`report` shows one row per step for the latest run (or --run, or the
+median of the last --runs). Token counts not reported by a model are
+estimated at about four bytes per token. Tracing never fails a handoff: errors
+writing the trace are ignored, and HANDOFF_TRACE=0 turns it off.
+
+Usage:
+    python3 tracing.py [--memory-dir .claude] start
+    python3 tracing.py begin STEP
+    python3 tracing.py end STEP [--input FILE ...] [--output FILE ...]
+                                [--tokens-in N] [--tokens-out N]
+    python3 tracing.py report [--run ID | --runs N] [--format text|json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import secrets
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+TRACE_NAME = "handoff-trace.jsonl"
+RUN_NAME = "handoff-trace.run"
+OPEN_NAME = "handoff-trace.open.json"
+MAX_BYTES = 1024 * 1024
+
+# Workflow order, for reports
+STEPS = ("summarise", "rank", "extract", "write-memory", "snapshot", "compact", "prompt")
+
+
+@dataclass
+class Span:
+    """One timed step; fill in tokens and bytes while it runs."""
+
+    run: str
+    step: str
+    started: float
+    seconds: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    bytes_written: int = 0
+
+
+def enabled() -> bool:
+    return os.environ.get("HANDOFF_TRACE", "1") != "0"
+
+
+def bytes_tokens(size: int) -> int:
+    """Estimated tokens in size bytes of text."""
+    return math.ceil(size / 4)
+
+
+def file_tokens(paths: list[Path]) -> int:
+    """Estimated tokens in the existing files among paths."""
+    return sum(bytes_tokens(path.stat().st_size) for path in paths if path.is_file())
+
+
+class Tracer:
+    """Appends spans to the trace file in a memory directory."""
+
+    def __init__(
+        self,
+        memory_dir: Path,
+        clock: Callable[[], float] = time.time,
+        timer: Callable[[], float] = time.perf_counter,
+    ):
+        self.memory_dir = memory_dir
+        self.path = memory_dir / TRACE_NAME
+        self.clock = clock
+        self.timer = timer
+
+    # Runs
+
+    def start_run(self) -> str:
+        """Open a new run; later spans carry its id."""
+        run = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.clock()))
+        run = f"{run}-{secrets.token_hex(2)}"
+        self._write(RUN_NAME, run + "\n")
+        return run
+
+    def current_run(self) -> str:
+        """HANDOFF_TRACE_RUN, the run opened by `start`, or "adhoc"."""
+        if os.environ.get("HANDOFF_TRACE_RUN"):
+            return os.environ["HANDOFF_TRACE_RUN"]
+        try:
+            return (self.memory_dir / RUN_NAME).read_text().strip() or "adhoc"
+        except OSError:
+            return "adhoc"
+
+    # Spans
+
+    @contextmanager
+    def span(self, step: str) -> Iterator[Span]:
+        """Time the body as step; the span is recorded even if the body raises."""
+        span = Span(self.current_run(), step, self.clock())
+        began = self.timer()
+        try:
+            yield span
+        finally:
+            span.seconds = round(self.timer() - began, 6)
+            self.record(span)
+
+    def begin(self, step: str) -> None:
+        """Mark the start of a step timed across processes (a model call)."""
+        opened = self._read_open()
+        opened[step] = self.clock()
+        self._write(OPEN_NAME, json.dumps(opened))
+
+    def end(self, step: str, tokens_in: int = 0, tokens_out: int = 0,
+            bytes_written: int = 0) -> Span:
+        """Record a step started with begin (or a zero-length one if it was not)."""
+        opened = self._read_open()
+        now = self.clock()
+        started = opened.pop(step, now)
+        self._write(OPEN_NAME, json.dumps(opened))
+        span = Span(self.current_run(), step, started, round(now - started, 6),
+                    tokens_in, tokens_out, bytes_written)
+        self.record(span)
+        return span
+
+    def record(self, span: Span) -> None:
+        if not enabled():
+            return
+        try:
+            self.memory_dir.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > MAX_BYTES:
+                self._trim()
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(asdict(span)) + "\n")
+        except OSError:
+            pass
+
+    def _trim(self) -> None:
+        """Drop the oldest half of the trace so it stays under MAX_BYTES."""
+        lines = self.path.read_text(encoding="utf-8").splitlines(keepends=True)
+        partial = self.path.with_name(f".{TRACE_NAME}.{os.getpid()}")
+        partial.write_text("".join(lines[len(lines) // 2:]), encoding="utf-8")
+        os.replace(partial, self.path)
+
+    def _read_open(self) -> dict:
+        try:
+            return json.loads((self.memory_dir / OPEN_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, name: str, text: str) -> None:
+        if not enabled():
+            return
+        try:
+            self.memory_dir.mkdir(parents=True, exist_ok=True)
+            (self.memory_dir / name).write_text(text)
+        except OSError:
+            pass
+
+    # Reading
+
+    def spans(self) -> list[dict]:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return []
+        spans = []
+        for line in lines:
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+            # Lines from other tools, or torn writes, are not spans
+            if isinstance(span, dict) and "run" in span and "step" in span:
+                spans.append(span)
+        return spans
+
+
+def summarise(spans: list[dict], run: str | None = None, runs: int = 1) -> dict:
+    """
+    Per-step totals for one run (the latest by default), or the median of
+    each step over the last runs.
+    """
+    order = list(dict.fromkeys(span["run"] for span in spans))
+    selected = [run] if run else order[-runs:]
+    per_run: dict[str, dict[str, dict]] = {name: {} for name in selected}
+    for span in spans:
+        if span["run"] not in per_run:
+            continue
+        step = per_run[span["run"]].setdefault(
+            span["step"], {"seconds": 0.0, "tokens_in": 0, "tokens_out": 0, "bytes_written": 0}
+        )
+        for key in step:
+            step[key] += span.get(key, 0)
+
+    steps = sorted({s for totals in per_run.values() for s in totals},
+                   key=lambda s: (STEPS.index(s) if s in STEPS else len(STEPS), s))
+    rows = []
+    for step in steps:
+        values = [totals[step] for totals in per_run.values() if step in totals]
+        row = {"step": step}
+        for key in ("seconds", "tokens_in", "tokens_out", "bytes_written"):
+            row[key] = statistics.median(v[key] for v in values)
+        row["seconds"] = round(row["seconds"], 3)
+        rows.append(row)
+    return {
+        "runs": selected,
+        "steps": rows,
+        "total_seconds": round(sum(row["seconds"] for row in rows), 3),
+    }
+
+
+def format_report(summary: dict) -> str:
+    """Render a summary as the same kind of table memory_builder prints."""
+    label = summary["runs"][0] if len(summary["runs"]) == 1 \
+        else f"median of {len(summary['runs'])} runs"
+    lines = [
+        f"Run: {label}",
+        "",
+        "| Step | Seconds | Tokens in | Tokens out | Bytes written |",
+        "|------|---------|-----------|------------|---------------|",
+    ]
+    for row in summary["steps"]:
+        lines.append(f"| {row['step']} | {row['seconds']:.3f} | {row['tokens_in']:g} | "
+                     f"{row['tokens_out']:g} | {row['bytes_written']:g} |")
+    lines.append(f"| **Total** | **{summary['total_seconds']:.3f}** | | | |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--memory-dir", type=Path, default=Path(".claude"),
+                        help="directory holding handoff memory files and the trace")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("start", help="open a new run")
+    begin = commands.add_parser("begin", help="mark the start of a model step")
+    begin.add_argument("step")
+    end = commands.add_parser("end", help="record a model step started with begin")
+    end.add_argument("step")
+    end.add_argument("--input", nargs="*", type=Path, default=[],
+                     help="files sent to the model, for a token estimate")
+    end.add_argument("--output", nargs="*", type=Path, default=[],
+                     help="files the step wrote, for tokens and bytes written")
+    end.add_argument("--tokens-in", type=int, help="input tokens reported by the model")
+    end.add_argument("--tokens-out", type=int, help="output tokens reported by the model")
+    report = commands.add_parser("report", help="per-step timings")
+    report.add_argument("--run", help="run id (default: the latest)")
+    report.add_argument("--runs", type=int, default=1, help="median over the last N runs")
+    report.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    tracer = Tracer(args.memory_dir)
+    if args.command == "start":
+        print(f"Run: {tracer.start_run()}")
+    elif args.command == "begin":
+        tracer.begin(args.step)
+    elif args.command == "end":
+        written = sum(path.stat().st_size for path in args.output if path.is_file())
+        span = tracer.end(
+            args.step,
+            args.tokens_in if args.tokens_in is not None else file_tokens(args.input),
+            args.tokens_out if args.tokens_out is not None else file_tokens(args.output),
+            written,
+        )
+        print(f"{span.step}: {span.seconds:.3f}s")
+    else:
+        spans = tracer.spans()
+        if not spans:
+            print(f"Error: no trace at {tracer.path}", file=sys.stderr)
+            return 1
+        summary = summarise(spans, args.run, max(args.runs, 1))
+        if not summary["steps"]:
+            print(f"Error: no spans for run {args.run}", file=sys.stderr)
+            return 1
+        sys.stdout.write(json.dumps(summary, indent=2) + "\n" if args.format == "json"
+                         else format_report(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Streaming transcript extractor for the handoff command.
+
+Reads a Claude Code session transcript (JSONL, one event per line) as a
+generator and folds it into a compact digest: touched files, tool calls,
+decisions, errors and recent user requests. Every collection in the digest
+is capped, so memory stays flat regardless of transcript size, and only the
+digest is handed to Haiku.
+
+Usage:
+    python3 transcript.py [TRANSCRIPT] [--goal GOAL] [--format markdown|json]
+
+When TRANSCRIPT is omitted the most recently modified transcript for the
+current working directory under ~/.claude/projects/ is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+# Tools whose input names a single file that the session touched
+FILE_TOOLS = {
+    "Read": "read",
+    "Write": "write",
+    "Edit": "edit",
+    "MultiEdit": "edit",
+    "NotebookEdit": "edit",
+}
+FILE_INPUT_KEYS = ("file_path", "notebook_path", "path")
+
+DECISION_PATTERN = re.compile(
+    r"\b(decided|decision|we(?:'ll| will) use|going with|chose|opted|"
+    r"instead of|switch(?:ed)? to|settled on)\b",
+    re.IGNORECASE,
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Path-like tokens in prose: at least one directory or a file extension
+PATH_PATTERN = re.compile(
+    r"(?<![\w/.-])((?:[\w.-]+/)+[\w.-]+|[\w-]+(?:\.[\w-]+)*\.[A-Za-z][A-Za-z0-9]{0,5})(?![\w/])"
+)
+
+MAX_TEXT = 240
+
+
+def _clip(text: str, limit: int = MAX_TEXT) -> str:
+    """Collapse whitespace and truncate text to a single short line."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[: limit - 1].rstrip() + "…"
+
+
+def default_transcript_dir(cwd: Path | None = None) -> Path:
+    """Return the ~/.claude/projects/ directory holding transcripts for cwd."""
+    cwd = (cwd or Path.cwd()).resolve()
+    slug = re.sub(r"[^A-Za-z0-9]", "-", str(cwd))
+    return Path.home() / ".claude" / "projects" / slug
+
+
+def find_latest_transcript(cwd: Path | None = None) -> Path | None:
+    """Return the most recently modified transcript for cwd, if any."""
+    directory = default_transcript_dir(cwd)
+    if not directory.is_dir():
+        return None
+    candidates = list(directory.glob("*.jsonl"))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: p.stat().st_mtime)
+
+
+def iter_events(path: Path, start: int = 0) -> Iterator[tuple[int, dict]]:
+    """
+    Yield (end_offset, event) for each JSON line from byte offset start.
+
+    The file is read line by line in binary mode so offsets are exact byte
+    positions. Blank and malformed lines are skipped, and a trailing line
+    without a newline (a write still in progress) is left for the next run.
+    """
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        offset = start
+        for line in handle:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                yield offset, event
+
+
+def _content_blocks(event: dict) -> list:
+    """Return the message content of an event as a list of blocks."""
+    message = event.get("message")
+    if not isinstance(message, dict):
+        return []
+    content = message.get("content")
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    if isinstance(content, list):
+        return [block for block in content if isinstance(block, dict)]
+    return []
+
+
+def _result_text(block: dict) -> str:
+    """Flatten the content of a tool_result block to plain text."""
+    content = block.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return ""
+
+
+@dataclass
+class Digest:
+    """Bounded summary of a transcript, built one event at a time."""
+
+    max_files: int = 200
+    max_decisions: int = 20
+    max_errors: int = 20
+    max_requests: int = 10
+
+    turns: int = 0
+    user_turns: int = 0
+    assistant_turns: int = 0
+    end_offset: int = 0
+    tool_calls: Counter = field(default_factory=Counter)
+    files: OrderedDict = field(default_factory=OrderedDict)
+    mentions: OrderedDict = field(default_factory=OrderedDict)
+    decisions: deque = field(init=False)
+    errors: deque = field(init=False)
+    requests: deque = field(init=False)
+    _pending_tools: OrderedDict = field(default_factory=OrderedDict, repr=False)
+
+    def __post_init__(self):
+        self.decisions = deque(maxlen=self.max_decisions)
+        self.errors = deque(maxlen=self.max_errors)
+        self.requests = deque(maxlen=self.max_requests)
+
+    def add(self, event: dict) -> None:
+        """Fold a single transcript event into the digest."""
+        kind = event.get("type")
+        if kind == "user":
+            self._add_user(event)
+        elif kind == "assistant":
+            self._add_assistant(event)
+
+    def _add_user(self, event: dict) -> None:
+        self.turns += 1
+        self.user_turns += 1
+        for block in _content_blocks(event):
+            block_type = block.get("type")
+            if block_type == "text" and not event.get("isMeta"):
+                text = block.get("text", "")
+                if text.strip():
+                    self.requests.append(_clip(text))
+                    self._add_mentions(text)
+            elif block_type == "tool_result" and block.get("is_error"):
+                tool = self._pending_tools.get(block.get("tool_use_id"), "tool")
+                self.errors.append(f"[{tool}] {_clip(_result_text(block))}")
+
+    def _add_assistant(self, event: dict) -> None:
+        self.turns += 1
+        self.assistant_turns += 1
+        for block in _content_blocks(event):
+            block_type = block.get("type")
+            if block_type == "text":
+                self._add_decisions(block.get("text", ""))
+                self._add_mentions(block.get("text", ""))
+            elif block_type == "tool_use":
+                self._add_tool_use(block)
+
+    def _add_decisions(self, text: str) -> None:
+        for sentence in SENTENCE_SPLIT.split(text):
+            if DECISION_PATTERN.search(sentence):
+                self.decisions.append(_clip(sentence))
+
+    def _add_mentions(self, text: str) -> None:
+        for match in PATH_PATTERN.finditer(text):
+            path = match.group(1).rstrip(".")
+            count = self.mentions.pop(path, 0)
+            self.mentions[path] = count + 1
+            while len(self.mentions) > self.max_files:
+                self.mentions.popitem(last=False)
+
+    def _add_tool_use(self, block: dict) -> None:
+        name = block.get("name") or "unknown"
+        self.tool_calls[name] += 1
+
+        # Remember recent tool ids so errors can be attributed to a tool
+        self._pending_tools[block.get("id")] = name
+        while len(self._pending_tools) > 64:
+            self._pending_tools.popitem(last=False)
+
+        action = FILE_TOOLS.get(name)
+        tool_input = block.get("input")
+        if action is None or not isinstance(tool_input, dict):
+            return
+        for key in FILE_INPUT_KEYS:
+            path = tool_input.get(key)
+            if isinstance(path, str) and path:
+                self.touch(path, action)
+                break
+
+    def touch(self, path: str, action: str) -> None:
+        """Record a file action, evicting the least recently touched file."""
+        counts = self.files.pop(path, None) or Counter()
+        counts[action] += 1
+        self.files[path] = counts
+        while len(self.files) > self.max_files:
+            self.files.popitem(last=False)
+
+    def to_dict(self) -> dict:
+        """Return the digest as plain JSON-serialisable data."""
+        return {
+            "turns": self.turns,
+            "user_turns": self.user_turns,
+            "assistant_turns": self.assistant_turns,
+            "end_offset": self.end_offset,
+            "tool_calls": dict(self.tool_calls.most_common()),
+            "files": {
+                path: dict(counts) for path, counts in reversed(self.files.items())
+            },
+            "mentions": dict(reversed(self.mentions.items())),
+            "decisions": list(self.decisions),
+            "errors": list(self.errors),
+            "requests": list(self.requests),
+        }
+
+    def to_markdown(self, goal: str | None = None) -> str:
+        """Render the digest as compact markdown for the Haiku prompt."""
+        lines = ["# Transcript Digest", ""]
+        if goal:
+            lines.append(f"**Goal**: {goal}")
+        lines.append(
+            f"**Turns**: {self.turns} "
+            f"(user {self.user_turns}, assistant {self.assistant_turns})"
+        )
+        if self.tool_calls:
+            calls = ", ".join(f"{n} {c}" for n, c in self.tool_calls.most_common())
+            lines.append(f"**Tool calls**: {calls}")
+
+        sections = [
+            ("Touched Files", [
+                f"`{path}` ({', '.join(f'{a} {c}' for a, c in sorted(counts.items()))})"
+                for path, counts in reversed(self.files.items())
+            ]),
+            ("Decisions", list(self.decisions)),
+            ("Errors", list(self.errors)),
+            ("Recent Requests", list(self.requests)),
+        ]
+        for title, items in sections:
+            if not items:
+                continue
+            lines.extend(["", f"## {title}"])
+            lines.extend(f"- {item}" for item in items)
+        return "\n".join(lines) + "\n"
+
+
+def extract(path: Path, start: int = 0, digest: Digest | None = None) -> Digest:
+    """Stream the transcript at path from byte offset start into a digest."""
+    digest = digest or Digest()
+    digest.end_offset = start
+    for offset, event in iter_events(path, start):
+        digest.add(event)
+        digest.end_offset = offset
+    return digest
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("transcript", nargs="?", type=Path,
+                        help="session transcript (.jsonl)")
+    parser.add_argument("--goal", help="handoff goal to include in the digest")
+    parser.add_argument("--format", choices=("markdown", "json"),
+                        default="markdown")
+    args = parser.parse_args(argv)
+
+    path = args.transcript or find_latest_transcript()
+    if path is None or not path.is_file():
+        print("Error: no session transcript found", file=sys.stderr)
+        return 1
+
+    digest = extract(path)
+    if args.format == "json":
+        print(json.dumps(digest.to_dict(), indent=2))
+    else:
+        sys.stdout.write(digest.to_markdown(args.goal))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the /handoff workflow.
+
+Generates synthetic session transcripts of increasing size and replays
+each one through the workflow in a scratch repository: the digest
+(checkpoint.py), ranking, a stand-in for the Haiku extraction, the
+token-budgeted memory file, the snapshot, compaction and the handoff
+prompt. The local steps run through their command-line entry points, so
+the spans read back from the trace are the ones a real /handoff writes.
+
+Each step is checked against a wall-time threshold of
+`base + per_1k * turns / 1000` seconds. The thresholds are five to ten
+times the times measured on a laptop (about 0.4s to digest 10k turns), to
+absorb CI noise while still catching an accidental quadratic pass. Output sizes that must not grow with the
+session (the digest, memory file and prompt) have fixed token limits.
+
+Usage:
+    python3 tests/benchmark.py [--turns 10 100 1000 10000] [--format text|json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import checkpoint  # noqa: E402
+import compaction  # noqa: E402
+import memory_builder  # noqa: E402
+import ranking  # noqa: E402
+import snapshot  # noqa: E402
+from tracing import Tracer, bytes_tokens, summarise  # noqa: E402
+
+SIZES = (10, 100, 1_000, 10_000)
+GOAL = "finish the retry policy for the sync client"
+REPO_FILES = 60
+BUDGET = memory_builder.DEFAULT_BUDGET
+
+# Seconds allowed per step: base + per_1k * turns / 1000
+THRESHOLDS = {
+    "summarise": (0.5, 0.25),
+    "rank": (0.5, 0.25),
+    "extract": (0.2, 0.01),
+    "write-memory": (0.2, 0.01),
+    "snapshot": (0.5, 0.01),
+    "compact": (0.2, 0.01),
+    "prompt": (0.1, 0.01),
+}
+
+# Tokens a step may produce however long the session was
+MAX_TOKENS_OUT = {
+    "summarise": 12_000,
+    "write-memory": BUDGET,
+    "prompt": 1_000,
+}
+
+MEMORY_TEMPLATE = """# Handoff Memory
+
+**Created**: {created}
+**Goal**: {goal}
+**Source Thread**: benchmark
+{checkpoint}
+
+## Extracted Context
+
+{extraction}
+### Relevant Files
+{files}
+"""
+
+PROMPT_TEMPLATE = """# Handoff from Previous Session
+
+**Goal**: {goal}
+
+## Quick Context Summary
+
+Review the memory file created at `{memory}` for the full extracted context.
+
+## Files to Review
+
+{files}
+## Next Action
+
+Your goal is: **{goal}**
+"""
+
+
+# Synthetic sessions
+
+
+def make_repo(root: Path) -> list[Path]:
+    """A scratch repository of small Python modules; returns their paths."""
+    paths = []
+    for number in range(REPO_FILES):
+        path = root / "src" / f"pkg_{number % 6}" / f"module_{number}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            f'"""Module {number} of the synthetic project."""\n\n'
+            + "".join(f"def function_{n}(value):\n    return value + {n}\n\n" for n in range(8))
+        )
+        paths.append(path)
+    return paths
+
+
+def make_transcript(
+    path: Path, turns: int, repo: Path, files: list[Path], seed: int = 0
+) -> Path:
+    """
+    Write a session of turns user/assistant exchanges: a request naming a
+    file, a reply (sometimes stating a decision) with a Read, Edit or Write,
+    and the tool result (sometimes an error).
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as handle:
+        for turn in range(turns):
+            # Sessions concentrate on a few files, with a long tail
+            target = files[min(int(rng.expovariate(0.15)), len(files) - 1)]
+            relative = target.relative_to(repo)
+            tool = rng.choice(("Read", "Read", "Edit", "Edit", "Write"))
+            reply = f"Looking at {relative} now."
+            if turn % 7 == 0:
+                reply += f" We decided to keep the backoff in {relative} instead of the caller."
+            events = [
+                {"type": "user", "message": {"role": "user", "content": [
+                    {"type": "text", "text": f"Step {turn}: please update {relative}"},
+                ]}},
+                {"type": "assistant", "message": {"role": "assistant", "content": [
+                    {"type": "text", "text": reply},
+                    {"type": "tool_use", "id": f"tool-{turn}", "name": tool,
+                     "input": {"file_path": str(target), "old_string": "x" * 80}},
+                ]}},
+                {"type": "user", "message": {"role": "user", "content": [
+                    {"type": "tool_result", "tool_use_id": f"tool-{turn}",
+                     "is_error": turn % 50 == 0,
+                     "content": "ok " + "line of output " * rng.randint(2, 30)},
+                ]}},
+            ]
+            for event in events:
+                handle.write(json.dumps(event) + "\n")
+    return path
+
+
+# Workflow replay
+
+
+def _run(main: Callable[[list[str]], int], argv: list[str]) -> str:
+    """Run a script's main and return what it printed."""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        code = main(argv)
+    if code != 0:
+        raise RuntimeError(f"{main.__module__} {' '.join(argv)} exited {code}")
+    return output.getvalue()
+
+
+def stand_in_extraction(digest: str) -> str:
+    """What Haiku would return, built from the digest's sections."""
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in digest.splitlines():
+        if line.startswith("## "):
+            current = sections.setdefault(line[3:], [])
+        elif current is not None and line.startswith("- "):
+            current.append(line)
+    decisions = sections.get("Decisions") or ["- None recorded"]
+    requests = sections.get("Recent Requests") or ["- None recorded"]
+    errors = sections.get("Errors") or ["- None"]
+    return (
+        "### Key Decisions\n" + "\n".join(decisions) + "\n\n"
+        "### Current State\n" + "\n".join(requests) + "\n\n"
+        "### Technical Details\n" + "\n".join(errors) + "\n\n"
+        "### Next Steps to Consider\n- Continue with the goal\n\n"
+    )
+
+
+def replay(repo: Path, transcript: Path, goal: str = GOAL) -> dict[str, dict]:
+    """Run one handoff over transcript; returns its trace summary by step."""
+    memory_dir = repo / ".claude"
+    tracer = Tracer(memory_dir)
+    run = tracer.start_run()
+
+    # Step 1: digest and ranking
+    digest = _run(checkpoint.main, [str(transcript), "--goal", goal,
+                                    "--memory-dir", str(memory_dir)])
+    files = _run(ranking.main, ["--digest", str(memory_dir / checkpoint.DIGEST_NAME),
+                                "--repo", str(repo), "--cache-dir", str(memory_dir)])
+
+    # Step 2: the model call, replaced by a deterministic stand-in
+    tracer.begin("extract")
+    extraction = stand_in_extraction(digest)
+    tracer.end("extract", bytes_tokens(len(digest.encode())),
+               bytes_tokens(len(extraction.encode())))
+
+    # Step 3: memory file, snapshot, compaction
+    stamp = time.strftime("%Y-%m-%d-%H-%M-%S")
+    memory = memory_dir / f"handoff-memory.{stamp}.md"
+    memory.write_text(MEMORY_TEMPLATE.format(
+        created=stamp, goal=goal, checkpoint=digest.splitlines()[0],
+        extraction=extraction, files=files,
+    ))
+    _run(memory_builder.main, [str(memory), "--budget", str(BUDGET)])
+    _run(snapshot.main, ["create", str(memory), "--repo", str(repo)])
+    _run(compaction.main, ["--memory-dir", str(memory_dir)])
+
+    # Step 4: the handoff prompt
+    with tracer.span("prompt") as span:
+        prompt = PROMPT_TEMPLATE.format(goal=goal, memory=memory.relative_to(repo),
+                                        files=files)
+        span.tokens_in = memory_builder.estimate_tokens(memory.read_text())
+        span.tokens_out = memory_builder.estimate_tokens(prompt)
+
+    return {row["step"]: row for row in summarise(tracer.spans(), run)["steps"]}
+
+
+def run_size(turns: int, root: Path) -> dict[str, dict]:
+    """Build a repository and a transcript of turns, and replay it."""
+    repo = root / "repo"
+    files = make_repo(repo)
+    transcript = make_transcript(root / "session.jsonl", turns, repo, files)
+    return replay(repo, transcript)
+
+
+def threshold(step: str, turns: int) -> float:
+    base, per_1k = THRESHOLDS.get(step, (0.5, 0.05))
+    return base + per_1k * turns / 1000
+
+
+def regressions(turns: int, steps: dict[str, dict], timing: bool = True) -> list[str]:
+    """Steps over their time threshold (unless not timing) or output token limit."""
+    problems = []
+    for step, row in steps.items():
+        limit = threshold(step, turns)
+        if timing and row["seconds"] > limit:
+            problems.append(f"{turns} turns: {step} took {row['seconds']:.3f}s "
+                            f"(threshold {limit:.3f}s)")
+        if step in MAX_TOKENS_OUT and row["tokens_out"] > MAX_TOKENS_OUT[step]:
+            problems.append(f"{turns} turns: {step} produced {row['tokens_out']:g} tokens "
+                            f"(limit {MAX_TOKENS_OUT[step]})")
+    missing = set(THRESHOLDS) - set(steps)
+    if missing:
+        problems.append(f"{turns} turns: no spans for {', '.join(sorted(missing))}")
+    return problems
+
+
+def render(results: dict[int, dict[str, dict]]) -> str:
+    """One row per step, one column pair per size."""
+    sizes = list(results)
+    lines = [
+        "| Step | " + " | ".join(f"{n} turns (s) | limit" for n in sizes) + " |",
+        "|------|" + "---|---|" * len(sizes),
+    ]
+    for step in THRESHOLDS:
+        cells = []
+        for turns in sizes:
+            row = results[turns].get(step)
+            cells.append(f"{row['seconds']:.3f}" if row else "-")
+            cells.append(f"{threshold(step, turns):.2f}")
+        lines.append(f"| {step} | " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    results = {}
+    problems = []
+    for turns in args.turns:
+        with tempfile.TemporaryDirectory() as scratch:
+            results[turns] = run_size(turns, Path(scratch))
+        problems += regressions(turns, results[turns])
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        sys.stdout.write(render(results))
+    for problem in problems:
+        print(f"Regression: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Record/replay stand-in for the Claude Agent SDK in integration tests.
+
+The integration tests drive the plugin through the SDK's `query()`. Running
+them live needs a Claude Code CLI, an API key and a network round trip per
+prompt, so by default each test is served from a cassette instead: a JSON
+file under `tests/cassettes/` holding the prompts the test sent and the SDK
+messages that came back. Replayed messages are rebuilt as the SDK's own
+types (AssistantMessage, TextBlock, ...), so the tests cannot tell the
+difference.
+
+The mode is chosen with HANDOFF_SDK_MODE:
+
+    replay   serve messages from the cassette (default; offline)
+    record   run the real SDK and rewrite the cassette
+    live     run the real SDK without touching cassettes
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+CASSETTE_DIR = Path(__file__).parent / "cassettes"
+CASSETTE_VERSION = 1
+MODES = ("replay", "record", "live")
+DEFAULT_MODE = "replay"
+
+
+class CassetteError(Exception):
+    """A cassette is missing, unreadable or out of step with the test."""
+
+
+def sdk_mode() -> str:
+    """Return the configured mode, validated."""
+    mode = os.environ.get("HANDOFF_SDK_MODE", DEFAULT_MODE).strip().lower()
+    if mode not in MODES:
+        raise CassetteError(
+            f"HANDOFF_SDK_MODE must be one of {', '.join(MODES)}, not {mode!r}"
+        )
+    return mode
+
+
+def cassette_path(nodeid: str) -> Path:
+    """Map a pytest node id to its cassette file."""
+    module, _, name = nodeid.partition("::")
+    stem = Path(module).stem
+    return CASSETTE_DIR / stem / (name.replace("::", ".").replace("/", "_") + ".json")
+
+
+def to_record(value: Any) -> Any:
+    """Convert an SDK message (or anything inside one) to plain JSON data."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            "type": type(value).__name__,
+            "fields": {
+                f.name: to_record(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+            },
+        }
+    if isinstance(value, dict):
+        return {str(k): to_record(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_record(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def from_record(data: Any, namespace: Any = None) -> Any:
+    """Rebuild SDK objects from to_record() output."""
+    if namespace is None:
+        import claude_agent_sdk as namespace
+
+    if isinstance(data, list):
+        return [from_record(v, namespace) for v in data]
+    if not isinstance(data, dict):
+        return data
+    if set(data) != {"type", "fields"}:
+        return {k: from_record(v, namespace) for k, v in data.items()}
+
+    cls = getattr(namespace, data["type"], None)
+    if cls is None or not dataclasses.is_dataclass(cls):
+        raise CassetteError(f"Unknown SDK type in cassette: {data['type']}")
+    # Fields the installed SDK no longer has are dropped; new ones keep defaults
+    known = {f.name for f in dataclasses.fields(cls)}
+    return cls(**{
+        k: from_record(v, namespace) for k, v in data["fields"].items() if k in known
+    })
+
+
+class Cassette:
+    """
+    The prompts one test sends and the messages each one produced.
+
+    `query` has the SDK's signature. In replay mode interactions are served
+    in the order they were recorded and each prompt must match the recording.
+    """
+
+    def __init__(
+        self, path: Path, mode: str, live: Callable | None = None, sdk: Any = None
+    ):
+        self.path = path
+        self.mode = mode
+        self._live = live
+        self._sdk = sdk
+        self.interactions: list[dict] = []
+        self._position = 0
+        if mode == "replay":
+            self.interactions = self._load()
+
+    def _load(self) -> list[dict]:
+        if not self.path.exists():
+            raise CassetteError(
+                f"No cassette at {self.path}; record one with HANDOFF_SDK_MODE=record"
+            )
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            raise CassetteError(f"Cannot read cassette {self.path}: {e}") from e
+        if data.get("version") != CASSETTE_VERSION:
+            raise CassetteError(
+                f"Cassette {self.path} has version {data.get('version')}, "
+                f"expected {CASSETTE_VERSION}; re-record it"
+            )
+        return data["interactions"]
+
+    def _live_query(self) -> Callable:
+        if self._live is None:
+            from claude_agent_sdk import query
+            self._live = query
+        return self._live
+
+    async def query(self, *, prompt, options=None, **kwargs) -> AsyncIterator[Any]:
+        if self.mode == "replay":
+            async for message in self._replay(prompt):
+                yield message
+            return
+
+        recorded = []
+        async for message in self._live_query()(prompt=prompt, options=options, **kwargs):
+            recorded.append(to_record(message))
+            yield message
+        self.interactions.append({
+            "prompt": prompt if isinstance(prompt, str) else None,
+            "messages": recorded,
+        })
+
+    async def _replay(self, prompt) -> AsyncIterator[Any]:
+        if self._position >= len(self.interactions):
+            raise CassetteError(
+                f"{self.path.name} has {len(self.interactions)} recorded prompt(s); "
+                "the test sent more. Re-record with HANDOFF_SDK_MODE=record"
+            )
+        interaction = self.interactions[self._position]
+        self._position += 1
+        expected = interaction["prompt"]
+        if isinstance(prompt, str) and expected is not None and prompt != expected:
+            raise CassetteError(
+                f"{self.path.name} expected prompt {expected!r} but the test sent "
+                f"{prompt!r}. Re-record with HANDOFF_SDK_MODE=record"
+            )
+        for message in interaction["messages"]:
+            yield from_record(message, self._sdk)
+
+    def save(self) -> None:
+        """Write the recorded interactions (record mode only)."""
+        if self.mode != "record":
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": CASSETTE_VERSION, "interactions": self.interactions}
+        self.path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,150 @@
+"""
+Rate-limit-aware scheduling of SDK prompts across test workers.
+
+When the integration tests run concurrently (pytest-xdist workers, pooled
+sessions, parallel suites), every prompt that reaches the API first takes a
+slot from a RateLimiter:
+
+- at most `concurrency` prompts are in flight at once, across processes
+- prompts start at no more than `per_minute` a minute (a token bucket)
+- a RateLimitEvent from the SDK with status "rejected" pauses every worker
+  until the limit resets
+
+State is shared through small lock files in one directory, so all workers
+of a run (and the parallel suites in run_tests.sh) see the same budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+DEFAULT_CONCURRENCY = 2
+DEFAULT_PER_MINUTE = 30
+DEFAULT_PAUSE = 60.0
+POLL_INTERVAL = 0.05
+STATE_NAME = "bucket.json"
+
+
+class RateLimiter:
+    """A token bucket and concurrency cap shared through state_dir."""
+
+    def __init__(
+        self,
+        state_dir: Path,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_minute: float = DEFAULT_PER_MINUTE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.state_dir = state_dir
+        self.concurrency = max(concurrency, 1)
+        self.per_minute = per_minute
+        self.clock = clock
+        self.waited = 0.0
+        state_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, state_dir: Path) -> RateLimiter:
+        """Build a limiter from HANDOFF_SDK_CONCURRENCY and HANDOFF_SDK_RPM."""
+        return cls(
+            state_dir,
+            int(os.environ.get("HANDOFF_SDK_CONCURRENCY", DEFAULT_CONCURRENCY)),
+            float(os.environ.get("HANDOFF_SDK_RPM", DEFAULT_PER_MINUTE)),
+        )
+
+    def _update(self, change: Callable[[dict, float], Any]) -> Any:
+        """Apply change(state, now) to the shared bucket under an exclusive lock."""
+        with open(self.state_dir / STATE_NAME, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            now = self.clock()
+            result = change(state, now)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            return result
+
+    def try_take(self) -> float:
+        """Take a token if one is available; otherwise return seconds to wait."""
+        # Allow a burst of one prompt per slot, then the steady rate
+        capacity = float(self.concurrency)
+        rate = self.per_minute / 60
+
+        def take(state: dict, now: float) -> float:
+            paused = state.get("paused_until", 0) - now
+            if paused > 0:
+                return paused
+            tokens = state.get("tokens", capacity)
+            tokens = min(capacity, tokens + (now - state.get("updated", now)) * rate)
+            state["updated"] = now
+            if tokens >= 1:
+                state["tokens"] = tokens - 1
+                return 0.0
+            state["tokens"] = tokens
+            return (1 - tokens) / rate if rate > 0 else POLL_INTERVAL
+
+        return self._update(take)
+
+    def pause(self, seconds: float) -> None:
+        """Stop every worker from starting prompts for the next seconds."""
+        def extend(state: dict, now: float) -> None:
+            state["paused_until"] = max(state.get("paused_until", 0), now + seconds)
+
+        self._update(extend)
+
+    def observe(self, message: Any) -> None:
+        """Pause when the SDK reports that a rate limit was hit."""
+        info = getattr(message, "rate_limit_info", None)
+        if info is None or getattr(info, "status", None) != "rejected":
+            return
+        resets_at = getattr(info, "resets_at", None)
+        self.pause(resets_at - self.clock() if resets_at else DEFAULT_PAUSE)
+
+    def _claim_slot(self):
+        for number in range(self.concurrency):
+            handle = open(self.state_dir / f"slot-{number}.lock", "w")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                handle.close()
+        return None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a free concurrency slot and a token, then hold the slot."""
+        started = time.monotonic()
+        handle = self._claim_slot()
+        while handle is None:
+            await asyncio.sleep(POLL_INTERVAL)
+            handle = self._claim_slot()
+        try:
+            wait = self.try_take()
+            while wait > 0:
+                await asyncio.sleep(min(wait, 1.0))
+                wait = self.try_take()
+            self.waited += time.monotonic() - started
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+    def wrap(self, query: Callable[..., AsyncIterator[Any]]) -> Callable:
+        """Return query(), scheduled through this limiter."""
+        async def limited(*, prompt, **kwargs) -> AsyncIterator[Any]:
+            async with self.slot():
+                async for message in query(prompt=prompt, **kwargs):
+                    self.observe(message)
+                    yield message
+
+        return limited
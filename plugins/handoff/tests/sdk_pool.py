@@ -0,0 +1,130 @@
+"""
+Pooled, long-lived Claude Agent SDK sessions for integration tests.
+
+`claude_agent_sdk.query()` starts a new CLI subprocess and session, and
+reloads the plugin, on every call. The pool instead keeps ClaudeSDKClient
+sessions connected for the whole test run and lends one to each test.
+When a test is done its session is reset with /clear and its working
+directory emptied, so the next test still starts from a blank conversation.
+A session handed back mid-response, or one whose reset fails, is
+disconnected and replaced instead.
+
+Only record and live runs use the pool; replayed runs never connect.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import shutil
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+RESET_PROMPT = "/clear"
+
+
+@dataclass
+class SessionHandle:
+    """What a test sees: a query() with the SDK's signature and a working dir."""
+
+    query: Callable[..., AsyncIterator[Any]]
+    cwd: Path
+
+
+class PooledSession:
+    """One connected client and the directory it runs in."""
+
+    def __init__(self, client: Any, cwd: Path):
+        self.client = client
+        self.cwd = cwd
+        self.busy = False
+        self.uses = 0
+
+    async def query(self, *, prompt, options=None, **kwargs) -> AsyncIterator[Any]:
+        """Send prompt in this session and yield messages up to its result."""
+        self.busy = True
+        await self.client.query(prompt)
+        async for message in self.client.receive_response():
+            yield message
+        self.busy = False
+
+
+def clear_directory(path: Path) -> None:
+    """Remove everything inside path, keeping path itself."""
+    for child in path.iterdir():
+        if child.is_dir() and not child.is_symlink():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+
+
+class SessionPool:
+    """
+    Up to `size` warm sessions, connected on first use.
+
+    `factory(cwd)` returns an unconnected client whose working directory is
+    cwd; each session gets its own directory under workdir.
+    """
+
+    def __init__(self, factory: Callable[[Path], Any], workdir: Path, size: int = 1):
+        self._factory = factory
+        self.workdir = workdir
+        self.size = max(size, 1)
+        self._idle: list[PooledSession] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._count = 0
+        self.stats = {"connects": 0, "leases": 0, "resets": 0, "discarded": 0}
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledSession]:
+        """Borrow a session for the duration of the block."""
+        if self._slots is None:
+            # Created here so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            session = self._idle.pop() if self._idle else await self._connect()
+            self.stats["leases"] += 1
+            session.uses += 1
+            try:
+                yield session
+            finally:
+                await self._release(session)
+
+    async def _connect(self) -> PooledSession:
+        self._count += 1
+        cwd = self.workdir / f"session-{self._count}"
+        cwd.mkdir(parents=True, exist_ok=True)
+        client = self._factory(cwd)
+        await client.connect()
+        self.stats["connects"] += 1
+        return PooledSession(client, cwd)
+
+    async def _release(self, session: PooledSession) -> None:
+        if not session.busy:
+            try:
+                await self._reset(session)
+            except Exception:
+                session.busy = True
+        if session.busy:
+            await self._discard(session)
+        else:
+            self._idle.append(session)
+
+    async def _reset(self, session: PooledSession) -> None:
+        async for _ in session.query(prompt=RESET_PROMPT):
+            pass
+        clear_directory(session.cwd)
+        self.stats["resets"] += 1
+
+    async def _discard(self, session: PooledSession) -> None:
+        self.stats["discarded"] += 1
+        with suppress(Exception):
+            await session.client.disconnect()
+
+    async def close(self) -> None:
+        """Disconnect every idle session."""
+        while self._idle:
+            session = self._idle.pop()
+            with suppress(Exception):
+                await session.client.disconnect()
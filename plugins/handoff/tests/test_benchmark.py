@@ -0,0 +1,65 @@
+"""
+Offline benchmarks: synthetic sessions of 10 to 10k turns through the workflow.
+
+Token, size and span checks always run; wall-clock checks are marked
+`benchmark` and need --run-benchmarks.
+"""
+
+import pytest
+
+import benchmark
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    """Trace summaries by size, replayed once per size for the module."""
+    cache = {}
+
+    def get(turns):
+        if turns not in cache:
+            cache[turns] = benchmark.run_size(turns, tmp_path_factory.mktemp(f"turns{turns}"))
+        return cache[turns]
+
+    return get
+
+
+class TestBenchmarks:
+    """Test the workflow against its latency and size thresholds."""
+
+    @pytest.mark.parametrize("turns", benchmark.SIZES)
+    def test_within_token_limits(self, results, turns):
+        """Verify every step is traced and within its output token limit."""
+        assert benchmark.regressions(turns, results(turns), timing=False) == []
+
+    @pytest.mark.benchmark
+    @pytest.mark.parametrize("turns", benchmark.SIZES)
+    def test_within_thresholds(self, results, turns):
+        """Verify every step is within its time and token limits."""
+        assert benchmark.regressions(turns, results(turns)) == []
+
+    @pytest.mark.benchmark
+    def test_cost_grows_linearly(self, results):
+        """Verify digesting 10x the turns costs about 10x, not 100x."""
+        for step in ("summarise", "rank"):
+            small = results(1_000)[step]["seconds"]
+            large = results(10_000)[step]["seconds"]
+            assert large <= 30 * small + 0.5, step
+
+    def test_spans_measure_the_work(self, results):
+        """Verify tokens in grow with the session while outputs stay bounded."""
+        small, large = results(100), results(10_000)
+        assert large["summarise"]["tokens_in"] > 50 * small["summarise"]["tokens_in"]
+        assert large["write-memory"]["tokens_out"] <= benchmark.BUDGET
+        for step in ("write-memory", "snapshot", "compact"):
+            assert large[step]["bytes_written"] > 0, step
+
+    @pytest.mark.benchmark
+    def test_cli_reports_regressions(self, monkeypatch, capsys):
+        """Verify the command-line run prints a table and fails on a regression."""
+        assert benchmark.main(["--turns", "10"]) == 0
+        assert "| summarise |" in capsys.readouterr().out
+        monkeypatch.setitem(benchmark.THRESHOLDS, "summarise", (0.0, 0.0))
+        assert benchmark.main(["--turns", "10"]) == 1
+        assert "Regression: 10 turns: summarise" in capsys.readouterr().err
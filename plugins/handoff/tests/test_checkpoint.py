@@ -0,0 +1,154 @@
+"""
+Unit tests for incremental handoff checkpoints.
+"""
+
+import pytest
+
+import checkpoint
+
+
+pytestmark = pytest.mark.unit
+
+
+def request(make_event, value):
+    return make_event("user", {"type": "text", "text": value})
+
+
+def write_memory(memory_dir, stamp, header_line):
+    memory_dir.mkdir(exist_ok=True)
+    path = memory_dir / f"handoff-memory.{stamp}.md"
+    path.write_text(
+        "# Handoff Memory\n\n"
+        "**Created**: now\n"
+        "**Goal**: test\n"
+        f"{header_line}\n\n"
+        "## Extracted Context\n"
+    )
+    return path
+
+
+class TestCheckpoint:
+    """Test checkpoint creation and parsing."""
+
+    def test_header_round_trip(self, write_transcript, make_event, tmp_path):
+        """Verify a checkpoint written to a header parses back unchanged."""
+        transcript = write_transcript([request(make_event, "first")])
+        original = checkpoint.make_checkpoint(transcript, transcript.stat().st_size)
+
+        memory = write_memory(tmp_path / ".claude", "2026-01-01-10-00-00", original.header())
+        assert checkpoint.read_checkpoint(memory) == original
+
+    def test_memory_without_checkpoint(self, tmp_path):
+        """Verify memory files from older handoffs have no checkpoint."""
+        memory = write_memory(tmp_path / ".claude", "2026-01-01-10-00-00", "")
+        assert checkpoint.read_checkpoint(memory) is None
+
+    def test_rewritten_transcript_does_not_match(self, write_transcript, make_event):
+        """Verify a checkpoint is rejected once the covered bytes change."""
+        transcript = write_transcript([request(make_event, "first")])
+        saved = checkpoint.make_checkpoint(transcript, transcript.stat().st_size)
+        assert saved.matches(transcript)
+
+        write_transcript([request(make_event, "other")])
+        assert not saved.matches(transcript), "Changed bytes should not match"
+
+        transcript.write_text("")
+        assert not saved.matches(transcript), "Truncated file should not match"
+
+
+class TestExtractDelta:
+    """Test incremental extraction against previous memory files."""
+
+    def test_first_handoff_extracts_everything(self, write_transcript, make_event, tmp_path):
+        """Verify the whole transcript is read without a previous memory file."""
+        transcript = write_transcript([
+            request(make_event, "one"), request(make_event, "two"),
+        ])
+        delta = checkpoint.extract_delta(transcript, tmp_path / ".claude")
+
+        assert delta.previous is None
+        assert delta.start == 0
+        assert delta.digest.user_turns == 2
+        assert delta.checkpoint.offset == transcript.stat().st_size
+
+    def test_follow_up_extracts_only_new_turns(self, write_transcript, make_event, tmp_path):
+        """Verify a second handoff resumes from the recorded offset."""
+        memory_dir = tmp_path / ".claude"
+        transcript = write_transcript([request(make_event, "old work")])
+        first = checkpoint.extract_delta(transcript, memory_dir)
+        memory = write_memory(memory_dir, "2026-01-01-10-00-00", first.checkpoint.header())
+
+        write_transcript([request(make_event, "new work")], append=True)
+        delta = checkpoint.extract_delta(transcript, memory_dir)
+
+        assert delta.previous == memory
+        assert delta.start == first.checkpoint.offset
+        assert list(delta.digest.requests) == ["new work"]
+        assert delta.checkpoint.offset == transcript.stat().st_size
+
+    def test_newest_matching_memory_wins(self, write_transcript, make_event, tmp_path):
+        """Verify the most recent memory file for the transcript is used."""
+        memory_dir = tmp_path / ".claude"
+        transcript = write_transcript([request(make_event, "a")])
+        early = checkpoint.make_checkpoint(transcript, 0)
+        write_memory(memory_dir, "2026-01-01-09-00-00", early.header())
+
+        write_transcript([request(make_event, "b")], append=True)
+        later = checkpoint.make_checkpoint(transcript, transcript.stat().st_size)
+        newest = write_memory(memory_dir, "2026-01-01-10-00-00", later.header())
+
+        other = write_transcript([request(make_event, "x")], name="other.jsonl")
+        stray = checkpoint.make_checkpoint(other, other.stat().st_size)
+        write_memory(memory_dir, "2026-01-01-11-00-00", stray.header())
+
+        delta = checkpoint.extract_delta(transcript, memory_dir)
+        assert delta.previous == newest
+        assert delta.digest.turns == 0, "Nothing new since the newest checkpoint"
+
+    def test_saved_signals_accumulate_across_handoffs(
+        self, write_transcript, make_event, tmp_path
+    ):
+        """Verify an incremental handoff adds its files to the saved signals."""
+        memory_dir = tmp_path / ".claude"
+
+        def edit(path):
+            return make_event("assistant", {"type": "tool_use", "id": path, "name": "Edit",
+                                            "input": {"file_path": path}})
+
+        transcript = write_transcript([edit("a.py"), edit("b.py")])
+        first = checkpoint.extract_delta(transcript, memory_dir)
+        checkpoint.save_digest(memory_dir, first)
+        write_memory(memory_dir, "2026-01-01-10-00-00", first.checkpoint.header())
+
+        write_transcript([edit("a.py"), edit("c.py")], append=True)
+        delta = checkpoint.extract_delta(transcript, memory_dir)
+        saved = checkpoint.load_digest(checkpoint.save_digest(memory_dir, delta))
+
+        assert delta.start > 0
+        assert list(saved.files) == ["b.py", "a.py", "c.py"]
+        assert saved.files["a.py"]["edit"] == 2
+        assert saved.end_offset == transcript.stat().st_size
+
+    def test_stale_checkpoint_falls_back_to_full(self, write_transcript, make_event, tmp_path):
+        """Verify a mismatched checkpoint triggers a full extraction."""
+        memory_dir = tmp_path / ".claude"
+        transcript = write_transcript([request(make_event, "a"), request(make_event, "b")])
+        stale = checkpoint.Checkpoint(str(transcript.resolve()), 10, "0" * 64)
+        write_memory(memory_dir, "2026-01-01-10-00-00", stale.header())
+
+        delta = checkpoint.extract_delta(transcript, memory_dir)
+        assert delta.previous is None
+        assert delta.digest.user_turns == 2
+
+    def test_command_line_output(self, write_transcript, make_event, tmp_path, capsys):
+        """Verify the CLI prints the checkpoint header and digest."""
+        transcript = write_transcript([request(make_event, "hello")])
+        code = checkpoint.main([
+            str(transcript), "--memory-dir", str(tmp_path / ".claude"), "--goal", "g",
+        ])
+        output = capsys.readouterr().out
+
+        assert code == 0
+        assert output.startswith("**Checkpoint**: ")
+        assert "**Mode**: full" in output
+        assert "# Transcript Digest" in output
@@ -0,0 +1,192 @@
+"""
+Unit tests for handoff memory retention and compaction.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+import compaction
+
+
+pytestmark = pytest.mark.unit
+
+NOW = datetime(2026, 2, 1, 12, 0, 0).timestamp()
+
+
+@pytest.fixture
+def memory_dir(tmp_path):
+    directory = tmp_path / ".claude"
+    directory.mkdir()
+    return directory
+
+
+def write_memory(memory_dir, day, goal="goal", decisions=("- decision",), padding=0):
+    stamp = f"2026-01-{day:02d}-10-00-00"
+    path = memory_dir / f"handoff-memory.{stamp}.md"
+    path.write_text(
+        "# Handoff Memory\n\n"
+        f"**Goal**: {goal}\n\n"
+        "## Extracted Context\n\n"
+        "### Key Decisions\n" + "\n".join(decisions) + "\n\n"
+        "### Relevant Files\n- `src/app.py`\n"
+        + "x" * padding
+    )
+    return path
+
+
+class TestSelectEvictions:
+    """Test the retention policy."""
+
+    def test_count_limit(self, memory_dir):
+        """Verify files beyond max_count are evicted oldest first."""
+        for day in range(1, 6):
+            write_memory(memory_dir, day)
+        policy = compaction.RetentionPolicy(max_count=2, max_age_days=None, max_bytes=None)
+        files = compaction.list_memory_files(memory_dir)
+        evicted = compaction.select_evictions(files, policy, NOW)
+        assert [f.stamp[:10] for f in evicted] == ["2026-01-03", "2026-01-02", "2026-01-01"]
+
+    def test_age_limit(self, memory_dir):
+        """Verify files older than max_age_days are evicted."""
+        for day in (1, 20, 30):
+            write_memory(memory_dir, day)
+        policy = compaction.RetentionPolicy(max_count=None, max_age_days=7, max_bytes=None)
+        files = compaction.list_memory_files(memory_dir)
+        evicted = compaction.select_evictions(files, policy, NOW)
+        assert [f.stamp[:10] for f in evicted] == ["2026-01-20", "2026-01-01"]
+
+    def test_byte_limit(self, memory_dir):
+        """Verify older files are evicted once the total size is exceeded."""
+        for day in (1, 2, 3):
+            write_memory(memory_dir, day, padding=400)
+        size = compaction.list_memory_files(memory_dir)[0].size
+        policy = compaction.RetentionPolicy(
+            max_count=None, max_age_days=None, max_bytes=size * 2,
+        )
+        files = compaction.list_memory_files(memory_dir)
+        evicted = compaction.select_evictions(files, policy, NOW)
+        assert [f.stamp[:10] for f in evicted] == ["2026-01-01"]
+
+    def test_latest_is_always_kept(self, memory_dir):
+        """Verify the newest file survives even the strictest policy."""
+        write_memory(memory_dir, 1)
+        policy = compaction.RetentionPolicy(max_count=0, max_age_days=0, max_bytes=1)
+        files = compaction.list_memory_files(memory_dir)
+        assert compaction.select_evictions(files, policy, NOW) == []
+
+
+class TestCompact:
+    """Test folding evicted files into the summary."""
+
+    def test_compaction_folds_and_removes(self, memory_dir):
+        """Verify evicted files move into the summary and the manifest."""
+        old = write_memory(memory_dir, 1, goal="old goal", decisions=("- Use Redis",))
+        write_memory(memory_dir, 31, goal="new goal")
+        policy = compaction.RetentionPolicy(max_count=None, max_age_days=7, max_bytes=None)
+
+        manifest = compaction.compact(memory_dir, policy, now=NOW)
+
+        assert not old.exists(), "Evicted file should leave the memory directory"
+        assert (memory_dir / compaction.ARCHIVE_NAME / old.name).exists()
+        summary = (memory_dir / compaction.SUMMARY_NAME).read_text()
+        assert "## 2026-01-01-10-00-00 — old goal" in summary
+        assert "- Use Redis" in summary
+        assert "`src/app.py`" in summary
+
+        on_disk = json.loads((memory_dir / compaction.MANIFEST_NAME).read_text())
+        assert on_disk == manifest
+        assert manifest["latest"] == "handoff-memory.2026-01-31-10-00-00.md"
+        assert manifest["summary"] == compaction.SUMMARY_NAME
+        assert manifest["compacted"] == [old.name]
+        assert manifest["archive"] == compaction.ARCHIVE_NAME
+        assert manifest["summary_trimmed"] == 0
+
+    def test_summary_is_rolling_and_bounded(self, memory_dir):
+        """Verify repeated compactions prepend entries and cap the summary."""
+        policy = compaction.RetentionPolicy(
+            max_count=1, max_age_days=None, max_bytes=None, max_summary_entries=3,
+        )
+        for day in range(1, 7):
+            write_memory(memory_dir, day, goal=f"goal {day}")
+            manifest = compaction.compact(memory_dir, policy, now=NOW)
+
+        entries = compaction.read_summary_entries(memory_dir / compaction.SUMMARY_NAME)
+        assert [e.split(" — ")[1].split("\n")[0] for e in entries] == [
+            "goal 5", "goal 4", "goal 3",
+        ]
+        assert len(list(memory_dir.glob(compaction.MEMORY_GLOB))) == 1
+        # Entries past the cap are reported, and their files stay archived
+        assert manifest["summary_trimmed"] == 1
+        archive = memory_dir / compaction.ARCHIVE_NAME
+        assert len(list(archive.glob(compaction.MEMORY_GLOB))) == 5
+
+    def test_long_sections_are_clipped(self, memory_dir):
+        """Verify summary entries keep only the first lines of a section."""
+        decisions = tuple(f"- decision {i}" for i in range(20))
+        write_memory(memory_dir, 1, decisions=decisions)
+        write_memory(memory_dir, 2)
+        policy = compaction.RetentionPolicy(max_count=1, max_age_days=None, max_bytes=None)
+        compaction.compact(memory_dir, policy, now=NOW)
+
+        summary = (memory_dir / compaction.SUMMARY_NAME).read_text()
+        assert "- decision 7" in summary
+        assert "- decision 8" not in summary
+        assert "- … 12 more" in summary
+
+    def test_dry_run_changes_nothing(self, memory_dir):
+        """Verify a dry run only reports."""
+        old = write_memory(memory_dir, 1)
+        write_memory(memory_dir, 2)
+        policy = compaction.RetentionPolicy(max_count=1)
+        manifest = compaction.compact(memory_dir, policy, now=NOW, dry_run=True)
+
+        assert manifest["compacted"] == [old.name]
+        assert manifest["archive"] == compaction.ARCHIVE_NAME
+        assert manifest["summary_trimmed"] == 0
+        assert old.exists()
+        assert not (memory_dir / compaction.MANIFEST_NAME).exists()
+
+    def test_policy_persists_in_manifest(self, memory_dir):
+        """Verify the policy stored in the manifest is reused."""
+        write_memory(memory_dir, 1)
+        policy = compaction.RetentionPolicy(max_count=3, max_age_days=None)
+        compaction.compact(memory_dir, policy, now=NOW)
+
+        loaded = compaction.load_policy(memory_dir)
+        assert loaded.max_count == 3
+        assert loaded.max_age_days is None
+
+
+class TestCommandLine:
+    """Test the compaction command-line interface."""
+
+    def test_flags_override_policy(self, memory_dir, capsys):
+        """Verify limits passed on the command line are applied."""
+        for day in (1, 2, 3):
+            write_memory(memory_dir, day)
+        code = compaction.main([
+            "--memory-dir", str(memory_dir), "--max-count", "2",
+            "--max-age-days", "0", "--max-bytes", "0",
+        ])
+        output = capsys.readouterr().out
+
+        assert code == 0
+        assert "Compacted 1 memory file(s); 2 retained" in output
+        assert compaction.load_policy(memory_dir) == compaction.RetentionPolicy()
+
+    def test_save_policy(self, memory_dir):
+        """Verify --save-policy records the overridden limits for later runs."""
+        write_memory(memory_dir, 1)
+        compaction.main(["--memory-dir", str(memory_dir), "--max-count", "3"])
+        assert compaction.load_policy(memory_dir).max_count == 20
+
+        compaction.main([
+            "--memory-dir", str(memory_dir), "--max-count", "3",
+            "--max-age-days", "0", "--save-policy",
+        ])
+        loaded = compaction.load_policy(memory_dir)
+        assert loaded.max_count == 3
+        assert loaded.max_age_days is None
+        assert loaded.max_bytes == 1_000_000
@@ -0,0 +1,166 @@
+"""
+Unit tests for the token-budgeted memory file builder.
+"""
+
+import pytest
+
+import memory_builder
+
+
+pytestmark = pytest.mark.unit
+
+
+def memory(decisions=3, state=3, files=3, details=3, next_steps=3, width=60):
+    def bullets(name, count):
+        return "".join(f"- {name} {i} " + "x" * width + "\n" for i in range(count))
+
+    return (
+        "# Handoff Memory\n\n"
+        "**Created**: 2026-01-03 15:30:45\n"
+        "**Goal**: ship it\n"
+        "**Source Thread**: main\n\n"
+        "## Extracted Context\n\n"
+        "### Key Decisions\n" + bullets("decision", decisions) + "\n"
+        "### Current State\n" + bullets("state", state) + "\n"
+        "### Relevant Files\n" + bullets("file", files) + "\n"
+        "### Technical Details\n" + bullets("detail", details) + "\n"
+        "### Next Steps to Consider\n" + bullets("step", next_steps)
+    )
+
+
+def sections(report):
+    return {s["title"]: s for s in report["sections"]}
+
+
+class TestEstimateTokens:
+    """Test local token estimation."""
+
+    def test_empty(self):
+        """Verify empty text costs nothing."""
+        assert memory_builder.estimate_tokens("") == 0
+
+    def test_prose_and_code(self):
+        """Verify the estimate scales with both characters and words."""
+        assert memory_builder.estimate_tokens("a" * 400) == 100
+        assert memory_builder.estimate_tokens("a " * 100) == 130
+
+
+class TestBuild:
+    """Test fitting memory files into a budget."""
+
+    def test_small_file_unchanged(self):
+        """Verify a file under budget keeps every section in full."""
+        text = memory()
+        body, report = memory_builder.build(text, budget=5000)
+
+        assert all(s["status"] == "full" for s in report["sections"])
+        assert body.replace(f"**Tokens**: ~{report['total']} (budget 5000)\n", "") == text
+
+    def test_total_within_budget(self):
+        """Verify an oversized file is brought under the budget."""
+        text = memory(decisions=40, state=40, files=40, details=40, next_steps=40)
+        for budget in (300, 800, 2000):
+            body, report = memory_builder.build(text, budget=budget)
+            assert report["total"] <= budget, f"Over budget at {budget}"
+            assert memory_builder.estimate_tokens(body) <= budget + 10
+
+    def test_priority_order(self):
+        """Verify high-priority sections are kept before low-priority ones."""
+        text = memory(decisions=10, state=10, files=10, details=40, next_steps=10)
+        _, report = memory_builder.build(text, budget=900)
+        by_title = sections(report)
+
+        assert by_title["Key Decisions"]["status"] == "full"
+        assert by_title["Current State"]["status"] == "full"
+        assert by_title["Technical Details"]["status"] == "truncated"
+
+    @pytest.mark.parametrize("budget, counts", [
+        (100, (3, 3, 3, 3, 3)),
+        (500, (1, 1, 10, 1, 3)),
+        (2000, (3, 40, 3, 1, 3)),
+    ])
+    def test_strict_priority(self, budget, counts):
+        """Verify no section gets room while a higher one could use another line."""
+        body, report = memory_builder.build(memory(*counts, width=150), budget=budget)
+        by_title = sections(report)
+        statuses = [by_title[title]["status"] for title in memory_builder.PRIORITY]
+
+        assert report["total"] <= budget
+        cut = [i for i, status in enumerate(statuses) if status not in ("full", "condensed")]
+        if cut:
+            # Lines are all the same size, so nothing below the first cut fits
+            assert all(status in ("omitted", "dropped") for status in statuses[cut[0] + 1:])
+
+    def test_lower_sections_use_leftover_room(self):
+        """Verify room a truncated section cannot use passes down the list."""
+        text = memory(decisions=80, state=0, width=150).replace(
+            "### Current State\n", "### Current State\n- ok\n")
+        body, report = memory_builder.build(text, budget=600)
+
+        assert report["total"] <= 600
+        assert sections(report)["Key Decisions"]["status"] == "truncated"
+        assert sections(report)["Current State"]["status"] == "full"
+        assert "### Current State\n- ok\n" in body
+
+    def test_omits_sections_that_do_not_fit_at_all(self):
+        """Verify a budget too small for a placeholder drops the section."""
+        text = memory(decisions=40)
+        body, report = memory_builder.build(text, budget=60)
+
+        assert report["total"] <= 60
+        assert "### Technical Details" not in body
+        assert sections(report)["Technical Details"]["status"] == "dropped"
+
+    def test_condense_before_truncate(self):
+        """Verify long lines and code blocks are condensed first."""
+        text = memory().replace(
+            "### Technical Details\n",
+            "### Technical Details\n```python\n" + "code = 1\n" * 30 + "```\n"
+            "- " + "y" * 400 + "\n",
+        )
+        body, report = memory_builder.build(text, budget=500)
+
+        assert sections(report)["Technical Details"]["status"] == "condensed"
+        assert "code = 1" not in body
+        assert "- " + "y" * 117 + "…\n" in body
+
+    def test_tokens_header_line(self):
+        """Verify the total is recorded once, after the header fields."""
+        body, report = memory_builder.build(memory(), budget=1000)
+        again, _ = memory_builder.build(body, budget=1000)
+
+        assert f"**Source Thread**: main\n**Tokens**: ~{report['total']} (budget 1000)\n" in body
+        assert again.count("**Tokens**:") == 1
+
+    def test_unknown_sections_last(self):
+        """Verify extra sections are treated as lowest priority."""
+        text = memory() + "\n### Scratch Notes\n"
+        text += "".join(f"- note {i} " + "z" * 60 + "\n" for i in range(40))
+        _, report = memory_builder.build(text, budget=700)
+        assert sections(report)["Scratch Notes"]["status"] == "truncated"
+        assert sections(report)["Technical Details"]["status"] == "full"
+
+
+class TestCommandLine:
+    """Test the builder command-line interface."""
+
+    def test_rewrites_in_place_and_reports(self, tmp_path, capsys):
+        """Verify the file is rewritten and a report table printed."""
+        path = tmp_path / "handoff-memory.2026-01-01-10-00-00.md"
+        path.write_text(memory(decisions=40))
+
+        assert memory_builder.main([str(path), "--budget", "600"]) == 0
+        output = capsys.readouterr().out
+        assert "| Key Decisions |" in output
+        assert "budget 600" in output
+        assert "**Tokens**:" in path.read_text()
+
+    def test_output_option(self, tmp_path):
+        """Verify --output leaves the draft untouched."""
+        path = tmp_path / "draft.md"
+        path.write_text(memory())
+        target = tmp_path / "final.md"
+
+        memory_builder.main([str(path), "--output", str(target)])
+        assert "**Tokens**:" not in path.read_text()
+        assert target.exists()
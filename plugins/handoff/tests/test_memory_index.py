@@ -0,0 +1,172 @@
+"""
+Unit tests for the handoff memory search index.
+"""
+
+import os
+
+import pytest
+
+import memory_index
+
+
+pytestmark = pytest.mark.unit
+
+
+MEMORY_TEMPLATE = """# Handoff Memory
+
+**Created**: 2026-01-03 15:30:45
+**Goal**: {goal}
+**Source Thread**: main session
+
+## Extracted Context
+
+### Key Decisions
+{decisions}
+
+### Current State
+- Auth service implemented
+
+### Relevant Files
+- `src/auth/{name}.ts`
+
+### Technical Details
+- Tokens signed with RS256
+
+### Next Steps to Consider
+- Add integration tests
+"""
+
+
+@pytest.fixture
+def memory_dir(tmp_path):
+    directory = tmp_path / ".claude"
+    directory.mkdir()
+    return directory
+
+
+def write_memory(memory_dir, stamp, goal, decisions, name="jwt"):
+    path = memory_dir / f"handoff-memory.{stamp}.md"
+    path.write_text(MEMORY_TEMPLATE.format(goal=goal, decisions=decisions, name=name))
+    return path
+
+
+class TestParseSections:
+    """Test memory file section parsing."""
+
+    def test_splits_known_sections(self):
+        """Verify each section the command writes is captured."""
+        text = MEMORY_TEMPLATE.format(goal="ship it", decisions="- Use JWT", name="x")
+        sections = memory_index.parse_sections(text)
+
+        assert sections["Goal"] == "ship it"
+        assert sections["Key Decisions"] == "- Use JWT"
+        assert set(memory_index.SECTIONS) <= set(sections)
+
+    def test_match_query_escapes_syntax(self):
+        """Verify free text cannot inject FTS5 operators."""
+        assert memory_index.to_match_query('JWT "refresh" OR-NOT') == \
+            '"JWT" "refresh" "OR" "NOT"'
+        assert memory_index.to_match_query("  ?! ") == ""
+
+
+class TestMemoryIndex:
+    """Test incremental indexing and search."""
+
+    def test_search_finds_decision(self, memory_dir):
+        """Verify a search returns the memory file that made the decision."""
+        write_memory(memory_dir, "2026-01-01-10-00-00", "payments",
+                     "- Stripe for card payments")
+        target = write_memory(memory_dir, "2026-01-02-10-00-00", "auth",
+                              "- Decided on JWT refresh tokens stored in Redis")
+
+        with memory_index.MemoryIndex(memory_dir) as index:
+            index.update()
+            results = index.search("jwt refresh")
+
+        assert results, "Should find a match"
+        assert results[0].path == target.name
+        assert results[0].section == "Key Decisions"
+        assert results[0].goal == "auth"
+        assert "**refresh**" in results[0].snippet
+
+    def test_search_by_section(self, memory_dir):
+        """Verify results can be limited to one section."""
+        write_memory(memory_dir, "2026-01-01-10-00-00", "auth", "- Use sessions")
+
+        with memory_index.MemoryIndex(memory_dir) as index:
+            index.update()
+            assert index.search("auth", section="Relevant Files")
+            assert not index.search("auth", section="Key Decisions")
+
+    def test_update_is_incremental(self, memory_dir):
+        """Verify only new, edited or deleted files are reprocessed."""
+        first = write_memory(memory_dir, "2026-01-01-10-00-00", "a", "- one")
+        second = write_memory(memory_dir, "2026-01-02-10-00-00", "b", "- two")
+
+        with memory_index.MemoryIndex(memory_dir) as index:
+            assert index.update() == {
+                "added": 2, "updated": 0, "removed": 0, "unchanged": 0,
+            }
+            assert index.update()["unchanged"] == 2
+
+            # Touching without editing should not re-index
+            os.utime(first, ns=(1, 1))
+            assert index.update()["unchanged"] == 2
+
+            first.write_text(first.read_text().replace("- one", "- kafka"))
+            second.unlink()
+            assert index.update() == {
+                "added": 0, "updated": 1, "removed": 1, "unchanged": 0,
+            }
+            assert [r.path for r in index.search("kafka")] == [first.name]
+            assert not index.search("two")
+
+    def test_archived_files_stay_searchable(self, memory_dir):
+        """Verify files compaction moved to the archive are still found."""
+        path = write_memory(memory_dir, "2026-01-01-10-00-00", "a", "- Use Redis")
+        with memory_index.MemoryIndex(memory_dir) as index:
+            index.update()
+            archive = memory_dir / memory_index.ARCHIVE_NAME
+            archive.mkdir()
+            path.rename(archive / path.name)
+            assert index.update() == {
+                "added": 1, "updated": 0, "removed": 1, "unchanged": 0,
+            }
+            assert [r.path for r in index.search("redis")] == [
+                f"{memory_index.ARCHIVE_NAME}/{path.name}",
+            ]
+
+    def test_index_persists_between_runs(self, memory_dir):
+        """Verify a reopened index does not need rebuilding."""
+        write_memory(memory_dir, "2026-01-01-10-00-00", "a", "- graphql")
+        with memory_index.MemoryIndex(memory_dir) as index:
+            index.update()
+
+        with memory_index.MemoryIndex(memory_dir) as index:
+            assert index.update()["unchanged"] == 1
+            assert index.search("graphql")
+
+
+class TestCommandLine:
+    """Test the index command-line interface."""
+
+    def test_search_prints_matches(self, memory_dir, capsys):
+        """Verify search output names the file, section and goal."""
+        write_memory(memory_dir, "2026-01-01-10-00-00", "auth", "- JWT refresh")
+        code = memory_index.main(["--memory-dir", str(memory_dir), "search", "jwt"])
+        output = capsys.readouterr().out
+
+        assert code == 0
+        assert "handoff-memory.2026-01-01-10-00-00.md — Key Decisions" in output
+        assert "Goal: auth" in output
+
+    def test_no_matches(self, memory_dir, capsys):
+        """Verify an empty result is reported plainly."""
+        memory_index.main(["--memory-dir", str(memory_dir), "search", "nothing"])
+        assert "No matching handoff memory found." in capsys.readouterr().out
+
+    def test_missing_directory(self, tmp_path, capsys):
+        """Verify a missing memory directory is an error."""
+        code = memory_index.main(["--memory-dir", str(tmp_path / "nope"), "update"])
+        assert code == 1
+        assert "does not exist" in capsys.readouterr().err
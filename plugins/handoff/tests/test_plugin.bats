@@ -6,6 +6,7 @@
 setup() {
     # Initialize test environment
     export PLUGIN_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && cd .. && pwd)"
+    export REPO_DIR="$(cd "$PLUGIN_DIR/../.." && pwd)"
     export TEST_WORKSPACE="$(mktemp -d)"
 
     # Required for Claude Code interaction
@@ -14,6 +15,11 @@ setup() {
     fi
 }
 
+# Read a field from the parsed plugin model (scripts/plugin_model.py)
+plugin_field() {
+    python3 "$REPO_DIR/scripts/plugin_model.py" "$PLUGIN_DIR" "$1"
+}
+
 teardown() {
     # Clean up test artifacts
     rm -rf "$TEST_WORKSPACE"
@@ -25,24 +31,27 @@ teardown() {
     [ -d "$PLUGIN_DIR" ]
 }
 
+@test "plugin passes the marketplace validator" {
+    python3 "$REPO_DIR/scripts/validate_plugins.py" --plugin handoff --no-cache
+}
+
 @test "plugin.json exists and is valid" {
     [ -f "$PLUGIN_DIR/.claude-plugin/plugin.json" ]
 
     # Validate JSON
-    python3 -m json.tool "$PLUGIN_DIR/.claude-plugin/plugin.json" > /dev/null
+    [ "$(plugin_field manifest_error)" = "null" ]
 }
 
 @test "plugin.json has required fields" {
     # Check for required fields in plugin.json
-    grep -q '"name"' "$PLUGIN_DIR/.claude-plugin/plugin.json"
-    grep -q '"displayName"' "$PLUGIN_DIR/.claude-plugin/plugin.json"
-    grep -q '"description"' "$PLUGIN_DIR/.claude-plugin/plugin.json"
-    grep -q '"version"' "$PLUGIN_DIR/.claude-plugin/plugin.json"
+    [ -n "$(plugin_field manifest.name)" ]
+    [ -n "$(plugin_field manifest.displayName)" ]
+    [ -n "$(plugin_field manifest.description)" ]
+    [ -n "$(plugin_field manifest.version)" ]
 }
 
 @test "plugin name is 'handoff'" {
-    NAME=$(python3 -c "import json; print(json.load(open('$PLUGIN_DIR/.claude-plugin/plugin.json'))['name'])")
-    [ "$NAME" = "handoff" ]
+    [ "$(plugin_field manifest.name)" = "handoff" ]
 }
 
 @test "commands directory exists" {
@@ -54,16 +63,12 @@ teardown() {
 }
 
 @test "handoff.md has YAML frontmatter" {
-    # Should start with ---
-    head -1 "$PLUGIN_DIR/commands/handoff.md" | grep -q '^---'
-
-    # Should have closing --- within first 20 lines
-    head -20 "$PLUGIN_DIR/commands/handoff.md" | tail -19 | grep -q '^---'
+    # Parsed without errors
+    [ "$(plugin_field commands.handoff.error)" = "null" ]
 }
 
 @test "handoff.md has description in frontmatter" {
-    # Extract and check frontmatter
-    sed -n '/^---$/,/^---$/p' "$PLUGIN_DIR/commands/handoff.md" | grep -q 'description:'
+    [ -n "$(plugin_field commands.handoff.frontmatter.description)" ]
 }
 
 @test "handoff.md has implementation content" {
@@ -102,23 +107,8 @@ teardown() {
 
 # JSON Validation Tests
 
-@test "plugin.json JSON is valid" {
-    python3 << 'EOF'
-import json
-import sys
-
-try:
-    with open("$PLUGIN_DIR/.claude-plugin/plugin.json", "r") as f:
-        json.load(f)
-    sys.exit(0)
-except Exception as e:
-    print(f"Invalid JSON: {e}")
-    sys.exit(1)
-EOF
-}
-
 @test "plugin.json version follows semantic versioning" {
-    VERSION=$(python3 -c "import json; print(json.load(open('$PLUGIN_DIR/.claude-plugin/plugin.json'))['version'])")
+    VERSION=$(plugin_field manifest.version)
 
     # Should match X.Y.Z pattern
     echo "$VERSION" | grep -Eq '^[0-9]+\.[0-9]+\.[0-9]+'
@@ -3,9 +3,10 @@ Unit tests for handoff plugin structure and configuration.
 """
 
 import pytest
-import json
 from pathlib import Path
 
+from validate_plugins import validate_plugin
+
 
 class TestPluginStructure:
     """Test plugin directory structure and files."""
@@ -16,28 +17,23 @@ class TestPluginStructure:
         assert plugin_json.exists(), "plugin.json not found"
         assert plugin_json.is_file(), "plugin.json is not a file"
 
-    def test_plugin_json_valid(self, plugin_path):
+    def test_plugin_json_valid(self, handoff_plugin):
         """Verify plugin.json is valid JSON."""
-        plugin_json = plugin_path / ".claude-plugin" / "plugin.json"
-        content = plugin_json.read_text()
-
-        data = json.loads(content)
-        assert isinstance(data, dict), "plugin.json should be an object"
+        assert handoff_plugin.manifest_error is None, handoff_plugin.manifest_error
+        assert isinstance(handoff_plugin.manifest, dict), "plugin.json should be an object"
 
-    def test_plugin_json_required_fields(self, plugin_path):
+    def test_plugin_json_required_fields(self, handoff_plugin):
         """Verify plugin.json has all required fields."""
-        plugin_json = plugin_path / ".claude-plugin" / "plugin.json"
-        data = json.loads(plugin_json.read_text())
+        data = handoff_plugin.manifest
 
         required_fields = ["name", "displayName", "description", "version"]
         for field in required_fields:
             assert field in data, f"Missing required field: {field}"
             assert data[field], f"Field {field} is empty"
 
-    def test_plugin_json_metadata(self, plugin_path):
+    def test_plugin_json_metadata(self, handoff_plugin):
         """Verify plugin.json has correct metadata."""
-        plugin_json = plugin_path / ".claude-plugin" / "plugin.json"
-        data = json.loads(plugin_json.read_text())
+        data = handoff_plugin.manifest
 
         # Verify name
         assert data["name"] == "handoff", "Plugin name should be 'handoff'"
@@ -62,22 +58,16 @@ class TestPluginStructure:
         assert handoff_cmd.exists(), "handoff.md command not found"
         assert handoff_cmd.is_file(), "handoff.md should be a file"
 
-    def test_handoff_command_has_frontmatter(self, plugin_path):
+    def test_handoff_command_has_frontmatter(self, handoff_plugin):
         """Verify handoff command has YAML frontmatter."""
-        handoff_cmd = plugin_path / "commands" / "handoff.md"
-        content = handoff_cmd.read_text()
-
-        # Should start and contain frontmatter delimiters
-        assert content.startswith("---"), "Command should start with ---"
-        assert content.count("---") >= 2, "Should have opening and closing ---"
-
-        # Extract frontmatter
-        parts = content.split("---", 2)
-        assert len(parts) >= 3, "Should have frontmatter section"
-
-        frontmatter = parts[1]
-        assert "description:" in frontmatter, "Should have description"
-        assert "handoff" in frontmatter.lower() or "context" in frontmatter.lower(), \
+        command = handoff_plugin.command("handoff")
+        assert command is not None, "handoff.md command not found"
+        assert command.error is None, f"Invalid frontmatter: {command.error}"
+
+        frontmatter = command.frontmatter
+        assert "description" in frontmatter, "Should have description"
+        text = " ".join(str(value) for value in frontmatter.values()).lower()
+        assert "handoff" in text or "context" in text, \
             "Description should mention handoff or context"
 
     def test_handoff_command_has_instructions(self, plugin_path):
@@ -130,13 +120,16 @@ class TestPluginStructure:
         # Should have reasonable length
         assert len(content) > 1000, "README should be comprehensive (>1000 chars)"
 
-    def test_no_extra_files_in_plugin_metadata(self, plugin_path):
+    def test_no_extra_files_in_plugin_metadata(self, handoff_plugin):
         """Verify only plugin.json exists in .claude-plugin."""
-        plugin_metadata_dir = plugin_path / ".claude-plugin"
+        files = [path for path in handoff_plugin.files if path.startswith(".claude-plugin/")]
+        assert files == [".claude-plugin/plugin.json"], \
+            ".claude-plugin should only contain plugin.json"
 
-        files = list(plugin_metadata_dir.glob("*"))
-        assert len(files) == 1, ".claude-plugin should only contain plugin.json"
-        assert files[0].name == "plugin.json", "Only file should be plugin.json"
+    def test_plugin_passes_marketplace_validator(self, handoff_plugin):
+        """Verify the shared validator reports no errors for this plugin."""
+        issues = validate_plugin(handoff_plugin)
+        assert [str(i) for i in issues if i.level == "error"] == []
 
 
 class TestCommandFormat:
@@ -154,55 +147,33 @@ class TestCommandFormat:
         assert "```" in content or "-" in content or "*" in content, \
             "Should have structured content"
 
-    def test_command_frontmatter_description(self, plugin_path):
+    def test_command_frontmatter_description(self, handoff_plugin):
         """Verify command has proper description."""
-        handoff_cmd = plugin_path / "commands" / "handoff.md"
-        content = handoff_cmd.read_text()
-
-        # Extract frontmatter
-        parts = content.split("---", 2)
-        frontmatter = parts[1]
+        description = handoff_plugin.command("handoff").frontmatter["description"]
 
-        # Extract description
-        for line in frontmatter.split("\n"):
-            if "description:" in line:
-                description = line.split(":", 1)[1].strip()
+        # Should be meaningful
+        assert len(description) > 10, "Description too short"
+        assert "context" in description.lower() or "handoff" in description.lower(), \
+            "Description should mention context or handoff"
 
-                # Should be meaningful
-                assert len(description) > 10, "Description too short"
-                assert "context" in description.lower() or "handoff" in description.lower(), \
-                    "Description should mention context or handoff"
-                break
-
-    def test_command_frontmatter_argument_hint(self, plugin_path):
+    def test_command_frontmatter_argument_hint(self, handoff_plugin):
         """Verify command has argument hint if needed."""
-        handoff_cmd = plugin_path / "commands" / "handoff.md"
-        content = handoff_cmd.read_text()
-
-        parts = content.split("---", 2)
-        frontmatter = parts[1]
+        frontmatter = handoff_plugin.command("handoff").frontmatter
 
         # May have argument-hint
-        if "argument-hint:" in frontmatter:
-            for line in frontmatter.split("\n"):
-                if "argument-hint:" in line:
-                    hint = line.split(":", 1)[1].strip()
-                    assert len(hint) > 0, "Argument hint should not be empty"
+        if "argument-hint" in frontmatter:
+            hint = frontmatter["argument-hint"]
+            assert isinstance(hint, str) and len(hint.strip()) > 0, \
+                "Argument hint should not be empty"
 
-    def test_command_allowed_tools(self, plugin_path):
+    def test_command_allowed_tools(self, handoff_plugin):
         """Verify command declares required tools."""
-        handoff_cmd = plugin_path / "commands" / "handoff.md"
-        content = handoff_cmd.read_text()
-
-        parts = content.split("---", 2)
-        frontmatter = parts[1]
+        frontmatter = handoff_plugin.command("handoff").frontmatter
 
         # Should have allowed-tools if it uses them
-        if "allowed-tools:" in frontmatter:
-            # Tools should be valid
-            for line in frontmatter.split("\n"):
-                if "allowed-tools:" in line:
-                    tools_str = line.split(":", 1)[1].strip()
-                    # Should be a list
-                    assert "[" in tools_str and "]" in tools_str, \
-                        "allowed-tools should be a list"
+        if "allowed-tools" in frontmatter:
+            tools = frontmatter["allowed-tools"]
+            # Should be a list
+            assert isinstance(tools, list), "allowed-tools should be a list"
+            assert all(isinstance(tool, str) and tool for tool in tools), \
+                "allowed-tools should name tools"
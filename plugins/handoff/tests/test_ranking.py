@@ -0,0 +1,184 @@
+"""
+Unit tests for deterministic relevant-file ranking.
+"""
+
+import json
+import subprocess
+
+import pytest
+
+import checkpoint
+import ranking
+import transcript
+
+
+pytestmark = pytest.mark.unit
+
+
+def tool_use(name, path):
+    return {"type": "tool_use", "id": f"{name}-{path}", "name": name,
+            "input": {"file_path": path}}
+
+
+def git(repo, *args):
+    subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=t@example.com",
+         *args],
+        check=True, capture_output=True,
+    )
+
+
+def commit(repo, message, **files):
+    for name, content in files.items():
+        path = repo / name.replace("__", "/")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-m", message)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository where src/api always changes with src/models."""
+    root = tmp_path / "repo"
+    root.mkdir()
+    git(root, "init", "-q")
+    commit(root, "init", src__api="1", src__models="1", docs__notes="1", README="1")
+    commit(root, "api", src__api="2", src__models="2")
+    commit(root, "api again", src__api="3", src__models="3")
+    commit(root, "docs", docs__notes="2")
+    return root
+
+
+class TestRank:
+    """Test scoring of candidate files."""
+
+    def test_edits_outrank_reads_and_mentions(self, repo, write_transcript, make_event):
+        """Verify edited files come first, then read, then mentioned."""
+        path = write_transcript([
+            make_event("user", {"type": "text", "text": "look at README please"}),
+            make_event("assistant", tool_use("Read", str(repo / "docs/notes"))),
+            make_event("assistant", tool_use("Edit", str(repo / "src/api"))),
+        ])
+        ranked = ranking.rank(transcript.extract(path), repo)
+        assert [r.path for r in ranked][:2] == ["src/api", "docs/notes"]
+
+    def test_cochange_adds_untouched_partner(self, repo, write_transcript, make_event):
+        """Verify files that change with edited files are suggested."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Edit", str(repo / "src/api"))),
+        ])
+        cochange = ranking.build_cochange(repo)
+        ranked = {r.path: r for r in ranking.rank(transcript.extract(path), repo, cochange)}
+
+        assert "src/models" in ranked, "Co-changed file should be a candidate"
+        assert ranked["src/models"].signals["cochange_with"] == ["src/api"]
+        assert "docs/notes" not in ranked, "Unrelated file should not be suggested"
+
+    def test_recency_breaks_ties(self, repo, write_transcript, make_event):
+        """Verify the later of two equally used files ranks higher."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Read", str(repo / "docs/notes"))),
+            make_event("assistant", tool_use("Read", str(repo / "README"))),
+        ])
+        ranked = ranking.rank(transcript.extract(path), repo)
+        assert [r.path for r in ranked] == ["README", "docs/notes"]
+
+    def test_ranking_is_deterministic(self, repo, write_transcript, make_event):
+        """Verify repeated runs give identical output."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Edit", str(repo / "src/api"))),
+            make_event("assistant", tool_use("Edit", str(repo / "src/models"))),
+        ])
+        cochange = ranking.build_cochange(repo)
+        runs = [
+            ranking.to_markdown(ranking.rank(transcript.extract(path), repo, cochange))
+            for _ in range(3)
+        ]
+        assert runs[0] == runs[1] == runs[2]
+
+    def test_missing_and_outside_files_dropped(self, repo, tmp_path, write_transcript, make_event):
+        """Verify deleted files and files outside the repo are not ranked."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Edit", str(repo / "gone.py"))),
+            make_event("assistant", tool_use("Read", str(tmp_path / "elsewhere.py"))),
+        ])
+        assert ranking.rank(transcript.extract(path), repo) == []
+
+    def test_limit(self, repo, write_transcript, make_event):
+        """Verify at most limit files are returned."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Read", str(repo / name)))
+            for name in ("README", "docs/notes", "src/api", "src/models")
+        ])
+        assert len(ranking.rank(transcript.extract(path), repo, limit=2)) == 2
+
+
+class TestCochangeCache:
+    """Test the per-commit co-change cache."""
+
+    def test_cache_reused_until_head_moves(self, repo, tmp_path, monkeypatch):
+        """Verify history is only re-read after a new commit."""
+        cache_dir = tmp_path / ".claude"
+        calls = []
+        real_build = ranking.build_cochange
+        monkeypatch.setattr(ranking, "build_cochange",
+                            lambda r: calls.append(r) or real_build(r))
+
+        first = ranking.load_cochange(repo, cache_dir)
+        second = ranking.load_cochange(repo, cache_dir)
+        assert len(calls) == 1, "Second load should hit the cache"
+        assert first == second
+
+        commit(repo, "more", src__api="4", README="2")
+        ranking.load_cochange(repo, cache_dir)
+        assert len(calls) == 2, "New HEAD should rebuild the table"
+        cached = json.loads((cache_dir / ranking.CACHE_NAME).read_text())
+        assert cached["cochange"]["pairs"]["README"]["src/api"] == 2
+
+    def test_not_a_repository(self, tmp_path):
+        """Verify ranking still works outside git."""
+        assert ranking.load_cochange(tmp_path, None) == {"touches": {}, "pairs": {}}
+
+    def test_bulk_commits_ignored(self, repo):
+        """Verify very large commits do not create co-change pairs."""
+        files = {f"bulk__f{i}": "x" for i in range(ranking.MAX_COMMIT_FILES + 1)}
+        commit(repo, "bulk", **files)
+        assert "bulk/f0" not in ranking.build_cochange(repo)["touches"]
+
+
+class TestCommandLine:
+    """Test the ranking command-line interface."""
+
+    def test_digest_skips_the_transcript(
+        self, repo, tmp_path, write_transcript, make_event, capsys
+    ):
+        """Verify --digest ranks from checkpoint.py's signals without the transcript."""
+        memory_dir = repo / ".claude"
+        path = write_transcript([
+            make_event("assistant", tool_use("Read", str(repo / "docs/notes"))),
+            make_event("assistant", tool_use("Edit", str(repo / "src/api"))),
+        ])
+        args = ["--repo", str(repo), "--cache-dir", str(memory_dir)]
+        assert ranking.main([str(path), *args]) == 0
+        from_transcript = capsys.readouterr().out
+
+        assert checkpoint.main([str(path), "--memory-dir", str(memory_dir)]) == 0
+        capsys.readouterr()
+        path.unlink()
+        digest = memory_dir / checkpoint.DIGEST_NAME
+        assert ranking.main(["--digest", str(digest), *args]) == 0
+        assert capsys.readouterr().out == from_transcript
+
+    def test_markdown_output(self, repo, write_transcript, make_event, capsys):
+        """Verify the output is ready for the Relevant Files section."""
+        path = write_transcript([
+            make_event("assistant", tool_use("Edit", str(repo / "src/api"))),
+        ])
+        code = ranking.main([str(path), "--repo", str(repo),
+                             "--cache-dir", str(repo / ".claude")])
+        lines = capsys.readouterr().out.splitlines()
+
+        assert code == 0
+        assert lines[0] == "- `src/api` — edit ×1"
+        assert lines[1] == "- `src/models` — changes with `src/api`"
@@ -0,0 +1,151 @@
+"""
+Unit tests for the SDK record/replay cassettes.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import pytest
+
+import sdk_cassette
+from sdk_cassette import Cassette, CassetteError
+
+
+pytestmark = pytest.mark.unit
+
+
+@dataclass
+class TextBlock:
+    text: str
+
+
+@dataclass
+class AssistantMessage:
+    content: list
+    model: str
+    usage: dict = field(default_factory=dict)
+
+
+@dataclass
+class SystemMessage:
+    subtype: str
+    data: dict
+
+
+SDK = SimpleNamespace(
+    TextBlock=TextBlock, AssistantMessage=AssistantMessage, SystemMessage=SystemMessage
+)
+
+MESSAGES = [
+    SystemMessage("init", {"session_id": "abc", "slash_commands": ["handoff"]}),
+    AssistantMessage([TextBlock("Memory file written")], "claude", {"output_tokens": 4}),
+]
+
+
+def collect(stream):
+    async def _collect():
+        return [message async for message in stream]
+    return asyncio.run(_collect())
+
+
+def fake_live(responses):
+    calls = []
+
+    async def query(*, prompt, options=None):
+        calls.append(prompt)
+        for message in responses[prompt]:
+            yield message
+
+    query.calls = calls
+    return query
+
+
+class TestRecords:
+    """Test converting SDK messages to and from JSON."""
+
+    def test_round_trip(self):
+        """Verify messages come back as equal objects of the same types."""
+        data = json.loads(json.dumps(sdk_cassette.to_record(MESSAGES)))
+        assert sdk_cassette.from_record(data, SDK) == MESSAGES
+
+    def test_unknown_fields_dropped(self):
+        """Verify cassettes recorded with another SDK version still load."""
+        data = sdk_cassette.to_record(TextBlock("hi"))
+        data["fields"]["citations"] = []
+        assert sdk_cassette.from_record(data, SDK) == TextBlock("hi")
+
+    def test_unknown_type(self):
+        """Verify an unknown message type is reported."""
+        with pytest.raises(CassetteError, match="Unknown SDK type"):
+            sdk_cassette.from_record({"type": "Nope", "fields": {}}, SDK)
+
+
+class TestCassette:
+    """Test recording and replaying interactions."""
+
+    def test_record_then_replay(self, tmp_path):
+        """Verify a recorded cassette replays the same messages offline."""
+        path = tmp_path / "test.json"
+        live = fake_live({"/help": MESSAGES[:1], "/handoff x": MESSAGES[1:]})
+        recorder = Cassette(path, "record", live=live)
+        assert collect(recorder.query(prompt="/help")) == MESSAGES[:1]
+        assert collect(recorder.query(prompt="/handoff x")) == MESSAGES[1:]
+        recorder.save()
+
+        player = Cassette(path, "replay", sdk=SDK)
+        assert collect(player.query(prompt="/help")) == MESSAGES[:1]
+        assert collect(player.query(prompt="/handoff x")) == MESSAGES[1:]
+        assert live.calls == ["/help", "/handoff x"]
+
+    def test_missing_cassette(self, tmp_path):
+        """Verify replaying without a cassette explains how to record one."""
+        with pytest.raises(CassetteError, match="HANDOFF_SDK_MODE=record"):
+            Cassette(tmp_path / "missing.json", "replay")
+
+    def test_prompt_mismatch(self, tmp_path):
+        """Verify a changed prompt is not served a stale recording."""
+        path = tmp_path / "test.json"
+        recorder = Cassette(path, "record", live=fake_live({"/help": []}))
+        collect(recorder.query(prompt="/help"))
+        recorder.save()
+
+        player = Cassette(path, "replay")
+        with pytest.raises(CassetteError, match="expected prompt '/help'"):
+            collect(player.query(prompt="/handoff"))
+
+    def test_extra_prompt(self, tmp_path):
+        """Verify sending more prompts than were recorded fails clearly."""
+        path = tmp_path / "test.json"
+        path.write_text(json.dumps({"version": 1, "interactions": []}))
+        with pytest.raises(CassetteError, match="0 recorded prompt"):
+            collect(Cassette(path, "replay").query(prompt="/help"))
+
+    def test_live_mode_writes_nothing(self, tmp_path):
+        """Verify live mode leaves cassettes alone."""
+        path = tmp_path / "test.json"
+        cassette = Cassette(path, "live", live=fake_live({"/help": MESSAGES}))
+        assert collect(cassette.query(prompt="/help")) == MESSAGES
+        cassette.save()
+        assert not path.exists()
+
+
+class TestConfiguration:
+    """Test mode selection and cassette naming."""
+
+    def test_default_mode_is_replay(self, monkeypatch):
+        """Verify tests run offline unless asked otherwise."""
+        monkeypatch.delenv("HANDOFF_SDK_MODE", raising=False)
+        assert sdk_cassette.sdk_mode() == "replay"
+        monkeypatch.setenv("HANDOFF_SDK_MODE", "bogus")
+        with pytest.raises(CassetteError):
+            sdk_cassette.sdk_mode()
+
+    def test_cassette_path(self):
+        """Verify each test gets its own cassette file."""
+        path = sdk_cassette.cassette_path(
+            "tests/test_integration_sdk.py::TestPluginLoading::test_plugin_loads_without_error"
+        )
+        assert path == (sdk_cassette.CASSETTE_DIR / "test_integration_sdk"
+                        / "TestPluginLoading.test_plugin_loads_without_error.json")
@@ -0,0 +1,116 @@
+"""
+Unit tests for the shared SDK rate limiter.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from sdk_limiter import RateLimiter
+
+
+pytestmark = pytest.mark.unit
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def rejected(resets_at=None):
+    info = SimpleNamespace(status="rejected", resets_at=resets_at)
+    return SimpleNamespace(rate_limit_info=info)
+
+
+class TestTokenBucket:
+    """Test the per-minute budget."""
+
+    def test_burst_then_steady_rate(self, tmp_path):
+        """Verify one prompt per slot starts at once, then the rate applies."""
+        clock = Clock()
+        limiter = RateLimiter(tmp_path, concurrency=2, per_minute=60, clock=clock)
+        assert limiter.try_take() == 0
+        assert limiter.try_take() == 0
+        assert limiter.try_take() == pytest.approx(1.0)
+
+        clock.now += 1
+        assert limiter.try_take() == 0
+
+    def test_budget_shared_between_instances(self, tmp_path):
+        """Verify workers with their own limiter draw from one bucket."""
+        clock = Clock()
+        first = RateLimiter(tmp_path, concurrency=1, per_minute=30, clock=clock)
+        second = RateLimiter(tmp_path, concurrency=1, per_minute=30, clock=clock)
+        assert first.try_take() == 0
+        assert second.try_take() == pytest.approx(2.0)
+
+    def test_rejection_pauses_everyone(self, tmp_path):
+        """Verify a rate-limit event stops all workers until it resets."""
+        clock = Clock()
+        first = RateLimiter(tmp_path, concurrency=4, clock=clock)
+        second = RateLimiter(tmp_path, concurrency=4, clock=clock)
+
+        first.observe(SimpleNamespace(rate_limit_info=SimpleNamespace(status="allowed")))
+        assert second.try_take() == 0
+
+        first.observe(rejected(resets_at=clock.now + 30))
+        assert second.try_take() == pytest.approx(30)
+        clock.now += 31
+        assert second.try_take() == 0
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        """Verify limits are read from the environment."""
+        monkeypatch.setenv("HANDOFF_SDK_CONCURRENCY", "3")
+        monkeypatch.setenv("HANDOFF_SDK_RPM", "12")
+        limiter = RateLimiter.from_env(tmp_path)
+        assert (limiter.concurrency, limiter.per_minute) == (3, 12)
+
+
+class TestScheduling:
+    """Test concurrency limits on wrapped queries."""
+
+    def test_concurrency_is_bounded(self, tmp_path):
+        """Verify no more than concurrency prompts are in flight."""
+        limiter = RateLimiter(tmp_path, concurrency=2, per_minute=6000)
+        in_flight = []
+        peak = []
+
+        async def query(*, prompt):
+            in_flight.append(prompt)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.02)
+            in_flight.remove(prompt)
+            yield f"reply to {prompt}"
+
+        limited = limiter.wrap(query)
+
+        async def send(prompt):
+            return [m async for m in limited(prompt=prompt)]
+
+        async def scenario():
+            return await asyncio.gather(*(send(f"p{i}") for i in range(6)))
+
+        replies = asyncio.run(scenario())
+        assert replies == [[f"reply to p{i}"] for i in range(6)]
+        assert max(peak) == 2
+
+    def test_waits_for_tokens(self, tmp_path):
+        """Verify prompts beyond the burst wait for the bucket to refill."""
+        limiter = RateLimiter(tmp_path, concurrency=1, per_minute=600)
+
+        async def query(*, prompt):
+            yield prompt
+
+        async def scenario():
+            for i in range(3):
+                [m async for m in limiter.wrap(query)(prompt=str(i))]
+
+        started = time.monotonic()
+        asyncio.run(scenario())
+        assert time.monotonic() - started >= 0.15
+        assert limiter.waited >= 0.15
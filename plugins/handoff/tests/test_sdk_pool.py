@@ -0,0 +1,138 @@
+"""
+Unit tests for pooled SDK sessions.
+"""
+
+import asyncio
+
+import pytest
+
+from sdk_pool import RESET_PROMPT, SessionPool
+
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClient:
+    """Stands in for ClaudeSDKClient: echoes each prompt back as one message."""
+
+    def __init__(self, cwd, fail_reset=False):
+        self.cwd = cwd
+        self.fail_reset = fail_reset
+        self.connected = False
+        self.prompts = []
+        self._pending = None
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def query(self, prompt):
+        if prompt == RESET_PROMPT and self.fail_reset:
+            raise RuntimeError("reset failed")
+        self.prompts.append(prompt)
+        self._pending = prompt
+
+    async def receive_response(self):
+        yield f"reply to {self._pending}"
+        yield "result"
+
+
+def make_pool(tmp_path, size=1, **client_args):
+    clients = []
+
+    def factory(cwd):
+        clients.append(FakeClient(cwd, **client_args))
+        return clients[-1]
+
+    return SessionPool(factory, tmp_path, size), clients
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestSessionPool:
+    """Test leasing, resetting and replacing sessions."""
+
+    def test_sessions_are_reused_and_reset(self, tmp_path):
+        """Verify later leases reuse the warm session after a /clear."""
+        pool, clients = make_pool(tmp_path)
+
+        async def scenario():
+            for prompt in ("first", "second"):
+                async with pool.lease() as session:
+                    replies = [m async for m in session.query(prompt=prompt)]
+                    assert replies == [f"reply to {prompt}", "result"]
+                    (session.cwd / "handoff-memory.md").write_text("x")
+            await pool.close()
+
+        run(scenario())
+        assert len(clients) == 1
+        assert clients[0].prompts == ["first", RESET_PROMPT, "second", RESET_PROMPT]
+        assert not any(clients[0].cwd.iterdir())
+        assert not clients[0].connected
+        assert pool.stats == {"connects": 1, "leases": 2, "resets": 2, "discarded": 0}
+
+    def test_one_conversation_per_lease(self, tmp_path):
+        """Verify prompts within one lease are not separated by a reset."""
+        pool, clients = make_pool(tmp_path)
+
+        async def scenario():
+            async with pool.lease() as session:
+                for prompt in ("plan", "/handoff build"):
+                    [m async for m in session.query(prompt=prompt)]
+
+        run(scenario())
+        assert clients[0].prompts == ["plan", "/handoff build", RESET_PROMPT]
+
+    def test_abandoned_session_is_replaced(self, tmp_path):
+        """Verify a session returned mid-response is discarded, not reused."""
+        pool, clients = make_pool(tmp_path)
+
+        async def scenario():
+            async with pool.lease() as session:
+                async for _ in session.query(prompt="slow"):
+                    break
+            async with pool.lease() as session:
+                [m async for m in session.query(prompt="next")]
+
+        run(scenario())
+        assert len(clients) == 2
+        assert not clients[0].connected
+        assert RESET_PROMPT not in clients[0].prompts
+        assert pool.stats["discarded"] == 1
+
+    def test_failed_reset_is_replaced(self, tmp_path):
+        """Verify a session that cannot be reset is not handed out again."""
+        pool, clients = make_pool(tmp_path, fail_reset=True)
+
+        async def scenario():
+            for _ in range(2):
+                async with pool.lease():
+                    pass
+
+        run(scenario())
+        assert len(clients) == 2
+        assert pool.stats["discarded"] == 2
+
+    def test_size_bounds_concurrent_sessions(self, tmp_path):
+        """Verify no more than size sessions are open at once."""
+        pool, clients = make_pool(tmp_path, size=2)
+        active = []
+
+        async def borrow():
+            async with pool.lease() as session:
+                active.append(session)
+                assert len(active) <= 2
+                await asyncio.sleep(0.01)
+                active.remove(session)
+
+        async def scenario():
+            await asyncio.gather(*(borrow() for _ in range(6)))
+
+        run(scenario())
+        assert len(clients) == 2
+        assert pool.stats["leases"] == 6
+        assert clients[0].cwd != clients[1].cwd
@@ -0,0 +1,161 @@
+"""
+Unit tests for repository warm-start snapshots.
+"""
+
+import json
+import subprocess
+
+import pytest
+
+import compaction
+import snapshot
+
+
+pytestmark = pytest.mark.unit
+
+
+def git(repo, *args):
+    subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=t@example.com",
+         *args],
+        check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "auth.py").write_text(
+        '"""Token signing helpers."""\n\n'
+        "class Signer:\n    pass\n\n"
+        "def sign(payload):\n    return payload\n"
+    )
+    (root / "README.md").write_text("# Project\n\n## Setup\n")
+    git(root, "init", "-q")
+    git(root, "add", "-A")
+    git(root, "commit", "-qm", "init")
+    return root
+
+
+@pytest.fixture
+def memory_file(repo):
+    memory_dir = repo / ".claude"
+    memory_dir.mkdir()
+    path = memory_dir / "handoff-memory.2026-01-01-10-00-00.md"
+    path.write_text(
+        "# Handoff Memory\n\n## Extracted Context\n\n"
+        "### Relevant Files\n"
+        "- `src/auth.py` — edit ×2\n"
+        "- `gone.py` — read ×1\n\n"
+        "### Technical Details\n- `not/a/relevant/file.py`\n"
+    )
+    return path
+
+
+class TestFileTree:
+    """Test tree hashing."""
+
+    def test_hashes_match_git(self, repo):
+        """Verify hashes are git blob ids."""
+        tree = snapshot.file_tree(repo)
+        expected = subprocess.run(
+            ["git", "-C", str(repo), "hash-object", "src/auth.py"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        assert tree["src/auth.py"][1] == expected
+        assert tree["README.md"][0] == len("# Project\n\n## Setup\n")
+
+    def test_dirty_and_untracked_files_rehashed(self, repo):
+        """Verify working-tree edits are reflected without committing."""
+        before = snapshot.file_tree(repo)
+        (repo / "README.md").write_text("changed\n")
+        (repo / "new.txt").write_text("new\n")
+        (repo / ".claude").mkdir()
+        (repo / ".claude" / "handoff-memory.x.md").write_text("ignored")
+        after = snapshot.file_tree(repo)
+
+        assert after["README.md"][1] == snapshot.blob_hash(b"changed\n")
+        assert after["README.md"] != before["README.md"]
+        assert "new.txt" in after
+        assert not any(path.startswith(".claude/") for path in after)
+
+    def test_works_outside_git(self, tmp_path):
+        """Verify a plain directory is walked and hashed."""
+        (tmp_path / "a.txt").write_text("a")
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "dep.js").write_text("x")
+        assert list(snapshot.file_tree(tmp_path)) == ["a.txt"]
+
+
+class TestFileDigest:
+    """Test per-file digests."""
+
+    def test_python_digest(self, repo):
+        """Verify symbols and the leading docstring are captured."""
+        digest = snapshot.file_digest(repo / "src" / "auth.py")
+        assert digest == {
+            "lines": 7,
+            "symbols": ["Signer", "sign"],
+            "summary": "Token signing helpers.",
+        }
+
+    def test_markdown_digest(self, repo):
+        """Verify markdown headings are used as symbols."""
+        digest = snapshot.file_digest(repo / "README.md")
+        assert digest["symbols"] == ["Project", "Setup"]
+
+
+class TestSnapshot:
+    """Test creating and verifying snapshots."""
+
+    def test_create_reads_relevant_files(self, repo, memory_file):
+        """Verify digests are made for the memory file's existing relevant files."""
+        assert snapshot.relevant_files(memory_file) == ["src/auth.py", "gone.py"]
+        data = snapshot.create(repo, snapshot.relevant_files(memory_file))
+
+        assert list(data["relevant"]) == ["src/auth.py"]
+        assert data["head"] is not None
+        assert {path for path, _, _ in data["tree"]} == {"README.md", "src/auth.py"}
+
+    def test_verify_reports_changes(self, repo):
+        """Verify unchanged, changed, added and removed files are reported."""
+        data = snapshot.create(repo, ["src/auth.py"])
+        (repo / "src" / "auth.py").write_text("def other(): pass\n")
+        (repo / "README.md").unlink()
+        (repo / "NEW.md").write_text("new")
+
+        report = snapshot.verify(data, repo)
+        assert report == {
+            "unchanged": [],
+            "changed": ["src/auth.py"],
+            "added": ["NEW.md"],
+            "removed": ["README.md"],
+        }
+        output = snapshot.render_verify(data, report)
+        assert "- `src/auth.py` (CHANGED) — 7 lines; Signer, sign" in output
+
+    def test_command_line_round_trip(self, repo, memory_file, capsys, monkeypatch):
+        """Verify create writes a paired snapshot that verify accepts."""
+        monkeypatch.chdir(repo)
+        assert snapshot.main(["create", str(memory_file)]) == 0
+        target = repo / ".claude" / "handoff-snapshot.2026-01-01-10-00-00.json"
+        assert target.exists()
+        assert json.loads(target.read_text())["version"] == snapshot.SNAPSHOT_VERSION
+
+        capsys.readouterr()
+        assert snapshot.main(["verify", str(target)]) == 0
+        output = capsys.readouterr().out
+        assert "Unchanged: 2 files (trust the snapshot)" in output
+        assert "Changed" not in output
+
+    def test_compaction_removes_snapshot(self, repo, memory_file):
+        """Verify evicting a memory file also removes its snapshot."""
+        target = snapshot.snapshot_path(memory_file)
+        target.write_text("{}")
+        newer = memory_file.with_name("handoff-memory.2026-01-02-10-00-00.md")
+        newer.write_text("# Handoff Memory\n")
+
+        compaction.compact(memory_file.parent, compaction.RetentionPolicy(max_count=1))
+        assert not memory_file.exists()
+        assert not target.exists()
@@ -0,0 +1,109 @@
+"""
+Unit tests for test sharding and merged timing reports.
+"""
+
+import json
+
+import pytest
+
+import timings
+
+
+pytestmark = pytest.mark.unit
+
+
+PYTEST_REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="3">
+<testcase classname="tests.test_checkpoint.TestCheckpoint" name="test_header" time="0.5"/>
+<testcase classname="tests.test_ranking.TestRank" name="test_limit" time="2.0">
+<failure message="boom"/></testcase>
+<testcase classname="tests.test_integration_sdk.TestPluginLoading" name="test_loads" time="0.1">
+<skipped message="no cassette"/></testcase>
+</testsuite></testsuites>
+"""
+
+BATS_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites><testsuite name="test_plugin.bats" tests="1">
+<testcase classname="test_plugin.bats" name="plugin.json is valid" time="0.25"/>
+</testsuite></testsuites>
+"""
+
+
+@pytest.fixture
+def reports(tmp_path):
+    unit = tmp_path / "unit.xml"
+    unit.write_text(PYTEST_REPORT)
+    shell = tmp_path / "report.xml"
+    shell.write_text(BATS_REPORT)
+    return [unit, shell]
+
+
+class TestShards:
+    """Test shard selection and balancing."""
+
+    def test_parse_shard(self):
+        """Verify shard strings are validated."""
+        assert timings.parse_shard("2/4") == (2, 4)
+        assert timings.parse_shard("") is None
+        for bad in ("0/2", "3/2", "two"):
+            with pytest.raises(ValueError):
+                timings.parse_shard(bad)
+
+    def test_every_test_in_exactly_one_shard(self):
+        """Verify shards partition the tests."""
+        nodeids = [f"tests/test_x.py::test_{i}" for i in range(11)]
+        shards = timings.assign_shards(nodeids, 3)
+        assert sorted(sum(shards, [])) == sorted(nodeids)
+        assert [len(s) for s in shards] == [4, 4, 3]
+        assert shards == timings.assign_shards(list(reversed(nodeids)), 3)
+
+    def test_balanced_on_durations(self):
+        """Verify slow tests are spread so shard totals stay close."""
+        durations = {"slow_a": 10, "slow_b": 9, "mid": 5, "fast_1": 1, "fast_2": 1}
+        shards = timings.assign_shards(list(durations), 2, durations)
+        totals = sorted(sum(durations[n] for n in shard) for shard in shards)
+        assert totals == [12, 14]
+
+    def test_unknown_tests_count_as_median(self):
+        """Verify new tests do not pile onto one shard."""
+        known = {f"t{i}": 0.01 for i in range(4)}
+        shards = timings.assign_shards([*known, "new_1", "new_2"], 2, known)
+        assert {"new_1", "new_2"} & set(shards[0])
+        assert {"new_1", "new_2"} & set(shards[1])
+
+
+class TestReports:
+    """Test reading and merging JUnit reports."""
+
+    def test_load_pytest_and_bats(self, reports):
+        """Verify node ids, times and outcomes are read from both formats."""
+        cases = {c.nodeid: c for c in timings.load_reports(reports)}
+        header = cases["tests/test_checkpoint.py::TestCheckpoint::test_header"]
+        assert (header.suite, header.time, header.outcome) == ("unit", 0.5, "passed")
+        assert cases["tests/test_ranking.py::TestRank::test_limit"].outcome == "failed"
+        assert cases["test_plugin.bats::plugin.json is valid"].suite == "test_plugin.bats"
+
+    def test_merged_report_round_trips(self, reports, tmp_path):
+        """Verify the merged report reloads to the same cases."""
+        cases = timings.load_reports(reports)
+        merged = tmp_path / "merged.xml"
+        timings.write_junit(cases, merged)
+        assert timings.load_reports([merged]) == cases
+
+    def test_timings_file_skips_skipped(self, reports, tmp_path):
+        """Verify skipped tests do not record misleading durations."""
+        path = tmp_path / "timings.json"
+        path.write_text(json.dumps({"tests/old.py::test_kept": 3.0}))
+        timings.write_timings(timings.load_reports(reports), path)
+        data = json.loads(path.read_text())
+        assert data["tests/old.py::test_kept"] == 3.0
+        assert data["tests/test_ranking.py::TestRank::test_limit"] == 2.0
+        assert not any("test_loads" in nodeid for nodeid in data)
+
+    def test_command_line(self, reports, capsys):
+        """Verify the summary, slowest tests and exit status."""
+        assert timings.main([str(p) for p in reports] + ["--slowest", "2"]) == 1
+        output = capsys.readouterr().out
+        assert "unit" in output and "test_plugin.bats" in output
+        assert "Slowest 2 tests" in output
+        assert output.index("test_limit") < output.index("test_header")
@@ -0,0 +1,148 @@
+"""
+Unit tests for per-step handoff traces.
+"""
+
+import json
+
+import pytest
+
+import checkpoint
+import tracing
+from tracing import Tracer
+
+
+pytestmark = pytest.mark.unit
+
+
+class Clock:
+    """A settable wall clock."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def memory_dir(tmp_path):
+    return tmp_path / ".claude"
+
+
+class TestSpans:
+    """Test recording spans."""
+
+    def test_span_records_time_tokens_and_bytes(self, memory_dir):
+        """Verify a span is appended with the values set while it ran."""
+        tracer = Tracer(memory_dir)
+        run = tracer.start_run()
+        with tracer.span("write-memory") as span:
+            span.tokens_in, span.tokens_out, span.bytes_written = 900, 450, 1800
+        (recorded,) = tracer.spans()
+        assert recorded["run"] == run
+        assert recorded["step"] == "write-memory"
+        assert (recorded["tokens_in"], recorded["tokens_out"], recorded["bytes_written"]) \
+            == (900, 450, 1800)
+        assert recorded["seconds"] >= 0
+
+    def test_span_recorded_when_step_fails(self, memory_dir):
+        """Verify a failing step still leaves its span."""
+        tracer = Tracer(memory_dir)
+        with pytest.raises(RuntimeError):
+            with tracer.span("snapshot"):
+                raise RuntimeError("boom")
+        assert [s["step"] for s in tracer.spans()] == ["snapshot"]
+
+    def test_begin_end_across_processes(self, memory_dir):
+        """Verify a model step is timed from begin to end in separate tracers."""
+        clock = Clock()
+        Tracer(memory_dir, clock=clock).begin("extract")
+        clock.now += 2.5
+        span = Tracer(memory_dir, clock=clock).end("extract", tokens_in=3000, tokens_out=700)
+        assert span.seconds == 2.5
+        assert span.started == 1_000.0
+
+    def test_disabled(self, memory_dir, monkeypatch):
+        """Verify HANDOFF_TRACE=0 writes nothing."""
+        monkeypatch.setenv("HANDOFF_TRACE", "0")
+        with Tracer(memory_dir).span("rank"):
+            pass
+        assert not memory_dir.exists()
+
+    def test_trace_stays_bounded(self, memory_dir, monkeypatch):
+        """Verify the oldest spans are dropped once the trace is too large."""
+        monkeypatch.setattr(tracing, "MAX_BYTES", 2_000)
+        tracer = Tracer(memory_dir)
+        for _ in range(100):
+            with tracer.span("prompt"):
+                pass
+        assert tracer.path.stat().st_size < 2_000 + 200
+        assert len(tracer.spans()) < 100
+
+    def test_script_writes_its_span(self, memory_dir, write_transcript, make_event, capsys):
+        """Verify checkpoint.py traces the summarise step into the memory dir."""
+        transcript = write_transcript([make_event("user", {"type": "text", "text": "hi"})])
+        assert checkpoint.main([str(transcript), "--memory-dir", str(memory_dir)]) == 0
+        (span,) = Tracer(memory_dir).spans()
+        assert span["step"] == "summarise"
+        assert span["tokens_in"] == tracing.bytes_tokens(transcript.stat().st_size)
+        assert span["tokens_out"] > 0
+
+
+class TestReport:
+    """Test the per-step report."""
+
+    def spans(self):
+        rows = []
+        for run, extract in (("r1", 4.0), ("r2", 2.0), ("r3", 3.0)):
+            rows += [
+                {"run": run, "step": "extract", "seconds": extract, "tokens_in": 100},
+                {"run": run, "step": "summarise", "seconds": 0.5, "tokens_in": 1000},
+            ]
+        return rows
+
+    def test_latest_run_in_workflow_order(self):
+        """Verify the latest run is reported with steps in workflow order."""
+        summary = tracing.summarise(self.spans())
+        assert summary["runs"] == ["r3"]
+        assert [row["step"] for row in summary["steps"]] == ["summarise", "extract"]
+        assert summary["total_seconds"] == 3.5
+
+    def test_median_over_runs(self):
+        """Verify --runs reports each step's median."""
+        summary = tracing.summarise(self.spans(), runs=3)
+        extract = next(row for row in summary["steps"] if row["step"] == "extract")
+        assert extract["seconds"] == 3.0
+
+    def test_cli(self, memory_dir, capsys):
+        """Verify start, begin, end and report from the command line."""
+        args = ["--memory-dir", str(memory_dir)]
+        assert tracing.main([*args, "start"]) == 0
+        assert tracing.main([*args, "begin", "extract"]) == 0
+        digest = memory_dir / "digest.md"
+        digest.write_text("x" * 400)
+        assert tracing.main([*args, "end", "extract", "--input", str(digest),
+                             "--tokens-out", "50"]) == 0
+        capsys.readouterr()
+        assert tracing.main([*args, "report", "--format", "json"]) == 0
+        (row,) = json.loads(capsys.readouterr().out)["steps"]
+        assert (row["step"], row["tokens_in"], row["tokens_out"]) == ("extract", 100, 50)
+        assert tracing.main([*args, "report"]) == 0
+        assert "| extract |" in capsys.readouterr().out
+
+    def test_skips_lines_that_are_not_spans(self, memory_dir):
+        """Verify stray lines in the trace do not break the report."""
+        tracer = Tracer(memory_dir)
+        tracer.start_run()
+        with tracer.span("rank"):
+            pass
+        with open(tracer.path, "a") as trace:
+            trace.write('{"note": "no run"}\n[1, 2]\n{"run": "x"\n')
+        spans = tracer.spans()
+        assert [span["step"] for span in spans] == ["rank"]
+        assert tracing.summarise(spans)["steps"][0]["step"] == "rank"
+
+    def test_report_without_trace(self, memory_dir, capsys):
+        """Verify a missing trace is an error."""
+        assert tracing.main(["--memory-dir", str(memory_dir), "report"]) == 1
+        assert "no trace" in capsys.readouterr().err
@@ -0,0 +1,156 @@
+"""
+Unit tests for the streaming transcript extractor.
+"""
+
+import json
+
+import pytest
+
+import transcript
+
+
+pytestmark = pytest.mark.unit
+
+
+def text(value):
+    return {"type": "text", "text": value}
+
+
+def tool_use(tool_id, name, **tool_input):
+    return {"type": "tool_use", "id": tool_id, "name": name, "input": tool_input}
+
+
+def tool_result(tool_id, content, is_error=False):
+    return {
+        "type": "tool_result",
+        "tool_use_id": tool_id,
+        "content": content,
+        "is_error": is_error,
+    }
+
+
+@pytest.fixture
+def session(write_transcript, make_event):
+    """A short session touching files, making a decision and hitting an error."""
+    return write_transcript([
+        make_event("user", text("Add JWT refresh to the auth service")),
+        make_event(
+            "assistant",
+            text("Looking at the code. We decided to store refresh tokens in Redis."),
+            tool_use("t1", "Read", file_path="src/auth/jwt.ts"),
+        ),
+        make_event("user", tool_result("t1", "export function sign() {}")),
+        make_event(
+            "assistant",
+            tool_use("t2", "Edit", file_path="src/auth/jwt.ts"),
+            tool_use("t3", "Bash", command="npm test"),
+        ),
+        make_event("user", tool_result("t3", "1 failing test", is_error=True)),
+        {"type": "summary", "summary": "ignored"},
+    ])
+
+
+class TestIterEvents:
+    """Test line-by-line transcript reading."""
+
+    def test_yields_every_event_with_offsets(self, session):
+        """Verify offsets increase and the last one is the file size."""
+        offsets = [offset for offset, _ in transcript.iter_events(session)]
+        assert len(offsets) == 6, "Should yield one item per event"
+        assert offsets == sorted(offsets), "Offsets should increase"
+        assert offsets[-1] == session.stat().st_size, "Should end at EOF"
+
+    def test_resumes_from_offset(self, session):
+        """Verify reading from an offset skips earlier events."""
+        first_offset, _ = next(transcript.iter_events(session))
+        rest = list(transcript.iter_events(session, first_offset))
+        assert len(rest) == 5, "Should skip the first event"
+
+    def test_skips_malformed_and_partial_lines(self, tmp_path):
+        """Verify bad JSON is skipped and a partial last line is not consumed."""
+        path = tmp_path / "bad.jsonl"
+        path.write_bytes(b'{"type": "user"}\nnot json\n\n{"type": "assistant"')
+        events = list(transcript.iter_events(path))
+        assert [e["type"] for _, e in events] == ["user"]
+        assert events[-1][0] == len(b'{"type": "user"}\n')
+
+
+class TestDigest:
+    """Test digest extraction."""
+
+    def test_extracts_files_tools_decisions_errors(self, session):
+        """Verify each digest section is populated."""
+        digest = transcript.extract(session).to_dict()
+
+        assert digest["turns"] == 5
+        assert digest["files"] == {"src/auth/jwt.ts": {"read": 1, "edit": 1}}
+        assert digest["tool_calls"] == {"Read": 1, "Edit": 1, "Bash": 1}
+        assert digest["decisions"] == [
+            "We decided to store refresh tokens in Redis."
+        ]
+        assert digest["errors"] == ["[Bash] 1 failing test"]
+        assert digest["requests"] == ["Add JWT refresh to the auth service"]
+        assert digest["end_offset"] == session.stat().st_size
+
+    def test_collections_are_bounded(self, write_transcript, make_event):
+        """Verify file, decision and request lists never exceed their caps."""
+        events = []
+        for i in range(50):
+            events.append(make_event("user", text(f"request {i}")))
+            events.append(make_event(
+                "assistant",
+                text(f"We decided on option {i}."),
+                tool_use(f"t{i}", "Write", file_path=f"f{i}.py"),
+            ))
+        path = write_transcript(events)
+
+        digest = transcript.extract(
+            path,
+            digest=transcript.Digest(max_files=5, max_decisions=3, max_requests=2),
+        )
+        assert list(digest.files) == [f"f{i}.py" for i in range(45, 50)]
+        assert len(digest.decisions) == 3
+        assert list(digest.requests) == ["request 48", "request 49"]
+
+    def test_long_text_is_clipped(self, write_transcript, make_event):
+        """Verify long user requests are truncated."""
+        path = write_transcript([make_event("user", text("x" * 5000))])
+        digest = transcript.extract(path)
+        assert len(digest.requests[0]) <= transcript.MAX_TEXT
+
+    def test_markdown_rendering(self, session):
+        """Verify the markdown digest lists the extracted sections."""
+        markdown = transcript.extract(session).to_markdown("ship refresh tokens")
+        assert markdown.startswith("# Transcript Digest")
+        assert "**Goal**: ship refresh tokens" in markdown
+        for heading in ("## Touched Files", "## Decisions", "## Errors"):
+            assert heading in markdown, f"Missing {heading}"
+        assert "`src/auth/jwt.ts` (edit 1, read 1)" in markdown
+
+
+class TestCommandLine:
+    """Test the extractor command-line interface."""
+
+    def test_json_output(self, session, capsys):
+        """Verify --format json prints the digest."""
+        assert transcript.main([str(session), "--format", "json"]) == 0
+        data = json.loads(capsys.readouterr().out)
+        assert data["tool_calls"]["Read"] == 1
+
+    def test_missing_transcript(self, tmp_path, capsys):
+        """Verify a missing transcript is reported as an error."""
+        assert transcript.main([str(tmp_path / "nope.jsonl")]) == 1
+        assert "no session transcript" in capsys.readouterr().err
+
+    def test_finds_latest_transcript_for_cwd(self, tmp_path, monkeypatch):
+        """Verify the transcript directory is derived from the project path."""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        project = tmp_path / "my.project"
+        project.mkdir()
+        directory = transcript.default_transcript_dir(project)
+        assert directory.name.endswith("-my-project"), "Non-alphanumerics become -"
+        assert "/" not in directory.name and "_" not in directory.name
+
+        directory.mkdir(parents=True)
+        (directory / "a.jsonl").write_text("")
+        assert transcript.find_latest_transcript(project) == directory / "a.jsonl"
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Shard assignment and merged timing reports for the handoff test suites.
+
+Each suite (and each CI shard) writes a JUnit XML report. This tool merges
+them into one report, prints a summary per suite and the slowest tests, and
+records per-test durations in a timings file. Shards are then balanced on
+those durations: tests are dealt longest first to the shard with the least
+total time, so shard wall times stay close. Tests without a recorded time
+count as the median recorded time (or DEFAULT_DURATION before any exist).
+
+Select a shard with HANDOFF_TEST_SHARD=<index>/<count> (1-based), read by
+conftest.py.
+
+Usage:
+    python3 tests/timings.py REPORT.xml ... [--output merged.xml]
+                             [--timings timings.json] [--slowest 15]
+                             [--format markdown|text]
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import statistics
+import sys
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_DURATION = 1.0
+OUTCOMES = ("passed", "failed", "error", "skipped")
+
+
+@dataclass
+class Case:
+    suite: str
+    nodeid: str
+    time: float
+    outcome: str
+
+
+def parse_shard(value: str | None) -> tuple[int, int] | None:
+    """Parse "index/count" (1-based); None or "" means no sharding."""
+    if not value:
+        return None
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like 2/4, not {value!r}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, not {index}")
+    return index, count
+
+
+def assign_shards(
+    nodeids: list[str], count: int, timings: dict[str, float] | None = None
+) -> list[list[str]]:
+    """Split nodeids into count shards balanced on their recorded durations."""
+    timings = timings or {}
+    # New tests are assumed to take a typical time for this suite
+    default = statistics.median(timings.values()) if timings else DEFAULT_DURATION
+    shards: list[list[str]] = [[] for _ in range(count)]
+    heap = [(0.0, number) for number in range(count)]
+    ordered = sorted(nodeids, key=lambda n: (-timings.get(n, default), n))
+    for nodeid in ordered:
+        total, number = heapq.heappop(heap)
+        shards[number].append(nodeid)
+        heapq.heappush(heap, (total + timings.get(nodeid, default), number))
+    return shards
+
+
+def load_timings(path: Path | None) -> dict[str, float]:
+    if path is None:
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _nodeid(classname: str, name: str, file: str | None) -> str:
+    """Rebuild a pytest node id from a JUnit testcase."""
+    if not classname or classname.endswith(".bats"):
+        return f"{classname}::{name}" if classname else name
+    parts = classname.split(".")
+    if file:
+        module = Path(file).with_suffix("").as_posix().split("/")
+        classes = parts[len(module):]
+        return "::".join([file, *classes, name])
+    for position, part in enumerate(parts):
+        if part.startswith("test_") or part.endswith("_test"):
+            path = "/".join(parts[: position + 1]) + ".py"
+            return "::".join([path, *parts[position + 1:], name])
+    return f"{classname}::{name}"
+
+
+def load_reports(paths: list[Path]) -> list[Case]:
+    """Read testcases from JUnit XML files (pytest or BATS)."""
+    cases = []
+    for path in paths:
+        root = ET.parse(path).getroot()
+        suites = [root] if root.tag == "testsuite" else root.iter("testsuite")
+        for suite in suites:
+            suite_name = suite.get("name") or path.stem
+            if suite_name == "pytest":
+                suite_name = path.stem
+            for case in suite.iter("testcase"):
+                outcome = "passed"
+                for tag in ("failure", "error", "skipped"):
+                    if case.find(tag) is not None:
+                        outcome = "failed" if tag == "failure" else tag
+                        break
+                cases.append(Case(
+                    suite=suite_name,
+                    nodeid=_nodeid(case.get("classname", ""), case.get("name", ""),
+                                   case.get("file")),
+                    time=float(case.get("time") or 0),
+                    outcome=outcome,
+                ))
+    return cases
+
+
+def summarise(cases: list[Case]) -> dict[str, dict]:
+    """Count outcomes and total time per suite."""
+    summary: dict[str, dict] = defaultdict(
+        lambda: {**dict.fromkeys(OUTCOMES, 0), "time": 0.0}
+    )
+    for case in cases:
+        summary[case.suite][case.outcome] += 1
+        summary[case.suite]["time"] += case.time
+    return dict(summary)
+
+
+def write_junit(cases: list[Case], path: Path) -> None:
+    """Write one merged JUnit report with a testsuite per suite."""
+    root = ET.Element("testsuites")
+    by_suite = defaultdict(list)
+    for case in cases:
+        by_suite[case.suite].append(case)
+    for name, members in by_suite.items():
+        counts = summarise(members)[name]
+        suite = ET.SubElement(root, "testsuite", {
+            "name": name,
+            "tests": str(len(members)),
+            "failures": str(counts["failed"]),
+            "errors": str(counts["error"]),
+            "skipped": str(counts["skipped"]),
+            "time": f"{counts['time']:.3f}",
+        })
+        for case in members:
+            element = ET.SubElement(suite, "testcase",
+                                    {"name": case.nodeid, "time": f"{case.time:.3f}"})
+            if case.outcome != "passed":
+                ET.SubElement(element, "failure" if case.outcome == "failed" else case.outcome)
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def write_timings(cases: list[Case], path: Path) -> None:
+    """Merge these durations into the timings file used for sharding."""
+    timings = load_timings(path)
+    for case in cases:
+        if case.outcome != "skipped":
+            timings[case.nodeid] = round(case.time, 3)
+    path.write_text(json.dumps(dict(sorted(timings.items())), indent=1) + "\n")
+
+
+def render(cases: list[Case], slowest: int = 15, markdown: bool = False) -> str:
+    """Render the per-suite summary and the slowest tests."""
+    summary = summarise(cases)
+    rows = [["Suite", "Passed", "Failed", "Errors", "Skipped", "Time (s)"]]
+    for name, counts in sorted(summary.items()):
+        rows.append([name, *(str(counts[o]) for o in OUTCOMES), f"{counts['time']:.2f}"])
+    total = {o: sum(c[o] for c in summary.values()) for o in OUTCOMES}
+    rows.append(["total", *(str(total[o]) for o in OUTCOMES),
+                 f"{sum(c['time'] for c in summary.values()):.2f}"])
+
+    ranked = sorted(cases, key=lambda c: -c.time)[:slowest]
+    slow_rows = [["Time (s)", "Outcome", "Test"]]
+    slow_rows += [[f"{c.time:.3f}", c.outcome, c.nodeid] for c in ranked]
+    return (
+        _table(rows, markdown)
+        + f"\nSlowest {len(ranked)} tests\n\n"
+        + _table(slow_rows, markdown)
+    )
+
+
+def _table(rows: list[list[str]], markdown: bool) -> str:
+    if markdown:
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + "---|" * len(rows[0])]
+        lines += ["| " + " | ".join(row) + " |" for row in rows[1:]]
+        return "\n".join(lines) + "\n"
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    ) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("reports", nargs="+", type=Path, help="JUnit XML reports")
+    parser.add_argument("--output", type=Path, help="write the merged JUnit report here")
+    parser.add_argument("--timings", type=Path, help="update this timings file")
+    parser.add_argument("--slowest", type=int, default=15)
+    parser.add_argument("--format", choices=("text", "markdown"), default="text")
+    args = parser.parse_args(argv)
+
+    reports = [path for path in args.reports if path.is_file()]
+    if not reports:
+        print("Error: no JUnit reports found", file=sys.stderr)
+        return 1
+    cases = load_reports(reports)
+    if args.output:
+        write_junit(cases, args.output)
+    if args.timings:
+        write_timings(cases, args.timings)
+    sys.stdout.write(render(cases, args.slowest, args.format == "markdown"))
+    return 1 if any(c.outcome in ("failed", "error") for c in cases) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Local answer cache for the how-to skill.
+
+`ask` answers a question from recent answers when it can and from
+Perplexity (through scripts/pxworker.py) when it cannot. Questions are
+normalised before lookup (case, punctuation, spacing, filler words such as
+"the" or "please"), so near-identical wordings share one entry. Every
+answer fetched is also appended to the query log (scripts/query_log.py);
+the first `ask` starts migrating the old one-file-per-question directory
+into it in the background (or run `query_log.py migrate` beforehand).
+
+Entries expire after a TTL (HOWTO_CACHE_TTL seconds, default one day).
+The cache is bounded by entry count and total answer size; the least
+recently used entries are evicted first. `--fresh` bypasses the cache for
+time-sensitive questions, and still refreshes the entry with the new
+answer. A cache that does not exist yet is seeded from the query log
+entries within the TTL.
+
+Hits, misses, bypasses, expiries and evictions are counted, with the
+average time a fetch took, so `stats` can report the time saved.
+
+Usage:
+    python3 scripts/answer_cache.py [--ttl SECONDS] [--log-dir DIR] ask "QUESTION" [--fresh]
+    python3 scripts/answer_cache.py stats [--format text|json]
+    python3 scripts/answer_cache.py clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pxworker
+import query_log
+from query_log import QueryLog
+
+CACHE_VERSION = 1
+CACHE_NAME = "answers.json"
+DEFAULT_DIR = pxworker.DEFAULT_DIR
+DEFAULT_TTL = 24 * 60 * 60
+MAX_ENTRIES = 500
+MAX_BYTES = 2 * 1024 * 1024
+
+FILLER_WORDS = {"a", "an", "the", "please", "pp"}
+WORD_PATTERN = re.compile(r"[\w+#]+(?:[.\-'][\w+#]+)*")
+STAT_KEYS = ("hits", "misses", "bypassed", "expired", "evicted")
+
+Answerer = Callable[[str], tuple[int, str, str]]
+
+
+def normalise(question: str) -> str:
+    """The cache key for a question: lowercase words without punctuation or filler."""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return " ".join(w for w in WORD_PATTERN.findall(text) if w not in FILLER_WORDS)
+
+
+class AnswerCache:
+    """Normalised question -> recent answer, with TTL and LRU size bounds."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_DIR,
+        log: QueryLog | None = None,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = directory / CACHE_NAME
+        self.log = log or QueryLog()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+    @contextmanager
+    def locked(self) -> Iterator[dict]:
+        """Hold the cache lock and yield its data, saving it on the way out."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                data = json.loads(self.path.read_text())
+                if data.get("version") != CACHE_VERSION:
+                    raise ValueError("old cache")
+            except (OSError, ValueError):
+                data = {"version": CACHE_VERSION, "entries": {},
+                        "stats": dict.fromkeys(STAT_KEYS, 0),
+                        "fetched": 0, "fetch_seconds": 0.0}
+                self._seed(data)
+            try:
+                yield data
+            finally:
+                partial = self.path.with_name(f".{CACHE_NAME}.{os.getpid()}")
+                partial.write_text(json.dumps(data))
+                os.replace(partial, self.path)
+
+    def _seed(self, data: dict) -> None:
+        """Fill a new cache from the query log records within the TTL."""
+        for record in self.log.records(since=self.clock() - self.ttl):
+            self._put(data, record["question"], record["answer"], record["ts"])
+
+    def _put(self, data: dict, question: str, answer: str, stored: float) -> None:
+        data["entries"][normalise(question)] = {
+            "question": question, "answer": answer, "stored": stored,
+            "used": stored, "hits": 0,
+        }
+        self._evict(data)
+
+    def _evict(self, data: dict) -> None:
+        entries = data["entries"]
+        now = self.clock()
+        for key in [k for k, e in entries.items() if now - e["stored"] >= self.ttl]:
+            del entries[key]
+            data["stats"]["expired"] += 1
+        size = sum(len(e["answer"]) for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["used"]):
+            if len(entries) <= self.max_entries and size <= self.max_bytes:
+                break
+            size -= len(entries.pop(key)["answer"])
+            data["stats"]["evicted"] += 1
+
+    def get(self, question: str) -> str | None:
+        """A cached answer younger than the TTL, counting the hit or miss."""
+        with self.locked() as data:
+            entry = data["entries"].get(normalise(question))
+            if entry and self.clock() - entry["stored"] < self.ttl:
+                entry["used"] = self.clock()
+                entry["hits"] += 1
+                data["stats"]["hits"] += 1
+                return entry["answer"]
+            data["stats"]["misses"] += 1
+            return None
+
+    def put(self, question: str, answer: str, took: float = 0.0) -> None:
+        with self.locked() as data:
+            self._put(data, question, answer, self.clock())
+            data["fetched"] += 1
+            data["fetch_seconds"] += took
+
+    def ask(
+        self, question: str, answerer: Answerer, fresh: bool = False,
+    ) -> tuple[int, str, str]:
+        """Answer from the cache, or ask and remember; fresh skips the lookup."""
+        if fresh:
+            with self.locked() as data:
+                data["stats"]["bypassed"] += 1
+        else:
+            answer = self.get(question)
+            if answer is not None:
+                return 0, answer + "\n", ""
+
+        started = time.monotonic()
+        code, out, err = answerer(question)
+        took = time.monotonic() - started
+        answer = out.strip()
+        if code == 0 and answer:
+            self.log.append(question, answer, self.clock())
+            self.put(question, answer, took)
+        return code, out, err
+
+    def stats(self) -> dict:
+        with self.locked() as data:
+            self._evict(data)
+            stats = dict(data["stats"])
+            lookups = stats["hits"] + stats["misses"]
+            average = data["fetch_seconds"] / data["fetched"] if data["fetched"] else 0.0
+            stats.update(
+                entries=len(data["entries"]),
+                bytes=sum(len(e["answer"]) for e in data["entries"].values()),
+                hit_rate=round(stats["hits"] / lookups, 3) if lookups else 0.0,
+                average_fetch_seconds=round(average, 2),
+                saved_seconds=round(stats["hits"] * average, 1),
+            )
+            return stats
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", type=Path,
+                        default=Path(os.environ.get("HOWTO_CACHE_DIR", DEFAULT_DIR)))
+    parser.add_argument("--log-dir", type=Path,
+                        default=Path(os.environ.get("HOWTO_LOG_DIR", query_log.DEFAULT_DIR)))
+    parser.add_argument("--ttl", type=float,
+                        default=float(os.environ.get("HOWTO_CACHE_TTL", DEFAULT_TTL)),
+                        help="seconds an answer stays fresh")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ask = commands.add_parser("ask", help="answer a question, from the cache if possible")
+    ask.add_argument("question")
+    ask.add_argument("--fresh", action="store_true",
+                     help="skip the cache (time-sensitive questions)")
+    stats = commands.add_parser("stats", help="hit/miss counts and time saved")
+    stats.add_argument("--format", choices=("text", "json"), default="text")
+    commands.add_parser("clear", help="empty the cache (the query log is kept)")
+    args = parser.parse_args(argv)
+
+    log = query_log.from_env(args.log_dir)
+    cache = AnswerCache(args.dir, log, args.ttl)
+    if args.command == "ask":
+        if log.needs_migration():
+            # Tens of thousands of old files must not hold up the question
+            subprocess.Popen(
+                [sys.executable, str(Path(query_log.__file__).resolve()),
+                 "--dir", str(log.directory), "migrate"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+        worker_dir = Path(os.environ.get("HOWTO_WORKER_DIR", pxworker.DEFAULT_DIR))
+        code, out, err = cache.ask(
+            args.question, lambda q: pxworker.query(q, worker_dir), args.fresh,
+        )
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+        return code
+    if args.command == "clear":
+        cache.clear()
+        return 0
+    result = cache.stats()
+    print(json.dumps(result, indent=2) if args.format == "json"
+          else "\n".join(f"{key}: {value}" for key, value in result.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Warm pxcli worker for the how-to skill.
+
+Running `uvx --python 3.12 pxcli@latest query ...` for every question
+resolves `@latest`, may rebuild the environment and starts a fresh
+interpreter before any network call. Instead, a long-lived worker keeps a
+pinned pxcli installed in its own environment with its code already
+imported, and answers requests on a Unix socket:
+
+- `start` pins a version (the newest on PyPI, or --version), builds its
+  environment once with uv, and launches the worker under that
+  environment's Python. The worker imports pxcli's console entry point
+  and forks a child per request, so each question starts from a warm
+  interpreter and costs only the remote answer time.
+- Every REFRESH_INTERVAL the worker checks PyPI in a background thread.
+  A newer release is installed into a new environment while the current
+  one keeps serving; the worker then switches over between requests.
+- `query` asks the worker. If no worker is listening it starts one in the
+  background and answers this question with the uvx command instead, so
+  a question is never slower than before.
+
+State lives in HOWTO_WORKER_DIR (default ~/.cache/how-to): the socket,
+`pxworker.json` (pinned version, environment and worker PID) and one
+`envs/VERSION` directory per installed version.
+
+Usage:
+    python3 scripts/pxworker.py query "QUESTION" [--no-start]
+    python3 scripts/pxworker.py start [--version VERSION]
+    python3 scripts/pxworker.py status
+    python3 scripts/pxworker.py refresh
+    python3 scripts/pxworker.py stop
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.request
+from functools import partial
+from importlib import metadata
+from pathlib import Path
+from typing import Callable
+
+PACKAGE = "pxcli"
+PYTHON_VERSION = "3.12"
+PYPI_URL = f"https://pypi.org/pypi/{PACKAGE}/json"
+DEFAULT_DIR = Path.home() / ".cache" / "how-to"
+SOCKET_NAME = "pxworker.sock"
+STATE_NAME = "pxworker.json"
+LOCK_NAME = "pxworker.lock"
+REFRESH_INTERVAL = 24 * 60 * 60
+REQUEST_TIMEOUT = 300
+START_TIMEOUT = 10
+
+# What the skill ran before the worker; still the fallback
+FALLBACK_COMMAND = ["uvx", "--python", PYTHON_VERSION, f"{PACKAGE}@latest"]
+
+Result = tuple[int, str, str]
+
+
+class WorkerError(Exception):
+    """The worker could not be started, reached or refreshed."""
+
+
+def query_args(question: str) -> list[str]:
+    return ["query", "-f", "plain", question, "--strip-references"]
+
+
+# Pinned environments
+
+
+def load_state(directory: Path) -> dict:
+    try:
+        return json.loads((directory / STATE_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(directory: Path, state: dict) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    partial_path = directory / f".{STATE_NAME}.{os.getpid()}"
+    partial_path.write_text(json.dumps(state, indent=1) + "\n")
+    os.replace(partial_path, directory / STATE_NAME)
+
+
+def latest_version(timeout: float = 10) -> str:
+    """The newest pxcli release on PyPI."""
+    try:
+        with urllib.request.urlopen(PYPI_URL, timeout=timeout) as response:
+            return json.load(response)["info"]["version"]
+    except (OSError, ValueError, KeyError) as e:
+        raise WorkerError(f"Cannot read the latest {PACKAGE} version: {e}") from None
+
+
+def build_env(directory: Path, version: str) -> Path:
+    """Install pxcli==version into envs/VERSION with uv; return its Python."""
+    env = directory / "envs" / version
+    python = env / "bin" / "python"
+    if python.exists() and (env / "bin" / PACKAGE).exists():
+        return python
+    uv = shutil.which("uv")
+    if uv is None:
+        raise WorkerError("uv is not installed")
+    # Build beside the final path so a half-built environment is never used
+    staging = env.with_name(f".{version}.{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    for command in (
+        [uv, "venv", "-q", "--python", PYTHON_VERSION, str(staging)],
+        [uv, "pip", "install", "-q", "--python", str(staging / "bin" / "python"),
+         f"{PACKAGE}=={version}"],
+    ):
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise WorkerError(f"{' '.join(command[:3])} failed: {result.stderr.strip()}")
+    shutil.rmtree(env, ignore_errors=True)
+    os.replace(staging, env)
+    return python
+
+
+def refresh_pin(
+    directory: Path,
+    latest: Callable[[], str] = latest_version,
+    build: Callable[[Path, str], Path] = build_env,
+) -> dict | None:
+    """Install a newer release if there is one; return the new pin, or None."""
+    state = load_state(directory)
+    version = latest()
+    state["checked"] = time.time()
+    if version == state.get("version") and Path(state.get("python", "")).exists():
+        save_state(directory, state)
+        return None
+    state.update(version=version, python=str(build(directory, version)))
+    save_state(directory, state)
+    return state
+
+
+# Worker
+
+
+def _lock(directory: Path, name: str = LOCK_NAME):
+    """An exclusive flock on a file in directory; closing it releases the lock."""
+    directory.mkdir(parents=True, exist_ok=True)
+    handle = open(directory / name, "a")
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def _listening(path: Path) -> bool:
+    """Whether something accepts connections on the socket at path."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+    return True
+
+
+def load_entry_point() -> Callable[[], object] | None:
+    """pxcli's console script function, imported now so requests start warm."""
+    for script in metadata.entry_points(group="console_scripts", name=PACKAGE):
+        try:
+            return script.load()
+        except Exception:
+            return None
+    return None
+
+
+def run_entry(entry: Callable[[], object], args: list[str]) -> Result:
+    """
+    Run a console entry point with args, capturing its output.
+
+    Redirects this process's stdout and stderr, so it is only called in a
+    child forked for one request.
+    """
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        # Python-level streams too, in case they were not on fds 1 and 2
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False)
+        sys.argv = [PACKAGE, *args]
+        try:
+            returned = entry()
+            code = returned if isinstance(returned, int) else 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        out.seek(0)
+        err.seek(0)
+        return code, out.read().decode(errors="replace"), err.read().decode(errors="replace")
+
+
+def run_executable(executable: str, args: list[str]) -> Result:
+    result = subprocess.run([executable, *args], capture_output=True, text=True,
+                            timeout=REQUEST_TIMEOUT)
+    return result.returncode, result.stdout, result.stderr
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out."""
+
+    def handle(self) -> None:
+        response = {"code": 0, "stdout": "", "stderr": ""}
+        try:
+            request = json.loads(self.rfile.readline())
+            # A ping only checks that the worker is up
+            args = None if request.get("ping") else [str(arg) for arg in request["args"]]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            response.update(code=2, stderr="Malformed request\n")
+        else:
+            if args is not None:
+                code, out, err = self.server.runner(args)
+                response = {"code": code, "stdout": out, "stderr": err}
+        response["version"] = self.server.version
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class Worker(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Serves requests from forked children of one warm process."""
+
+    def __init__(self, path: Path, runner: Callable[[list[str]], Result], version: str):
+        # Only a stale socket is replaced; a second worker would orphan the first
+        with _lock(path.parent):
+            if _listening(path):
+                raise WorkerError(f"A worker is already listening on {path}")
+            if path.exists() or path.is_symlink():
+                path.unlink()
+            super().__init__(str(path), Handler)
+        os.chmod(path, 0o600)
+        self.runner = runner
+        self.version = version
+        self.replacement: list[str] | None = None
+
+    def service_actions(self) -> None:
+        # Runs between requests in serve_forever: the moment to switch versions
+        super().service_actions()
+        if self.replacement:
+            command, self.replacement = self.replacement, None
+            self.server_close()
+            os.execv(command[0], command)
+
+
+def _refresh_loop(worker: Worker, directory: Path, interval: float) -> None:
+    while True:
+        checked = load_state(directory).get("checked", 0)
+        time.sleep(max(checked + interval - time.time(), 0))
+        try:
+            pin = refresh_pin(directory)
+        except WorkerError as e:
+            print(f"refresh failed: {e}", file=sys.stderr)
+            save_state(directory, {**load_state(directory), "checked": time.time()})
+            continue
+        if pin:
+            _switch(worker, directory)
+
+
+def _switch(worker: Worker, directory: Path) -> None:
+    """Re-run the worker under the pinned environment once it is idle."""
+    state = load_state(directory)
+    if state.get("version") != worker.version and Path(state.get("python", "")).exists():
+        worker.replacement = [state["python"], str(Path(__file__).resolve()),
+                              "--dir", str(directory), "serve"]
+
+
+def serve(directory: Path, interval: float = REFRESH_INTERVAL) -> None:
+    """Run the worker in this process (under the pinned environment's Python)."""
+    state = load_state(directory)
+    entry = load_entry_point()
+    if entry is not None:
+        runner = partial(run_entry, entry)
+    else:
+        # Not importable here: run the pinned executable, which still skips uvx
+        executable = Path(sys.executable).parent / PACKAGE
+        if not executable.exists():
+            raise WorkerError(f"{PACKAGE} is not installed for {sys.executable}")
+        runner = partial(run_executable, str(executable))
+
+    worker = Worker(directory / SOCKET_NAME, runner, state.get("version", "unknown"))
+    save_state(directory, {**state, "pid": os.getpid()})
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # `refresh` from the command line signals the worker to pick up its pin
+    signal.signal(signal.SIGHUP, lambda *_: _switch(worker, directory))
+    threading.Thread(target=_refresh_loop, args=(worker, directory, interval),
+                     daemon=True).start()
+    try:
+        worker.serve_forever()
+    finally:
+        worker.server_close()
+        (directory / SOCKET_NAME).unlink(missing_ok=True)
+
+
+# Client
+
+
+def request(path: Path, args: list[str] | None, timeout: float = REQUEST_TIMEOUT) -> dict:
+    """
+    Send one request to the worker at path (args None only checks it is up);
+    raises OSError if none is listening.
+    """
+    message = {"args": args} if args is not None else {"ping": True}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(str(path))
+        client.sendall(json.dumps(message).encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(65536)
+            if not chunk:
+                raise ConnectionError("worker closed the connection")
+            data += chunk
+    return json.loads(data)
+
+
+def start(directory: Path, version: str | None = None, wait: float = START_TIMEOUT) -> dict:
+    """Start a worker unless one is listening; return the state."""
+    path = directory / SOCKET_NAME
+    # Concurrent starts queue here; the later ones find the first one's worker
+    with _lock(directory, f"{LOCK_NAME}.start"):
+        try:
+            request(path, None, timeout=wait)
+            return load_state(directory)
+        except OSError:
+            pass
+        return _launch(directory, version, wait)
+
+
+def _launch(directory: Path, version: str | None, wait: float) -> dict:
+    """Build the pinned environment if needed and run a worker in the background."""
+    state = load_state(directory)
+    if version or not Path(state.get("python", "")).exists():
+        version = version or os.environ.get("HOWTO_PXCLI_VERSION") or latest_version()
+        state.update(version=version, python=str(build_env(directory, version)),
+                     checked=time.time())
+        save_state(directory, state)
+    with open(directory / "pxworker.log", "a") as log:
+        subprocess.Popen(
+            [state["python"], str(Path(__file__).resolve()), "--dir", str(directory), "serve"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if _listening(directory / SOCKET_NAME):
+            return load_state(directory)
+        time.sleep(0.05)
+    raise WorkerError(f"Worker did not start; see {directory / 'pxworker.log'}")
+
+
+def signal_worker(directory: Path, signum: int) -> bool:
+    """Send a signal to the running worker; False if there is none."""
+    pid = load_state(directory).get("pid")
+    if not pid or not (directory / SOCKET_NAME).exists():
+        return False
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def query(
+    question: str,
+    directory: Path,
+    auto_start: bool = True,
+    fallback: list[str] = FALLBACK_COMMAND,
+) -> Result:
+    """Answer through the worker, or through the fallback command if none is up."""
+    args = query_args(question)
+    try:
+        response = request(directory / SOCKET_NAME, args)
+        return response["code"], response["stdout"], response["stderr"]
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    except OSError as e:
+        # The worker took the question: asking again through uvx would
+        # repeat it and wait just as long
+        return 1, "", f"Error: worker failed to answer: {e}\n"
+    if auto_start:
+        # Warm up for the next question without making this one wait
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--dir", str(directory), "start"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True,
+        )
+    try:
+        result = subprocess.run([*fallback, *args], capture_output=True, text=True,
+                                timeout=REQUEST_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return 1, "", f"Error: {e}\n"
+    return result.returncode, result.stdout, result.stderr
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", type=Path,
+                        default=Path(os.environ.get("HOWTO_WORKER_DIR", DEFAULT_DIR)))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = commands.add_parser("query", help="answer a question")
+    query_parser.add_argument("question")
+    query_parser.add_argument("--no-start", action="store_true",
+                              help="do not start a worker if none is running")
+    start_parser = commands.add_parser("start", help="start the worker if it is not running")
+    start_parser.add_argument("--version", help=f"pin this {PACKAGE} version")
+    commands.add_parser("status", help="show the pinned version and worker")
+    commands.add_parser("refresh", help="install a newer release now")
+    commands.add_parser("stop", help="stop the worker")
+    commands.add_parser("serve", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "query":
+            code, out, err = query(args.question, args.dir, not args.no_start)
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+            return code
+        if args.command == "serve":
+            serve(args.dir)
+        elif args.command == "start":
+            state = start(args.dir, args.version)
+            print(f"Worker running {PACKAGE} {state.get('version')}")
+        elif args.command == "refresh":
+            pin = refresh_pin(args.dir)
+            if pin:
+                signal_worker(args.dir, signal.SIGHUP)
+            print(f"Switched to {PACKAGE} {pin['version']}" if pin
+                  else f"{PACKAGE} is up to date")
+        elif args.command == "stop":
+            print("Stopped" if signal_worker(args.dir, signal.SIGTERM) else "No worker running")
+        else:
+            state = load_state(args.dir)
+            listening = (args.dir / SOCKET_NAME).exists()
+            print(json.dumps({**state, "listening": listening}, indent=2))
+    except WorkerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Append-only, segmented query log for the how-to skill.
+
+Every question and answer is one JSON line appended to the active segment
+of a log directory (HOWTO_LOG_DIR, default
+~/.config/perplexity-cli/query-log):
+
+    manifest.json                 closed segments: record count, time range
+    segment-000001.jsonl.gz       closed segment, compressed in blocks
+    segment-000001.idx.json       its index: record offsets, blocks, terms
+    segment-000002.jsonl          active segment, appended to
+    segment-000002.idx.jsonl      its index, one line per record
+
+When the active segment would grow past SEGMENT_BYTES (or
+HOWTO_LOG_SEGMENT_BYTES) it is closed: its index is compacted into an
+inverted term index and, with HOWTO_LOG_COMPRESS=1, the segment is
+rewritten as a series of independent gzip members of about BLOCK_BYTES
+each, so one record can still be read without decompressing the whole
+segment.
+
+Lookups never scan the log. Time ranges skip segments using the manifest
+and records using their indexed timestamps. Keywords are intersected in
+each segment's term index, and only matching records are read by offset.
+
+`migrate` is a one-time import of the old one-file-per-question directory
+(~/.config/perplexity-cli/queries/*_query.txt) in time order. The old
+directory is renamed to queries.migrated afterwards, unless --keep is given.
+An interrupted migration resumes where it stopped: records already in the
+log are not imported twice.
+
+Usage:
+    python3 scripts/query_log.py search [KEYWORD ...] [--since DATE] [--until DATE]
+                                        [--limit N] [--format text|json]
+    python3 scripts/query_log.py stats
+    python3 scripts/query_log.py migrate [--from DIR] [--keep]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import fcntl
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+LOG_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_DIR = Path.home() / ".config" / "perplexity-cli" / "query-log"
+LEGACY_DIR = Path.home() / ".config" / "perplexity-cli" / "queries"
+SEGMENT_BYTES = 4 * 1024 * 1024
+BLOCK_BYTES = 64 * 1024
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "of", "on", "or", "the", "to", "what", "with",
+}
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def terms(text: str) -> set[str]:
+    """Lowercase words of two or more characters, without stopwords."""
+    return {
+        word for word in TERM_PATTERN.findall(text.lower())
+        if len(word) > 1 and word not in STOPWORDS
+    }
+
+
+def parse_time(value: str) -> float:
+    """A UTC timestamp from YYYY-MM-DD or YYYY-MM-DDTHH:MM[:SS] (UTC)."""
+    for layout in ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(value, layout).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Expected YYYY-MM-DD[THH:MM[:SS]], not {value!r}")
+
+
+def read_legacy(path: Path) -> tuple[str, float, str] | None:
+    """(question, UTC timestamp, answer) from one old *_query.txt file, or None."""
+    try:
+        question, stamp, marker, answer = path.read_text(encoding="utf-8").split("\n", 3)
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+    if not question.startswith("Question: ") or marker != "Answer:":
+        return None
+    try:
+        when = datetime.strptime(stamp, "Timestamp: %Y-%m-%dT%H:%M:%S GMT")
+    except ValueError:
+        return None
+    return question[10:], when.replace(tzinfo=timezone.utc).timestamp(), answer.rstrip("\n")
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:06d}"
+
+
+def _record(question: str, answer: str, ts: float) -> tuple[dict, bytes]:
+    """A log record and its JSON line."""
+    record = {
+        "ts": ts,
+        "time": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "question": question,
+        "answer": answer,
+    }
+    return record, (json.dumps(record, ensure_ascii=False) + "\n").encode()
+
+
+def _entry(record: dict, offset: int, length: int) -> list:
+    """An active index line: [ts, offset, length, terms]."""
+    return [record["ts"], offset, length,
+            sorted(terms(f"{record['question']} {record['answer']}"))]
+
+
+def from_env(directory: Path) -> QueryLog:
+    """A QueryLog with the segment size and compression set in the environment."""
+    return QueryLog(
+        directory,
+        segment_bytes=int(os.environ.get("HOWTO_LOG_SEGMENT_BYTES", SEGMENT_BYTES)),
+        compress=os.environ.get("HOWTO_LOG_COMPRESS", "") == "1",
+    )
+
+
+class QueryLog:
+    """The log directory: one active segment plus closed, indexed segments."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_DIR,
+        segment_bytes: int = SEGMENT_BYTES,
+        compress: bool = False,
+        block_bytes: int = BLOCK_BYTES,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+        self.block_bytes = block_bytes
+        self._blocks: dict[tuple[str, int], bytes] = {}
+
+    # Manifest
+
+    def _read_manifest(self) -> dict:
+        try:
+            manifest = json.loads((self.directory / MANIFEST_NAME).read_text())
+            if manifest.get("version") == LOG_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": LOG_VERSION, "active": 1, "segments": []}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        partial = self.directory / f".{MANIFEST_NAME}.{os.getpid()}"
+        partial.write_text(json.dumps(manifest, indent=1) + "\n")
+        os.replace(partial, self.directory / MANIFEST_NAME)
+
+    @contextmanager
+    def locked(self) -> Iterator[dict]:
+        """Hold the writer lock and yield the manifest, saving it on the way out."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            manifest = self._read_manifest()
+            try:
+                yield manifest
+            finally:
+                self._write_manifest(manifest)
+
+    # Active segment
+
+    def _paths(self, name: str) -> tuple[Path, Path]:
+        return self.directory / f"{name}.jsonl", self.directory / f"{name}.idx.jsonl"
+
+    def _active_index(self, name: str) -> list[list]:
+        """Index lines of the active segment: [ts, offset, length, terms]."""
+        _, index_path = self._paths(name)
+        try:
+            lines = index_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break  # a torn last line; _recover rewrites it
+        return entries
+
+    def _recover(self, name: str) -> list[list]:
+        """Make the active segment and its index agree after an interrupted append."""
+        segment, index_path = self._paths(name)
+        if not segment.exists():
+            index_path.unlink(missing_ok=True)
+            return []
+        entries = self._active_index(name)
+        end = entries[-1][1] + entries[-1][2] if entries else 0
+        size = segment.stat().st_size
+        if size == end:
+            return entries
+        if size < end:
+            entries, end = [], 0
+        # Index the complete lines past the last indexed one, drop a torn one
+        with open(segment, "rb+") as f:
+            f.seek(end)
+            for line in f.read().splitlines(keepends=True):
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break
+                entries.append(_entry(record, end, len(line)))
+                end += len(line)
+            f.truncate(end)
+        index_path.write_text("".join(json.dumps(e) + "\n" for e in entries), encoding="utf-8")
+        return entries
+
+    def append(self, question: str, answer: str, ts: float | None = None) -> dict:
+        """Add one question and answer; returns the record."""
+        record, line = _record(question, answer, time.time() if ts is None else ts)
+        with self.locked() as manifest:
+            self._append(manifest, self._recover(_segment_name(manifest["active"])),
+                         record, line)
+        return record
+
+    def _append(self, manifest: dict, entries: list[list], record: dict,
+                line: bytes) -> list[list]:
+        """Append to the active segment, whose recovered index is entries; return its index."""
+        name = _segment_name(manifest["active"])
+        offset = entries[-1][1] + entries[-1][2] if entries else 0
+        if entries and offset + len(line) > self.segment_bytes:
+            self._close(manifest, name, entries)
+            name, offset, entries = _segment_name(manifest["active"]), 0, []
+        segment, index_path = self._paths(name)
+        with open(segment, "ab") as f:
+            f.write(line)
+        entry = _entry(record, offset, len(line))
+        # The index line goes last: an indexed record is always complete
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        entries.append(entry)
+        return entries
+
+    def _close(self, manifest: dict, name: str, entries: list[list]) -> None:
+        """Turn the active segment into a closed, term-indexed (and compressed) one."""
+        segment, index_path = self._paths(name)
+        data = segment.read_bytes()
+        postings: dict[str, list[int]] = {}
+        for number, entry in enumerate(entries):
+            for term in entry[3]:
+                postings.setdefault(term, []).append(number)
+
+        blocks = None
+        if self.compress:
+            blocks = []
+            with open(self.directory / f"{name}.jsonl.gz", "wb") as out:
+                start = 0
+                for number, (_, offset, length, _) in enumerate(entries):
+                    end = offset + length
+                    if end - start >= self.block_bytes or number == len(entries) - 1:
+                        # mtime=0 keeps identical content byte-identical
+                        member = gzip.compress(data[start:end], mtime=0)
+                        blocks.append([start, out.tell(), len(member)])
+                        out.write(member)
+                        start = end
+        (self.directory / f"{name}.idx.json").write_text(json.dumps({
+            "records": [entry[:3] for entry in entries],
+            "blocks": blocks,
+            "terms": dict(sorted(postings.items())),
+        }))
+        stamps = [entry[0] for entry in entries]
+        manifest["segments"].append({
+            "name": name,
+            "count": len(entries),
+            "min_ts": min(stamps),
+            "max_ts": max(stamps),
+            "bytes": len(data),
+            "compressed": blocks is not None,
+        })
+        manifest["active"] += 1
+        # Saved now, so a closed segment is never lost if the writer dies
+        self._write_manifest(manifest)
+        if blocks is not None:
+            segment.unlink()
+        index_path.unlink()
+
+    # Lookups
+
+    def _read(self, name: str, compressed: bool, blocks: list | None, entry: list) -> dict:
+        _, offset, length = entry[:3]
+        if not compressed:
+            with open(self.directory / f"{name}.jsonl", "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        position = bisect.bisect_right([block[0] for block in blocks], offset) - 1
+        start, coffset, clength = blocks[position]
+        key = (name, position)
+        if key not in self._blocks:
+            with open(self.directory / f"{name}.jsonl.gz", "rb") as f:
+                f.seek(coffset)
+                # Keep only the last block: lookups read records in order
+                self._blocks = {key: gzip.decompress(f.read(clength))}
+        return json.loads(self._blocks[key][offset - start:offset - start + length])
+
+    def _segments(self) -> Iterator[tuple[dict, list[list] | None]]:
+        """(summary, active index entries or None) for every segment, oldest first."""
+        manifest = self._read_manifest()
+        for summary in manifest["segments"]:
+            yield summary, None
+        entries = self._active_index(_segment_name(manifest["active"]))
+        if entries:
+            stamps = [entry[0] for entry in entries]
+            yield ({"name": _segment_name(manifest["active"]), "count": len(entries),
+                    "min_ts": min(stamps), "max_ts": max(stamps), "compressed": False,
+                    "active": True}, entries)
+
+    def records(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        keywords: str = "",
+        limit: int | None = None,
+        newest_first: bool = False,
+    ) -> list[dict]:
+        """Records in [since, until) containing every keyword, in time-of-append order."""
+        wanted = terms(keywords)
+        segments = list(self._segments())
+        if newest_first:
+            segments.reverse()
+        found: list[dict] = []
+        for summary, entries in segments:
+            if since is not None and summary["max_ts"] < since:
+                continue
+            if until is not None and summary["min_ts"] >= until:
+                continue
+            name, blocks, compressed = summary["name"], None, summary["compressed"]
+            if entries is None:
+                index = json.loads((self.directory / f"{name}.idx.json").read_text())
+                entries, blocks = index["records"], index["blocks"]
+                numbers = range(len(entries))
+                for term in wanted:
+                    postings = set(index["terms"].get(term, ()))
+                    numbers = [n for n in numbers if n in postings]
+            else:
+                numbers = [n for n, entry in enumerate(entries) if wanted <= set(entry[3])]
+            numbers = [
+                n for n in numbers
+                if (since is None or entries[n][0] >= since)
+                and (until is None or entries[n][0] < until)
+            ]
+            if newest_first:
+                numbers = list(reversed(numbers))
+            for number in numbers:
+                found.append(self._read(name, compressed, blocks, entries[number]))
+                if limit is not None and len(found) >= limit:
+                    return found
+        return found
+
+    def stats(self) -> dict:
+        segments = [summary for summary, _ in self._segments()]
+        return {
+            "segments": len(segments),
+            "records": sum(s["count"] for s in segments),
+            "compressed": sum(s["compressed"] for s in segments),
+            "bytes_on_disk": sum(
+                p.stat().st_size for p in self.directory.glob("segment-*") if p.is_file()
+            ) if self.directory.is_dir() else 0,
+            "migrated": self._read_manifest().get("migrated"),
+        }
+
+    # Migration
+
+    def needs_migration(self, legacy: Path = LEGACY_DIR) -> bool:
+        """Whether an old directory exists that has not been imported yet."""
+        return legacy.is_dir() and not self._read_manifest().get("migrated")
+
+    def migrate(self, legacy: Path = LEGACY_DIR, keep: bool = False) -> int:
+        """Import the old one-file-per-question directory once; return records added."""
+        if not legacy.is_dir():
+            return 0
+        with self.locked() as manifest:
+            if manifest.get("migrated"):
+                return 0
+            imported = []
+            for path in legacy.glob("*_query.txt"):
+                entry = read_legacy(path)
+                if entry:
+                    imported.append(entry)
+            imported.sort(key=lambda item: (item[1], item[0]))
+            # One recovery, then a running index: re-reading it per record is quadratic
+            entries = self._recover(_segment_name(manifest["active"]))
+            done = set()
+            if manifest.get("migrating") and imported:
+                # Resuming an interrupted run: skip what it already wrote
+                done = {(r["ts"], r["question"])
+                        for r in self.records(imported[0][1], imported[-1][1] + 1)}
+            manifest["migrating"] = {"from": str(legacy)}
+            self._write_manifest(manifest)
+            added = 0
+            for question, ts, answer in imported:
+                if (ts, question) not in done:
+                    entries = self._append(manifest, entries, *_record(question, answer, ts))
+                    added += 1
+            del manifest["migrating"]
+            manifest["migrated"] = {"from": str(legacy), "records": len(imported),
+                                    "at": time.time()}
+        if not keep:
+            legacy.rename(legacy.with_name(f"{legacy.name}.migrated"))
+        return added
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", type=Path,
+                        default=Path(os.environ.get("HOWTO_LOG_DIR", DEFAULT_DIR)))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="find questions by time and keywords")
+    search.add_argument("keywords", nargs="*")
+    search.add_argument("--since", help="YYYY-MM-DD[THH:MM[:SS]] (UTC)")
+    search.add_argument("--until", help="YYYY-MM-DD[THH:MM[:SS]] (UTC), exclusive")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--format", choices=("text", "json"), default="text")
+    commands.add_parser("stats", help="segment and record counts")
+    migrate = commands.add_parser("migrate", help="import the old per-question files")
+    migrate.add_argument("--from", dest="legacy", type=Path, default=LEGACY_DIR)
+    migrate.add_argument("--keep", action="store_true",
+                         help="leave the old directory where it is")
+    args = parser.parse_args(argv)
+
+    log = from_env(args.dir)
+    try:
+        if args.command == "migrate":
+            count = log.migrate(args.legacy, args.keep)
+            print(f"Migrated {count} question(s) from {args.legacy}")
+        elif args.command == "stats":
+            print(json.dumps(log.stats(), indent=2))
+        else:
+            since = parse_time(args.since) if args.since else None
+            until = parse_time(args.until) if args.until else None
+            found = log.records(since, until, " ".join(args.keywords), args.limit,
+                                newest_first=True)
+            if args.format == "json":
+                print(json.dumps(found, indent=2, ensure_ascii=False))
+            else:
+                for record in found:
+                    print(f"{record['time']}  {record['question']}")
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Pytest configuration and fixtures for how-to testing.
+"""
+
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SKILL_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(SKILL_ROOT / "scripts"))
+
+import pxworker  # noqa: E402
+
+
+def fake_pxcli():
+    """A stand-in console entry point: echoes its arguments and process."""
+    args = sys.argv[1:]
+    if "--fail" in args:
+        print("no answer", file=sys.stderr)
+        sys.exit(3)
+    print(f"answer to {args[3]!r} from {os.getpid()}")
+
+
+@pytest.fixture
+def worker_dir(tmp_path):
+    """A worker running fake_pxcli in a child process; yields its directory."""
+    directory = tmp_path / "worker"
+    directory.mkdir()
+    pxworker.save_state(directory, {"version": "1.0.0"})
+    pid = os.fork()
+    if pid == 0:
+        try:
+            worker = pxworker.Worker(directory / pxworker.SOCKET_NAME,
+                                     lambda args: pxworker.run_entry(fake_pxcli, args),
+                                     "1.0.0")
+            worker.serve_forever(poll_interval=0.05)
+        finally:
+            os._exit(0)
+    deadline = time.monotonic() + 5
+    # The socket file appears at bind, before the worker listens
+    while not pxworker._listening(directory / pxworker.SOCKET_NAME) \
+            and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield directory
+    os.kill(pid, signal.SIGKILL)
+    os.waitpid(pid, 0)
@@ -0,0 +1,132 @@
+"""
+Unit tests for the how-to answer cache.
+"""
+
+import pytest
+
+from answer_cache import AnswerCache, main, normalise
+from query_log import QueryLog
+
+
+pytestmark = pytest.mark.unit
+
+
+class Clock:
+    """A settable clock for TTL and eviction decisions."""
+
+    def __init__(self):
+        self.now = 1_767_880_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Answerer:
+    """Stands in for pxcli, counting the questions it is asked."""
+
+    def __init__(self):
+        self.asked = []
+
+    def __call__(self, question):
+        self.asked.append(question)
+        return 0, f"Answer {len(self.asked)}\n", ""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(tmp_path / "cache", QueryLog(tmp_path / "log"), ttl=3600, clock=Clock())
+
+
+class TestNormalise:
+    """Test the cache key for near-identical questions."""
+
+    def test_wordings_share_a_key(self):
+        """Verify case, punctuation, spacing and filler words are ignored."""
+        assert normalise("pp What is the latest version of Node.js?") == \
+            normalise("what is latest   version of node.js")
+        assert normalise("How do I use C++ templates?") == "how do i use c++ templates"
+        assert normalise("what is rust") != normalise("what is go")
+
+
+class TestAnswerCache:
+    """Test lookups, expiry, eviction and statistics."""
+
+    def test_hit_after_miss_and_query_log(self, cache, tmp_path):
+        """Verify a second wording is answered from the cache and logged once."""
+        answerer = Answerer()
+        assert cache.ask("What is uv?", answerer) == (0, "Answer 1\n", "")
+        assert cache.ask("what is UV", answerer) == (0, "Answer 1\n", "")
+        assert answerer.asked == ["What is uv?"]
+
+        [record] = cache.log.records()
+        assert (record["question"], record["ts"], record["answer"]) == (
+            "What is uv?", cache.clock(), "Answer 1",
+        )
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_fresh_bypasses_and_ttl_expires(self, cache):
+        """Verify --fresh and expired entries both ask again."""
+        answerer = Answerer()
+        cache.ask("what is uv", answerer)
+        assert cache.ask("what is uv", answerer, fresh=True)[1] == "Answer 2\n"
+        assert cache.ask("what is uv", answerer)[1] == "Answer 2\n"
+        cache.clock.now += 3600
+        assert cache.ask("what is uv", answerer)[1] == "Answer 3\n"
+        stats = cache.stats()
+        assert (stats["bypassed"], stats["misses"], stats["hits"]) == (1, 2, 1)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Verify the entry and size bounds drop the oldest-used answers."""
+        clock = Clock()
+        cache = AnswerCache(tmp_path, QueryLog(tmp_path / "log"), max_entries=2, clock=clock)
+        answerer = Answerer()
+        for question in ("one", "two"):
+            cache.ask(question, answerer)
+            clock.now += 1
+        cache.ask("one", answerer)
+        clock.now += 1
+        cache.ask("three", answerer)
+        assert answerer.asked == ["one", "two", "three"]
+        assert cache.get("two") is None and cache.get("one") == "Answer 1"
+        assert cache.stats()["evicted"] == 1
+
+        small = AnswerCache(tmp_path / "small", cache.log, max_bytes=10, clock=clock)
+        small.ask("a question", answerer)
+        small.ask("another", answerer)
+        assert small.stats()["entries"] == 1
+
+    def test_failures_are_not_cached(self, cache):
+        """Verify an error from pxcli is passed through and asked again next time."""
+        calls = []
+
+        def failing(question):
+            calls.append(question)
+            return 1, "", "boom\n"
+
+        assert cache.ask("why", failing) == (1, "", "boom\n")
+        cache.ask("why", failing)
+        assert len(calls) == 2
+
+    def test_seeds_from_recent_query_log(self, cache, tmp_path):
+        """Verify a new cache picks up answers already in the query log."""
+        cache.log.append("What is uv?", "Answer 1", cache.clock() - 60)
+        cache.log.append("What is go?", "Too old", cache.clock() - 7200)
+        answerer = Answerer()
+        assert cache.ask("what is uv", answerer)[1] == "Answer 1\n"
+        assert cache.ask("what is go", answerer)[1] == "Answer 1\n"
+        assert answerer.asked == ["what is go"]
+
+
+class TestCli:
+    """Test the command line interface."""
+
+    def test_stats_and_clear(self, tmp_path, capsys):
+        """Verify stats output and that clear empties the cache."""
+        args = ["--dir", str(tmp_path), "--log-dir", str(tmp_path / "log")]
+        assert main([*args, "stats"]) == 0
+        assert "hits: 0" in capsys.readouterr().out
+        assert main([*args, "clear"]) == 0
+        assert not (tmp_path / "answers.json").exists()
@@ -0,0 +1,116 @@
+"""
+Unit tests for the warm pxcli worker, with a stand-in for pxcli.
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+import pxworker
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestWorker:
+    """Test requests answered over the worker's Unix socket."""
+
+    def test_answers_from_forked_warm_process(self, worker_dir):
+        """Verify each question runs the entry point in a child of the worker."""
+        path = worker_dir / pxworker.SOCKET_NAME
+        first = pxworker.request(path, pxworker.query_args("what is uv?"))
+        second = pxworker.request(path, pxworker.query_args("what is uv?"))
+        assert first["code"] == 0 and first["version"] == "1.0.0"
+        assert first["stdout"].startswith("answer to 'what is uv?' from ")
+        # A fresh child per request, never the test process
+        pids = {first["stdout"].split()[-1], second["stdout"].split()[-1]}
+        assert len(pids) == 2 and str(os.getpid()) not in pids
+
+    def test_exit_code_and_stderr(self, worker_dir):
+        """Verify a failing query reports its exit code and error output."""
+        response = pxworker.request(worker_dir / pxworker.SOCKET_NAME,
+                                    ["query", "-f", "plain", "q", "--fail"])
+        assert (response["code"], response["stdout"], response["stderr"]) == (
+            3, "", "no answer\n",
+        )
+
+    def test_ping_and_malformed_requests(self, worker_dir):
+        """Verify a ping runs nothing and bad input is rejected."""
+        path = worker_dir / pxworker.SOCKET_NAME
+        assert pxworker.request(path, None) == {
+            "code": 0, "stdout": "", "stderr": "", "version": "1.0.0",
+        }
+        assert pxworker.start(worker_dir)["version"] == "1.0.0"
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(path))
+            client.sendall(b"not json\n")
+            response = json.loads(client.makefile().readline())
+        assert response["code"] == 2
+
+    def test_query_uses_worker_then_falls_back(self, worker_dir, tmp_path):
+        """Verify query goes through the worker, and the fallback when none is up."""
+        code, out, _ = pxworker.query("hello", worker_dir, auto_start=False)
+        assert code == 0 and out.startswith("answer to 'hello'")
+
+        fallback = [sys.executable, "-c", "import sys; print('cold', sys.argv[4])"]
+        code, out, _ = pxworker.query("hello", tmp_path, auto_start=False,
+                                      fallback=fallback)
+        assert (code, out) == (0, "cold hello\n")
+
+    def test_second_worker_refuses_a_live_socket(self, worker_dir):
+        """Verify a worker cannot take over a socket another worker answers on."""
+        path = worker_dir / pxworker.SOCKET_NAME
+        with pytest.raises(pxworker.WorkerError, match="already listening"):
+            pxworker.Worker(path, lambda args: (0, "", ""), "2.0.0")
+        assert pxworker.request(path, None)["version"] == "1.0.0"
+
+    def test_worker_replaces_a_stale_socket(self, tmp_path):
+        """Verify a socket left by a dead worker is replaced."""
+        path = tmp_path / pxworker.SOCKET_NAME
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(path))
+        stale.close()
+        worker = pxworker.Worker(path, lambda args: (0, "", ""), "2.0.0")
+        worker.server_close()
+
+    def test_query_does_not_repeat_a_failed_answer(self, tmp_path):
+        """Verify a worker that drops a question is not retried through uvx."""
+        path = tmp_path / pxworker.SOCKET_NAME
+        marker = tmp_path / "fallback-ran"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(path))
+            server.listen()
+            dropper = threading.Thread(target=lambda: server.accept()[0].close())
+            dropper.start()
+            fallback = [sys.executable, "-c", f"open({str(marker)!r}, 'w')"]
+            code, _, err = pxworker.query("hello", tmp_path, auto_start=False,
+                                          fallback=fallback)
+            dropper.join()
+        assert code == 1 and "worker failed to answer" in err
+        assert not marker.exists()
+
+
+class TestRefresh:
+    """Test the background version refresh."""
+
+    def test_installs_only_newer_releases(self, tmp_path):
+        """Verify a new release is built and pinned, and an unchanged one is not."""
+        built = []
+
+        def build(directory, version):
+            built.append(version)
+            python = directory / "envs" / version / "bin" / "python"
+            python.parent.mkdir(parents=True)
+            python.touch()
+            return python
+
+        pin = pxworker.refresh_pin(tmp_path, latest=lambda: "1.1.0", build=build)
+        assert pin["version"] == "1.1.0" and pin["python"].endswith("1.1.0/bin/python")
+        assert pxworker.refresh_pin(tmp_path, latest=lambda: "1.1.0", build=build) is None
+        assert built == ["1.1.0"]
+        assert pxworker.load_state(tmp_path)["checked"] > 0
@@ -0,0 +1,140 @@
+"""
+Unit tests for the segmented query log.
+"""
+
+import json
+
+import pytest
+
+from query_log import QueryLog, main, parse_time
+
+
+pytestmark = pytest.mark.unit
+
+DAY = 86400
+START = parse_time("2026-01-08")
+
+
+def fill(log, count, step=3600):
+    """Append count Q/As an hour apart, alternating two topics."""
+    for number in range(count):
+        topic = "docker networking" if number % 2 else "rust lifetimes"
+        log.append(f"Question {number} about {topic}?", f"Answer {number}: " + "x" * 200,
+                   START + number * step)
+
+
+class TestSegments:
+    """Test appends, rotation and compression."""
+
+    def test_rotates_and_compresses_segments(self, tmp_path):
+        """Verify closed segments are compressed and still readable record by record."""
+        log = QueryLog(tmp_path, segment_bytes=2000, compress=True, block_bytes=600)
+        fill(log, 30)
+        names = sorted(p.name for p in tmp_path.glob("segment-*"))
+        assert "segment-000001.jsonl.gz" in names and "segment-000001.jsonl" not in names
+        index = json.loads((tmp_path / "segment-000001.idx.json").read_text())
+        assert len(index["blocks"]) > 1
+
+        stats = log.stats()
+        assert stats["records"] == 30 and stats["segments"] > 3
+        assert [r["question"] for r in log.records()] == [
+            f"Question {n} about {'docker networking' if n % 2 else 'rust lifetimes'}?"
+            for n in range(30)
+        ]
+
+    def test_recovers_torn_append(self, tmp_path):
+        """Verify a record written without its index line is indexed, a torn one dropped."""
+        log = QueryLog(tmp_path)
+        fill(log, 2)
+        segment = tmp_path / "segment-000001.jsonl"
+        index = tmp_path / "segment-000001.idx.jsonl"
+        # Lose the last index line, and leave half a record behind
+        index.write_text(index.read_text().splitlines(keepends=True)[0])
+        with open(segment, "ab") as f:
+            f.write(b'{"ts": 1, "quest')
+        log.append("After the crash?", "Fine", START + 5 * DAY)
+        assert [r["question"] for r in log.records()][1:] == [
+            "Question 1 about docker networking?", "After the crash?",
+        ]
+
+
+class TestLookups:
+    """Test time-range and keyword lookups."""
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_time_range_and_keywords(self, tmp_path, compress):
+        """Verify lookups across closed and active segments."""
+        log = QueryLog(tmp_path, segment_bytes=1500, compress=compress)
+        fill(log, 48)
+        day_two = log.records(since=START + DAY, until=START + 2 * DAY)
+        assert [r["question"][:11] for r in day_two[:2]] == ["Question 24", "Question 25"]
+        assert len(day_two) == 24
+
+        docker = log.records(keywords="Docker networking", since=START + DAY)
+        assert len(docker) == 12 and all("docker" in r["question"] for r in docker)
+        latest = log.records(keywords="rust", limit=2, newest_first=True)
+        assert [r["question"][:11] for r in latest] == ["Question 46", "Question 44"]
+        assert log.records(keywords="kubernetes") == []
+
+
+class TestMigration:
+    """Test the one-time import of per-question files."""
+
+    def test_imports_in_time_order_once(self, tmp_path, capsys):
+        """Verify old files are imported oldest first and the directory is retired."""
+        legacy = tmp_path / "queries"
+        legacy.mkdir()
+        for name, stamp, question in [
+            ("2026-01-08_14-01-59_GMT_query.txt", "2026-01-08T14:01:59", "Second"),
+            ("2026-01-07_09-00-00_GMT_query.txt", "2026-01-07T09:00:00", "First"),
+        ]:
+            (legacy / name).write_text(
+                f"Question: {question}\nTimestamp: {stamp} GMT\nAnswer:\nLine one\nLine two\n")
+        (legacy / "notes.txt").write_text("ignored\n")
+
+        args = ["--dir", str(tmp_path / "log")]
+        assert main([*args, "migrate", "--from", str(legacy)]) == 0
+        assert "Migrated 2 question(s)" in capsys.readouterr().out
+        assert not legacy.exists() and (tmp_path / "queries.migrated").is_dir()
+
+        records = QueryLog(tmp_path / "log").records()
+        assert [(r["question"], r["time"]) for r in records] == [
+            ("First", "2026-01-07T09:00:00Z"), ("Second", "2026-01-08T14:01:59Z"),
+        ]
+        assert records[0]["answer"] == "Line one\nLine two"
+
+        legacy.mkdir()
+        assert QueryLog(tmp_path / "log").migrate(legacy) == 0
+
+        assert main([*args, "search", "second", "--since", "2026-01-08"]) == 0
+        assert capsys.readouterr().out == "2026-01-08T14:01:59Z  Second\n"
+
+    def test_resumes_an_interrupted_migration(self, tmp_path, monkeypatch):
+        """Verify a migration cut short keeps its segments and imports nothing twice."""
+        legacy = tmp_path / "queries"
+        legacy.mkdir()
+        for number in range(40):
+            stamp = f"2026-01-{number // 24 + 1:02d}T{number % 24:02d}:00:00"
+            (legacy / f"{number:03d}_query.txt").write_text(
+                f"Question: Question {number}\nTimestamp: {stamp} GMT\nAnswer:\n"
+                + "x" * 200 + "\n")
+        log = QueryLog(tmp_path / "log", segment_bytes=2000)
+        recovered = []
+        monkeypatch.setattr(log, "_recover",
+                            lambda name, real=log._recover: recovered.append(name) or real(name))
+        appended = []
+
+        def interrupt(manifest, entries, record, line, real=log._append):
+            if len(appended) == 25:
+                raise KeyboardInterrupt
+            appended.append(record)
+            return real(manifest, entries, record, line)
+
+        monkeypatch.setattr(log, "_append", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            log.migrate(legacy)
+        assert len(recovered) == 1
+        monkeypatch.undo()
+
+        assert log.migrate(legacy) == 15
+        assert [r["question"] for r in log.records()] == [f"Question {n}" for n in range(40)]
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Batched git sync for the managing-todos skill.
+
+Instead of pulling, committing and pushing after every edit, changes are
+recorded as pending and committed together: one commit and one push per
+debounce window. The first change in a window starts a background
+flusher that waits out the window (TODOS_SYNC_WINDOW seconds, default 30)
+and then commits every pending change, pulls only if the remote moved,
+and pushes. `flush` does the same at once.
+
+Pulls are skipped when the remote is known to be unchanged: the remote
+branch is read with `git ls-remote`, a single small request, and compared
+with the local tracking ref; `git pull` runs only when they differ. A
+check within the last TODOS_SYNC_REMOTE_TTL seconds (default 60) is not
+repeated at all.
+
+Pending changes and the last remote check are kept in the repository's
+`.git/todo-sync.json`, under a lock, so concurrent commands queue into
+the same batch.
+
+`apply` is the bulk-operation API: a JSON list of operations (see
+`TodoStore.apply` in todos.py) from a file or stdin is applied to the
+todo files all-or-nothing and queued for the same commit.
+
+Usage:
+    python3 scripts/sync.py [--repo DIR] pull [--force]
+    python3 scripts/sync.py [--repo DIR] record -m MESSAGE [FILE ...] [--now]
+    python3 scripts/sync.py [--repo DIR] apply [OPERATIONS.json|-] [--now]
+    python3 scripts/sync.py [--repo DIR] flush [--wait]
+    python3 scripts/sync.py [--repo DIR] status
+
+Example operations for apply:
+    [{"op": "add", "text": "Write report", "date": "2026.01.07"},
+     {"op": "complete", "id": "2e9d244"},
+     {"op": "move", "id": "b3c4d5e", "date": "later"}]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from todos import DEFAULT_REPO, TodoStore, _status_paths, git, is_todo_file
+
+STATE_NAME = "todo-sync.json"
+LOCK_NAME = "todo-sync.lock"
+DEFAULT_WINDOW = 30.0
+DEFAULT_REMOTE_TTL = 60.0
+
+
+class SyncError(Exception):
+    """A git step that failed and needs attention (conflict, no branch)."""
+
+
+@dataclass
+class SyncResult:
+    committed: str | None = None
+    changes: int = 0
+    pulled: bool = False
+    pushed: bool = False
+    messages: list[str] = field(default_factory=list)
+
+
+def _alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Sync:
+    """Pending changes for one todo repository and the git steps that flush them."""
+
+    def __init__(
+        self,
+        repo: Path,
+        remote: str = "origin",
+        window: float = DEFAULT_WINDOW,
+        remote_ttl: float = DEFAULT_REMOTE_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.repo = repo
+        self.remote = remote
+        self.window = window
+        self.remote_ttl = remote_ttl
+        self.clock = clock
+        git_dir = git(repo, "rev-parse", "--absolute-git-dir")
+        if git_dir is None:
+            raise SyncError(f"{repo} is not a git repository")
+        self.state_path = Path(git_dir.strip()) / STATE_NAME
+        self.lock_path = Path(git_dir.strip()) / LOCK_NAME
+
+    # State
+
+    @contextmanager
+    def locked(self) -> Iterator[dict]:
+        """Hold the sync lock and yield the state, saving it on the way out."""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = json.loads(self.state_path.read_text())
+            except (OSError, ValueError):
+                state = {}
+            state.setdefault("pending", [])
+            state.setdefault("files", [])
+            try:
+                yield state
+            finally:
+                # Saved even when a git step fails, so a commit is never queued twice
+                partial = self.state_path.with_name(f".{STATE_NAME}.{os.getpid()}")
+                partial.write_text(json.dumps(state, indent=1) + "\n")
+                os.replace(partial, self.state_path)
+
+    def status(self) -> dict:
+        with self.locked() as state:
+            return dict(state)
+
+    # Remote
+
+    def branch(self) -> str:
+        name = git(self.repo, "symbolic-ref", "--short", "-q", "HEAD")
+        if not name:
+            raise SyncError("HEAD is detached; check out a branch to sync")
+        return name.strip()
+
+    def _has_remote(self) -> bool:
+        return git(self.repo, "remote", "get-url", self.remote) is not None
+
+    def _tracking(self, branch: str) -> str | None:
+        ref = git(self.repo, "rev-parse", "-q", "--verify",
+                  f"refs/remotes/{self.remote}/{branch}")
+        return ref.strip() if ref else None
+
+    def remote_head(self, branch: str) -> str | None:
+        """The remote branch's commit ("" if absent), or None if unreachable."""
+        output = git(self.repo, "ls-remote", self.remote, f"refs/heads/{branch}")
+        if output is None:
+            return None
+        return output.split("\t", 1)[0].strip()
+
+    def _pull(self, state: dict, force: bool) -> bool:
+        """Pull if the remote branch moved; return whether a pull ran."""
+        if not self._has_remote():
+            return False
+        now = self.clock()
+        if not force and now - state.get("remote_checked", 0) < self.remote_ttl:
+            return False
+        branch = self.branch()
+        head = self.remote_head(branch)
+        if head is None:
+            # Offline: work locally, and check again next time
+            return False
+        state["remote_checked"] = now
+        if not head or head == self._tracking(branch):
+            return False
+        if git(self.repo, "pull", "-q", "--rebase", "--autostash",
+               self.remote, branch) is None:
+            git(self.repo, "rebase", "--abort")
+            raise SyncError(f"git pull from {self.remote}/{branch} failed; resolve it by hand")
+        return True
+
+    def pull(self, force: bool = False) -> bool:
+        """Bring in remote changes, skipping the pull when the remote is unchanged."""
+        with self.locked() as state:
+            return self._pull(state, force)
+
+    # Pending changes
+
+    def record(self, messages: list[str], files: list[str] | None = None) -> dict:
+        """
+        Queue changes for the next commit and return the state.
+
+        Without files, every todo file git reports as changed is queued.
+        """
+        if files is None:
+            status = git(self.repo, "status", "--porcelain", "-z", "--untracked-files=all")
+            files = sorted(p for p in _status_paths(status or "") if is_todo_file(p))
+        with self.locked() as state:
+            now = self.clock()
+            if not state["pending"]:
+                state["first_change"] = now
+            state["pending"].extend(messages)
+            state["files"] = sorted(set(state["files"]) | set(files))
+            state["last_change"] = now
+            return dict(state)
+
+    def due(self, state: dict) -> bool:
+        """Whether the window opened by the first pending change has passed."""
+        return bool(state["pending"]) and \
+            self.clock() - state.get("first_change", 0) >= self.window
+
+    def _commit_message(self, messages: list[str]) -> str:
+        if len(messages) == 1:
+            return messages[0]
+        return f"Batch: {len(messages)} changes\n\n" + "\n".join(f"- {m}" for m in messages)
+
+    def flush(self) -> SyncResult:
+        """Commit every pending change at once, pull if needed, then push."""
+        with self.locked() as state:
+            return self._flush(state)
+
+    def _flush(self, state: dict) -> SyncResult:
+        result = SyncResult(messages=list(state["pending"]))
+        if state["files"]:
+            git(self.repo, "add", "-A", "--", *state["files"])
+        staged = git(self.repo, "diff", "--cached", "--quiet") is None
+        if staged:
+            if git(self.repo, "commit", "-q", "-m",
+                   self._commit_message(state["pending"] or ["Update: todos"])) is None:
+                raise SyncError("git commit failed")
+            result.committed = git(self.repo, "rev-parse", "HEAD").strip()
+            result.changes = len(state["pending"])
+        state["pending"], state["files"] = [], []
+        state.pop("first_change", None)
+
+        if not self._has_remote():
+            return result
+        branch = self.branch()
+        result.pulled = self._pull(state, force=True)
+        tracking = self._tracking(branch)
+        ahead = git(self.repo, "rev-list", "--count",
+                    f"{tracking}..HEAD" if tracking else "HEAD")
+        if ahead and int(ahead) > 0:
+            if git(self.repo, "push", "-q", self.remote, f"HEAD:refs/heads/{branch}") is None:
+                # Stays committed locally; the next flush pushes it
+                return result
+            # The push updated the tracking ref, so a check now would find nothing new
+            state["remote_checked"] = self.clock()
+            result.pushed = True
+        return result
+
+    def wait_and_flush(self) -> SyncResult | None:
+        """Sleep until the pending window closes, then flush (the background flusher)."""
+        while True:
+            with self.locked() as state:
+                if not state["pending"]:
+                    state.pop("flusher", None)
+                    return None
+                if self.due(state):
+                    state.pop("flusher", None)
+                    return self._flush(state)
+                remaining = state["first_change"] + self.window - self.clock()
+            time.sleep(max(remaining, 0.05))
+
+    def schedule(self) -> bool:
+        """Start a background flusher unless one is already waiting."""
+        with self.locked() as state:
+            if _alive(state.get("flusher")):
+                return False
+            process = subprocess.Popen(
+                [sys.executable, __file__, "--repo", str(self.repo),
+                 "--window", str(self.window), "flush", "--wait"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True,
+            )
+            state["flusher"] = process.pid
+            return True
+
+
+def _report(result: SyncResult | None, as_json: bool) -> None:
+    if result is None:
+        result = SyncResult()
+    if as_json:
+        print(json.dumps(asdict(result), indent=2))
+        return
+    parts = [f"committed {result.changes} change(s) as {result.committed[:7]}"
+             if result.committed else "nothing to commit"]
+    parts.append("pulled" if result.pulled else "remote unchanged")
+    if result.pushed:
+        parts.append("pushed")
+    print("Sync: " + ", ".join(parts), file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", type=Path,
+                        default=Path(os.environ.get("TODOS_REPO", DEFAULT_REPO)))
+    parser.add_argument("--remote", default="origin")
+    parser.add_argument("--window", type=float,
+                        default=float(os.environ.get("TODOS_SYNC_WINDOW", DEFAULT_WINDOW)),
+                        help="seconds to collect changes before committing")
+    parser.add_argument("--remote-ttl", type=float,
+                        default=float(os.environ.get("TODOS_SYNC_REMOTE_TTL",
+                                                     DEFAULT_REMOTE_TTL)),
+                        help="seconds before the remote is checked again")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pull = commands.add_parser("pull", help="pull, unless the remote is unchanged")
+    pull.add_argument("--force", action="store_true",
+                      help="check the remote even if it was checked recently")
+    record = commands.add_parser("record", help="queue edited files for the next commit")
+    record.add_argument("-m", "--message", required=True)
+    record.add_argument("files", nargs="*", help="default: every changed todo file")
+    record.add_argument("--now", action="store_true", help="flush immediately")
+    apply = commands.add_parser("apply", help="apply a JSON list of operations at once")
+    apply.add_argument("operations", nargs="?", default="-",
+                       help="JSON file, or - for stdin (default)")
+    apply.add_argument("--today", help="YYYY.MM.DD for adds without a date")
+    apply.add_argument("--now", action="store_true", help="flush immediately")
+    flush = commands.add_parser("flush", help="commit and push pending changes now")
+    flush.add_argument("--wait", action="store_true",
+                       help="wait for the window to close first (used by the flusher)")
+    commands.add_parser("status", help="show pending changes")
+    args = parser.parse_args(argv)
+
+    as_json = args.format == "json"
+    try:
+        sync = Sync(args.repo, args.remote, args.window, args.remote_ttl)
+        if args.command == "pull":
+            pulled = sync.pull(args.force)
+            print("Pulled" if pulled else "Remote unchanged; skipped pull", file=sys.stderr)
+            return 0
+        if args.command == "status":
+            print(json.dumps(sync.status(), indent=2))
+            return 0
+        if args.command == "flush":
+            _report(sync.wait_and_flush() if args.wait else sync.flush(), as_json)
+            return 0
+
+        if args.command == "apply":
+            source = sys.stdin if args.operations == "-" else open(args.operations)
+            with source:
+                operations = json.load(source)
+            if not isinstance(operations, list):
+                raise ValueError("operations must be a JSON list")
+            today = datetime.strptime(args.today, "%Y.%m.%d").date() if args.today \
+                else date.today()
+            store = TodoStore(args.repo)
+            store.update()
+            batch = store.apply(operations, today)
+            if as_json:
+                print(json.dumps({
+                    "files": batch.files,
+                    "messages": batch.messages,
+                    "added": [{**asdict(t), "date": t.date} for t in batch.added],
+                }, indent=2))
+            else:
+                for message in batch.messages:
+                    print(message)
+            if not batch.files:
+                return 0
+            state = sync.record(batch.messages, batch.files)
+        else:
+            state = sync.record([args.message], args.files or None)
+
+        if args.now or sync.due(state):
+            _report(sync.flush(), as_json and args.command != "apply")
+        else:
+            sync.schedule()
+            print(f"Queued {len(state['pending'])} change(s); committing within "
+                  f"{args.window:g}s", file=sys.stderr)
+    except (SyncError, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Indexed todo store for the managing-todos skill.
+
+Todos live one per line in daily files (`YYYY.MM.DD.txt`) and `later.txt`.
+Instead of reading every file for each query, this keeps an on-disk index
+of every todo (file, line, text, status, ID), stored in the repository's
+`.git/todo-index.json` so it is never committed.
+
+The index is brought up to date before each query, re-reading only the
+files that changed:
+
+- git: files changed between the indexed HEAD and the current HEAD
+  (`git diff --name-only`), plus uncommitted and untracked files
+  (`git status`), plus files that were uncommitted at the last update
+- mtime: files whose modification time or size changed
+- auto (default): git when the repository and indexed HEAD allow it,
+  otherwise mtime
+
+The daily review (`review`) moves incomplete todos from past-dated files
+to later.txt. It keeps a watermark in the index: the last date swept and
+the HEAD (or time) of that sweep. Later reviews examine only past files
+dated after the watermark, or changed since that commit, so a review
+costs the same however many daily files exist.
+
+`TodoStore.apply` is the bulk-operation API: a list of add, complete,
+move and remove operations is checked in full against the files and then
+written all at once, or not at all. `scripts/sync.py apply` runs it from
+the command line and queues the result for one batched commit.
+
+Usage:
+    python3 scripts/todos.py [--repo DIR] view [all|completed|incomplete]
+                             [--date YYYY.MM.DD|later] [--format text|json]
+    python3 scripts/todos.py [--repo DIR] overdue [--today YYYY.MM.DD]
+    python3 scripts/todos.py [--repo DIR] review [--today YYYY.MM.DD] [--apply]
+    python3 scripts/todos.py [--repo DIR] find ID
+    python3 scripts/todos.py [--repo DIR] stats
+
+The repository defaults to $TODOS_REPO, then ~/projects/wip/to-dos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+INDEX_VERSION = 1
+INDEX_NAME = "todo-index.json"
+LATER_FILE = "later.txt"
+DEFAULT_REPO = Path.home() / "projects" / "wip" / "to-dos"
+
+FILE_PATTERN = re.compile(r"^(\d{4})\.(\d{2})\.(\d{2})\.txt$")
+TODO_PATTERN = re.compile(r"^\[( |x|X)\]\s+(.*?)(?:\s+\(([0-9a-f]{7})\))?\s*$")
+METHODS = ("auto", "git", "mtime", "full")
+OPERATIONS = ("add", "complete", "move", "remove")
+
+
+@dataclass
+class Todo:
+    file: str
+    line: int
+    text: str
+    done: bool
+    id: str | None = None
+
+    @property
+    def date(self) -> str:
+        """YYYY.MM.DD for daily files, "later" for later.txt."""
+        return "later" if self.file == LATER_FILE else self.file[:-4]
+
+    def render(self) -> str:
+        suffix = f" ({self.id})" if self.id else ""
+        return f"[{'x' if self.done else ' '}] {self.text}{suffix}"
+
+
+@dataclass
+class Review:
+    examined: list[str] = field(default_factory=list)
+    overdue: list[Todo] = field(default_factory=list)
+    moved: bool = False
+
+
+@dataclass
+class Batch:
+    files: list[str] = field(default_factory=list)
+    messages: list[str] = field(default_factory=list)
+    added: list[Todo] = field(default_factory=list)
+
+
+def git(repo: Path, *args: str) -> str | None:
+    """Run a git command in repo, returning stdout or None on failure."""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(repo), *args],
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout
+
+
+def is_todo_file(name: str) -> bool:
+    return name == LATER_FILE or FILE_PATTERN.match(name) is not None
+
+
+def parse_todos(name: str, text: str) -> list[Todo]:
+    """Parse the todo lines of one file; other lines are ignored."""
+    todos = []
+    for number, line in enumerate(text.splitlines(), 1):
+        match = TODO_PATTERN.match(line.strip())
+        if match:
+            mark, body, todo_id = match.groups()
+            todos.append(Todo(name, number, body, mark != " ", todo_id))
+    return todos
+
+
+def file_date(name: str) -> date | None:
+    """The date of a daily file, or None for later.txt."""
+    match = FILE_PATTERN.match(name)
+    return date(*(int(part) for part in match.groups())) if match else None
+
+
+def new_id(text: str) -> str:
+    """A fresh todo ID: the first 7 characters of a SHA-1 hash."""
+    return hashlib.sha1(f"{text}\0{time.time_ns()}".encode()).hexdigest()[:7]
+
+
+def target_file(day: str) -> str:
+    """The file for YYYY.MM.DD or "later"; raises ValueError for anything else."""
+    if day == "later":
+        return LATER_FILE
+    datetime.strptime(day, "%Y.%m.%d")
+    return f"{day}.txt"
+
+
+def _sort_key(name: str) -> tuple[int, str]:
+    # Dated files in order, later.txt last
+    return (1, name) if name == LATER_FILE else (0, name)
+
+
+def _status_paths(output: str) -> set[str]:
+    """Paths from `git status --porcelain -z`, including both sides of renames."""
+    paths = set()
+    entries = output.split("\0")
+    position = 0
+    while position < len(entries):
+        entry = entries[position]
+        position += 1
+        if len(entry) < 4:
+            continue
+        paths.add(entry[3:])
+        if entry[0] in "RC" and position < len(entries):
+            paths.add(entries[position])
+            position += 1
+    return paths
+
+
+class TodoStore:
+    """The todo repository and its incrementally maintained index."""
+
+    def __init__(self, repo: Path):
+        self.repo = repo
+        git_dir = repo / ".git"
+        # Inside .git the index is never committed; otherwise keep it hidden
+        self.index_path = (
+            git_dir / INDEX_NAME if git_dir.is_dir() else repo / f".{INDEX_NAME}"
+        )
+        self.files: dict[str, dict] = {}
+        self.head: str | None = None
+        self.dirty: list[str] = []
+        self.watermark: dict = {}
+        self.reread: list[str] = []
+        self.method = ""
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.files = data.get("files", {})
+        self.head = data.get("head")
+        self.dirty = data.get("dirty", [])
+        self.watermark = data.get("watermark", {})
+
+    def save(self) -> None:
+        self.index_path.write_text(json.dumps({
+            "version": INDEX_VERSION,
+            "head": self.head,
+            "dirty": self.dirty,
+            "watermark": self.watermark,
+            "files": self.files,
+        }))
+
+    def _read(self, name: str) -> None:
+        """Re-index one file, or drop it if it no longer exists."""
+        path = self.repo / name
+        try:
+            stat = path.stat()
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.files.pop(name, None)
+            return
+        self.files[name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "todos": [asdict(todo) for todo in parse_todos(name, text)],
+        }
+        self.reread.append(name)
+
+    def _git_changes(self, head: str) -> tuple[set[str], list[str]] | None:
+        """Files changed since the indexed HEAD, and those uncommitted now."""
+        if not self.head or not self.files:
+            return None
+        changed = set(self.dirty)
+        if self.head != head:
+            diff = git(self.repo, "diff", "--name-only", "-z", self.head, head)
+            if diff is None:
+                # The indexed commit is gone (history rewritten); scan instead
+                return None
+            changed.update(diff.split("\0"))
+        status = git(self.repo, "status", "--porcelain", "-z", "--untracked-files=all")
+        if status is None:
+            return None
+        dirty = sorted(p for p in _status_paths(status) if is_todo_file(p))
+        changed.update(dirty)
+        return {p for p in changed if is_todo_file(p)}, dirty
+
+    def _scan(self) -> None:
+        """Compare every todo file's mtime and size with the index."""
+        seen = set()
+        with os.scandir(self.repo) as entries:
+            for entry in entries:
+                if not entry.is_file() or not is_todo_file(entry.name):
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                cached = self.files.get(entry.name)
+                if not cached or cached["mtime_ns"] != stat.st_mtime_ns \
+                        or cached["size"] != stat.st_size:
+                    self._read(entry.name)
+        for name in set(self.files) - seen:
+            del self.files[name]
+
+    def update(self, method: str = "auto") -> list[str]:
+        """Bring the index up to date; return the files that were re-read."""
+        self.reread = []
+        if method == "full":
+            self.files = {}
+        head = git(self.repo, "rev-parse", "--verify", "-q", "HEAD")
+        head = head.strip() if head else None
+
+        changes = self._git_changes(head) if head and method in ("auto", "git") else None
+        if changes is not None:
+            changed, self.dirty = changes
+            for name in sorted(changed):
+                self._read(name)
+            self.method = "git"
+        else:
+            self._scan()
+            status = git(self.repo, "status", "--porcelain", "-z", "--untracked-files=all")
+            self.dirty = sorted(p for p in _status_paths(status or "") if is_todo_file(p))
+            self.method = "full" if method == "full" else "mtime"
+        self.head = head
+        self.save()
+        return self.reread
+
+    # Queries
+
+    def todos(self, status: str = "all", day: str | None = None) -> list[Todo]:
+        """Todos in date order (later.txt last), incomplete first within a file."""
+        names = sorted(self.files, key=_sort_key)
+        if day is not None:
+            names = [n for n in names if n == (LATER_FILE if day == "later" else f"{day}.txt")]
+        result = []
+        for name in names:
+            todos = [Todo(**t) for t in self.files[name]["todos"]]
+            if status == "completed":
+                todos = [t for t in todos if t.done]
+            elif status == "incomplete":
+                todos = [t for t in todos if not t.done]
+            result.extend(sorted(todos, key=lambda t: t.done))
+        return result
+
+    def find(self, todo_id: str) -> list[Todo]:
+        """Every todo with this ID (duplicates are allowed)."""
+        return [t for t in self.todos() if t.id == todo_id]
+
+    def overdue(self, today: date) -> list[Todo]:
+        """Incomplete todos in daily files dated before today."""
+        return [
+            t for t in self.todos("incomplete")
+            if (day := file_date(t.file)) is not None and day < today
+        ]
+
+    # Changes
+
+    def move(self, todos: list[Todo], target: str) -> None:
+        """Move todos (as indexed) to the end of target, e.g. later.txt."""
+        by_file: dict[str, set[int]] = {}
+        for todo in todos:
+            by_file.setdefault(todo.file, set()).add(todo.line)
+        moved = []
+        for name, numbers in sorted(by_file.items()):
+            path = self.repo / name
+            lines = path.read_text(encoding="utf-8").splitlines()
+            expected = {t.line: t.render() for t in todos if t.file == name}
+            for number in numbers:
+                if number > len(lines) or lines[number - 1].strip() != expected[number]:
+                    raise ValueError(f"{name}:{number} changed since it was indexed")
+            moved.extend(lines[n - 1].strip() for n in sorted(numbers))
+            kept = [line for n, line in enumerate(lines, 1) if n not in numbers]
+            path.write_text("".join(f"{line}\n" for line in kept), encoding="utf-8")
+            self._read(name)
+
+        path = self.repo / target
+        existing = path.read_text(encoding="utf-8") if path.exists() else ""
+        if existing and not existing.endswith("\n"):
+            existing += "\n"
+        path.write_text(existing + "".join(f"{line}\n" for line in moved), encoding="utf-8")
+        self._read(target)
+        self.save()
+
+    def _locate(self, contents: dict[str, list[str]], op: dict) -> tuple[str, int, Todo]:
+        """The single line an operation refers to, by ID or exact text."""
+        todo_id, text = op.get("id"), op.get("text")
+        if not todo_id and not text:
+            raise ValueError(f"{op['op']} needs an id or text")
+
+        def matches(todo) -> bool:
+            return todo.id == todo_id if todo_id else todo.text == text
+
+        # Files the index says hold the todo, plus any this batch has changed
+        names = {
+            name for name, entry in self.files.items()
+            if any(matches(Todo(**t)) for t in entry["todos"])
+        } | set(contents)
+        found = []
+        for name in sorted(names):
+            lines = self._lines(contents, name)
+            for number, line in enumerate(lines):
+                parsed = parse_todos(name, line)
+                if parsed and matches(parsed[0]):
+                    found.append((name, number, parsed[0]))
+        if len(found) != 1:
+            what = f"ID {todo_id}" if todo_id else repr(text)
+            raise ValueError(f"{len(found) or 'No'} todos match {what}")
+        return found[0]
+
+    def _lines(self, contents: dict[str, list[str]], name: str) -> list[str]:
+        if name not in contents:
+            path = self.repo / name
+            contents[name] = (
+                path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+            )
+        return contents[name]
+
+    def apply(self, operations: list[dict], today: date | None = None) -> Batch:
+        """
+        Apply add, complete, move and remove operations all-or-nothing.
+
+        Each operation is a dict with "op", and "id" or "text" to pick an
+        existing todo; add takes "text" and move takes "date" (YYYY.MM.DD
+        or "later", add defaults to today). Every operation is checked
+        before any file is written; a ValueError leaves the files as they were.
+        """
+        today = today or date.today()
+        contents: dict[str, list[str]] = {}
+        batch = Batch()
+        for op in operations:
+            kind = op.get("op")
+            if kind not in OPERATIONS:
+                raise ValueError(f"Unknown operation {kind!r}")
+            if kind == "add":
+                text = str(op.get("text", "")).strip()
+                if not text or "\n" in text:
+                    raise ValueError("add needs a single line of text")
+                day = op.get("date") or today.strftime("%Y.%m.%d")
+                todo = Todo(target_file(day), 0, text, False, op.get("id") or new_id(text))
+                self._lines(contents, todo.file).append(todo.render())
+                batch.added.append(todo)
+                batch.messages.append(f"Add: {text}" + (f" to {day}" if op.get("date") else ""))
+                continue
+
+            name, number, todo = self._locate(contents, op)
+            lines = contents[name]
+            if kind == "complete":
+                todo.done = True
+                lines[number] = todo.render()
+                batch.messages.append(f"Complete: {todo.text}")
+            elif kind == "remove":
+                del lines[number]
+                batch.messages.append(f"Remove: {todo.text}")
+            else:
+                day = op.get("date")
+                if not day:
+                    raise ValueError("move needs a date")
+                target = target_file(day)
+                if target != name:
+                    moved = lines.pop(number)
+                    self._lines(contents, target).append(moved.strip())
+                batch.messages.append(f"Move: {todo.text} to {day}")
+
+        # Nothing is written until every operation has been checked
+        for name, lines in sorted(contents.items(), key=lambda item: _sort_key(item[0])):
+            path = self.repo / name
+            text = "".join(f"{line}\n" for line in lines)
+            if not path.exists() and not lines:
+                continue
+            if path.exists() and path.read_text(encoding="utf-8") == text:
+                continue
+            partial = path.with_name(f".{name}.{os.getpid()}")
+            partial.write_text(text, encoding="utf-8")
+            os.replace(partial, path)
+            batch.files.append(name)
+        for name in batch.files:
+            self._read(name)
+        self.save()
+        # Later operations in the batch may have moved or removed a new todo
+        added, batch.added = batch.added, []
+        for todo in added:
+            for name in sorted(contents, key=_sort_key):
+                entry = self.files.get(name, {"todos": []})
+                line = next(
+                    (t["line"] for t in reversed(entry["todos"]) if t["id"] == todo.id), None
+                )
+                if line is not None:
+                    todo.file, todo.line = name, line
+                    batch.added.append(todo)
+                    break
+        return batch
+
+    # Daily review
+
+    def _stamp(self, name: str) -> list[int] | None:
+        entry = self.files.get(name)
+        return [entry["mtime_ns"], entry["size"]] if entry else None
+
+    def _changed_since(self, mark: dict) -> set[str] | None:
+        """Todo files changed since the watermark, or None if unknown."""
+        if mark.get("head") and self.head:
+            if mark["head"] == self.head:
+                changed = set()
+            else:
+                diff = git(self.repo, "diff", "--name-only", "-z", mark["head"], self.head)
+                if diff is None:
+                    return None
+                changed = set(diff.split("\0"))
+            changed |= set(self.dirty)
+        elif mark.get("swept_at_ns"):
+            changed = {
+                name for name, entry in self.files.items()
+                if entry["mtime_ns"] >= mark["swept_at_ns"]
+            }
+        else:
+            return None
+        # Files the sweep itself rewrote are unchanged until touched again
+        written = mark.get("written", {})
+        return {name for name in changed if written.get(name) != self._stamp(name)}
+
+    def review_candidates(self, today: date) -> list[str]:
+        """Past-dated files the next review has to look at."""
+        past = sorted(n for n in self.files if (d := file_date(n)) is not None and d < today)
+        mark = self.watermark
+        changed = self._changed_since(mark) if mark.get("swept_through") else None
+        if changed is None:
+            return past
+        return [n for n in past if n[:-4] > mark["swept_through"] or n in changed]
+
+    def review(self, today: date, apply: bool = False) -> Review:
+        """
+        Find incomplete todos in past-dated files, moving them to later.txt
+        with apply. The watermark advances once no overdue todos remain.
+        """
+        result = Review(examined=self.review_candidates(today))
+        result.overdue = [
+            Todo(**t) for name in result.examined for t in self.files[name]["todos"]
+            if not t["done"]
+        ]
+        if result.overdue and apply:
+            self.move(result.overdue, LATER_FILE)
+            result.moved = True
+        if not result.overdue or result.moved:
+            self.watermark = {
+                "swept_through": (today - timedelta(days=1)).strftime("%Y.%m.%d"),
+                "head": self.head,
+                "swept_at_ns": time.time_ns(),
+                "written": {
+                    name: self._stamp(name)
+                    for name in {t.file for t in result.overdue} if result.moved
+                },
+            }
+            self.save()
+        return result
+
+    def stats(self) -> dict:
+        todos = self.todos()
+        return {
+            "files": len(self.files),
+            "todos": len(todos),
+            "completed": sum(t.done for t in todos),
+            "incomplete": sum(not t.done for t in todos),
+            "missing_ids": sum(not t.done and not t.id for t in todos),
+            "method": self.method,
+            "reread": len(self.reread),
+        }
+
+
+def heading(name: str) -> str:
+    """The display header for a file, e.g. "Saturday 11 January"."""
+    day = file_date(name)
+    if day is None:
+        return "Later"
+    return f"{day:%A} {day.day} {day:%B}"
+
+
+def render(todos: list[Todo]) -> str:
+    """Group todos under date headers, blank lines between groups."""
+    groups: list[str] = []
+    current = None
+    for todo in todos:
+        if todo.file != current:
+            current = todo.file
+            groups.append(f"{heading(current)}:")
+        groups[-1] += "\n" + todo.render()
+    return "\n\n".join(groups)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repo", type=Path,
+                        default=Path(os.environ.get("TODOS_REPO", DEFAULT_REPO)))
+    parser.add_argument("--method", choices=METHODS, default="auto",
+                        help="how to detect changed files (full rebuilds the index)")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    view = commands.add_parser("view", help="list todos")
+    view.add_argument("status", nargs="?", choices=("all", "completed", "incomplete"),
+                      default="all")
+    view.add_argument("--date", help="YYYY.MM.DD or later")
+    overdue = commands.add_parser("overdue", help="incomplete todos from past dates")
+    overdue.add_argument("--today", help="YYYY.MM.DD (default: today)")
+    review = commands.add_parser("review", help="daily review of past-dated files")
+    review.add_argument("--today", help="YYYY.MM.DD (default: today)")
+    review.add_argument("--apply", action="store_true",
+                        help="move the overdue todos to later.txt")
+    find = commands.add_parser("find", help="look up todos by ID")
+    find.add_argument("id")
+    commands.add_parser("stats", help="counts and index status")
+    args = parser.parse_args(argv)
+
+    if not args.repo.is_dir():
+        print(f"Error: {args.repo} is not a directory", file=sys.stderr)
+        return 1
+    store = TodoStore(args.repo)
+    store.update(args.method)
+
+    if args.command == "stats":
+        stats = store.stats()
+        print(json.dumps(stats, indent=2) if args.format == "json"
+              else "\n".join(f"{key}: {value}" for key, value in stats.items()))
+        return 0
+
+    today = date.today()
+    if getattr(args, "today", None):
+        try:
+            today = datetime.strptime(args.today, "%Y.%m.%d").date()
+        except ValueError:
+            print(f"Error: --today must be YYYY.MM.DD, not {args.today!r}", file=sys.stderr)
+            return 1
+
+    if args.command == "review":
+        result = store.review(today, args.apply)
+        if args.format == "json":
+            print(json.dumps({
+                "examined": result.examined,
+                "moved": result.moved,
+                "overdue": [{**asdict(t), "date": t.date} for t in result.overdue],
+            }, indent=2))
+        else:
+            print(f"Examined {len(result.examined)} past file(s); "
+                  f"{len(result.overdue)} overdue todo(s)"
+                  + (" moved to later.txt" if result.moved else ""), file=sys.stderr)
+            if result.overdue:
+                print(render(result.overdue))
+        return 0
+
+    if args.command == "view":
+        todos = store.todos(args.status, args.date)
+    elif args.command == "overdue":
+        todos = store.overdue(today)
+    else:
+        todos = store.find(args.id)
+        if not todos:
+            print(f"Error: no todo with ID {args.id}", file=sys.stderr)
+            return 1
+
+    if args.format == "json":
+        print(json.dumps([{**asdict(t), "date": t.date} for t in todos], indent=2))
+    elif todos:
+        print(render(todos))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Pytest configuration and fixtures for managing-todos testing.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SKILL_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(SKILL_ROOT / "scripts"))
+
+
+def run_git(repo, *args):
+    """Run git in repo with a fixed identity, returning stdout."""
+    return subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.name=Test", "-c", "user.email=test@example.com",
+         *args],
+        capture_output=True, text=True, check=True,
+    ).stdout
+
+
+@pytest.fixture
+def todo_repo(tmp_path):
+    """A git repository of todo files with an initial commit."""
+    repo = tmp_path / "to-dos"
+    repo.mkdir()
+    run_git(repo, "init", "-q", "-b", "main")
+    (repo / "2026.01.05.txt").write_text(
+        "[x] Review PR #42 (a1b2c3d)\n[ ] Buy groceries (2e9d244)\n"
+    )
+    (repo / "2026.01.06.txt").write_text("[ ] Fix bug in login (b3c4d5e)\n")
+    (repo / "later.txt").write_text("[ ] Learn Rust\n")
+    (repo / "README.md").write_text("not a todo file\n")
+    run_git(repo, "add", "-A")
+    run_git(repo, "commit", "-q", "-m", "Initial todos")
+    return repo
+
+
+@pytest.fixture
+def git_cmd():
+    return run_git
+
+
+@pytest.fixture
+def synced_repo(todo_repo, tmp_path):
+    """todo_repo pushed to a local bare repository as origin; returns (repo, origin)."""
+    origin = tmp_path / "origin.git"
+    run_git(tmp_path, "clone", "-q", "--bare", str(todo_repo), str(origin))
+    run_git(todo_repo, "remote", "add", "origin", str(origin))
+    run_git(todo_repo, "fetch", "-q", "origin")
+    run_git(todo_repo, "branch", "-q", "--set-upstream-to=origin/main")
+    run_git(todo_repo, "config", "user.name", "Test")
+    run_git(todo_repo, "config", "user.email", "test@example.com")
+    return todo_repo, origin
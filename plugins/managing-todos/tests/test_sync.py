@@ -0,0 +1,137 @@
+"""
+Unit tests for batched git sync, against a local bare repository.
+"""
+
+import json
+
+import pytest
+
+from sync import Sync, main
+from todos import TodoStore
+
+
+pytestmark = pytest.mark.unit
+
+
+class Clock:
+    """A settable clock for window and TTL decisions."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def log(repo, git_cmd, ref="HEAD"):
+    return git_cmd(repo, "log", "--format=%s", ref).splitlines()
+
+
+def push_from_elsewhere(origin, tmp_path, git_cmd):
+    """Commit a new todo file to origin from a second clone."""
+    other = tmp_path / "other"
+    git_cmd(tmp_path, "clone", "-q", str(origin), str(other))
+    (other / "2026.01.09.txt").write_text("[ ] From the laptop (0dd1ce5)\n")
+    git_cmd(other, "add", "-A")
+    git_cmd(other, "commit", "-q", "-m", "Add: From the laptop")
+    git_cmd(other, "push", "-q", "origin", "main")
+
+
+class TestBatching:
+    """Test that changes in one window become one commit and one push."""
+
+    def test_changes_coalesce_into_one_commit(self, synced_repo, git_cmd):
+        """Verify several recorded edits are committed and pushed together."""
+        repo, origin = synced_repo
+        clock = Clock()
+        sync = Sync(repo, window=30, clock=clock)
+        for name, message in [("2026.01.07.txt", "Add: One"), ("2026.01.08.txt", "Add: Two"),
+                              ("2026.01.07.txt", "Add: Three")]:
+            with open(repo / name, "a") as f:
+                f.write(f"[ ] {message[5:]}\n")
+            state = sync.record([message])
+            assert not sync.due(state)
+            clock.now += 5
+        assert log(repo, git_cmd) == ["Initial todos"]
+
+        clock.now += 30
+        assert sync.due(sync.status())
+        result = sync.flush()
+        assert result.changes == 3 and result.pushed and not result.pulled
+        assert log(origin, git_cmd, "main") == ["Batch: 3 changes", "Initial todos"]
+        body = git_cmd(repo, "log", "-1", "--format=%b")
+        assert body.strip().splitlines() == ["- Add: One", "- Add: Two", "- Add: Three"]
+        assert sync.status()["pending"] == []
+
+        # Nothing pending: a second flush neither commits nor pushes
+        result = sync.flush()
+        assert result.committed is None and not result.pushed
+
+    def test_push_failure_is_retried(self, synced_repo, git_cmd, tmp_path):
+        """Verify a commit that could not be pushed goes out with the next flush."""
+        repo, origin = synced_repo
+        sync = Sync(repo)
+        git_cmd(repo, "remote", "set-url", "origin", str(tmp_path / "missing.git"))
+        (repo / "later.txt").write_text("[ ] Learn Rust (9a8b7c6)\n")
+        sync.record(["Update: add missing IDs"])
+        result = sync.flush()
+        assert result.committed and not result.pushed
+
+        git_cmd(repo, "remote", "set-url", "origin", str(origin))
+        assert sync.flush().pushed
+        assert log(origin, git_cmd, "main")[0] == "Update: add missing IDs"
+
+
+class TestPull:
+    """Test that pulls are skipped while the remote branch is unchanged."""
+
+    def test_skips_unchanged_remote(self, synced_repo, git_cmd, tmp_path):
+        """Verify a pull runs only after someone else pushed."""
+        repo, origin = synced_repo
+        clock = Clock()
+        sync = Sync(repo, remote_ttl=60, clock=clock)
+        assert sync.pull() is False
+
+        push_from_elsewhere(origin, tmp_path, git_cmd)
+        # Checked moments ago: not even ls-remote runs inside the TTL
+        assert sync.pull() is False
+        assert sync.pull(force=True) is True
+        assert (repo / "2026.01.09.txt").exists()
+        assert sync.pull(force=True) is False
+
+    def test_flush_rebases_onto_remote_changes(self, synced_repo, git_cmd, tmp_path):
+        """Verify a flush pulls remote commits before pushing its own."""
+        repo, origin = synced_repo
+        push_from_elsewhere(origin, tmp_path, git_cmd)
+        (repo / "2026.01.07.txt").write_text("[ ] Local (10ca100)\n")
+        sync = Sync(repo)
+        sync.record(["Add: Local"])
+        result = sync.flush()
+        assert result.pulled and result.pushed
+        assert log(origin, git_cmd, "main") == [
+            "Add: Local", "Add: From the laptop", "Initial todos",
+        ]
+
+
+class TestCli:
+    """Test the apply and record commands."""
+
+    def test_apply_queues_then_flushes(self, synced_repo, git_cmd, tmp_path, capsys):
+        """Verify apply edits the files atomically and --now pushes one commit."""
+        repo, origin = synced_repo
+        operations = tmp_path / "ops.json"
+        operations.write_text(json.dumps([
+            {"op": "complete", "id": "b3c4d5e"},
+            {"op": "move", "id": "2e9d244", "date": "2026.01.06"},
+        ]))
+        args = ["--repo", str(repo), "--format", "json"]
+        assert main([*args, "apply", str(operations), "--now"]) == 0
+        assert json.loads(capsys.readouterr().out)["files"] == [
+            "2026.01.05.txt", "2026.01.06.txt",
+        ]
+        assert log(origin, git_cmd, "main")[0] == "Batch: 2 changes"
+        assert TodoStore(repo).find("2e9d244")[0].file == "2026.01.06.txt"
+
+        operations.write_text(json.dumps([{"op": "complete", "id": "fffffff"}]))
+        assert main([*args, "apply", str(operations), "--now"]) == 1
+        assert "No todos match ID fffffff" in capsys.readouterr().err
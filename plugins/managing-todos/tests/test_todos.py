@@ -0,0 +1,269 @@
+"""
+Unit tests for the indexed todo store.
+"""
+
+import json
+import os
+from datetime import date
+
+import pytest
+
+from todos import TodoStore, main, parse_todos, render
+
+
+pytestmark = pytest.mark.unit
+
+
+def touch_later(path, text):
+    """Rewrite a file and move its mtime forward so mtime scans see it."""
+    path.write_text(text)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestParse:
+    """Test parsing and rendering todo lines."""
+
+    def test_parse_lines(self):
+        """Verify checkboxes, IDs and non-todo lines."""
+        todos = parse_todos("later.txt", "[ ] One (abc1234)\n\nnotes\n[X] Two\n")
+        assert [(t.line, t.text, t.done, t.id) for t in todos] == [
+            (1, "One", False, "abc1234"), (4, "Two", True, None),
+        ]
+        assert todos[0].date == "later"
+
+    def test_render_groups_by_date(self, todo_repo):
+        """Verify date headers, incomplete first, and Later last."""
+        store = TodoStore(todo_repo)
+        store.update()
+        assert render(store.todos()) == (
+            "Monday 5 January:\n[ ] Buy groceries (2e9d244)\n[x] Review PR #42 (a1b2c3d)\n\n"
+            "Tuesday 6 January:\n[ ] Fix bug in login (b3c4d5e)\n\n"
+            "Later:\n[ ] Learn Rust"
+        )
+
+
+class TestQueries:
+    """Test the status, date and ID queries."""
+
+    def test_status_and_date_filters(self, todo_repo):
+        """Verify completed, incomplete and per-date queries."""
+        store = TodoStore(todo_repo)
+        store.update()
+        assert [t.text for t in store.todos("completed")] == ["Review PR #42"]
+        assert [t.text for t in store.todos("incomplete")] == [
+            "Buy groceries", "Fix bug in login", "Learn Rust",
+        ]
+        assert [t.text for t in store.todos(day="later")] == ["Learn Rust"]
+        assert [t.file for t in store.find("b3c4d5e")] == ["2026.01.06.txt"]
+
+    def test_overdue(self, todo_repo):
+        """Verify only incomplete todos from earlier daily files are overdue."""
+        store = TodoStore(todo_repo)
+        store.update()
+        assert [t.text for t in store.overdue(date(2026, 1, 6))] == ["Buy groceries"]
+
+
+class TestIncrementalUpdate:
+    """Test that only changed files are re-read."""
+
+    def test_first_update_reads_all_then_nothing(self, todo_repo):
+        """Verify an unchanged repository re-reads no files."""
+        store = TodoStore(todo_repo)
+        assert sorted(store.update()) == ["2026.01.05.txt", "2026.01.06.txt", "later.txt"]
+        again = TodoStore(todo_repo)
+        assert again.update() == []
+        assert again.method == "git"
+        assert (todo_repo / ".git" / "todo-index.json").is_file()
+
+    def test_git_detects_commits_and_uncommitted_edits(self, todo_repo, git_cmd):
+        """Verify git diff and status pick up exactly the changed files."""
+        TodoStore(todo_repo).update()
+        (todo_repo / "2026.01.07.txt").write_text("[ ] New (c0ffee1)\n")
+        (todo_repo / "later.txt").unlink()
+        git_cmd(todo_repo, "add", "-A")
+        git_cmd(todo_repo, "commit", "-q", "-m", "Change")
+        (todo_repo / "2026.01.06.txt").write_text("[x] Fix bug in login (b3c4d5e)\n")
+
+        store = TodoStore(todo_repo)
+        assert sorted(store.update("git")) == ["2026.01.06.txt", "2026.01.07.txt"]
+        assert "later.txt" not in store.files
+        assert store.find("b3c4d5e")[0].done
+
+        # Reverting an uncommitted edit is still noticed
+        git_cmd(todo_repo, "checkout", "--", "2026.01.06.txt")
+        store = TodoStore(todo_repo)
+        assert store.update("git") == ["2026.01.06.txt"]
+        assert not store.find("b3c4d5e")[0].done
+
+    def test_mtime_without_git(self, tmp_path):
+        """Verify a plain directory is indexed by modification time."""
+        (tmp_path / "2026.01.05.txt").write_text("[ ] One\n")
+        (tmp_path / "later.txt").write_text("[ ] Two\n")
+        TodoStore(tmp_path).update()
+        touch_later(tmp_path / "later.txt", "[x] Two\n")
+
+        store = TodoStore(tmp_path)
+        assert store.update() == ["later.txt"]
+        assert store.method == "mtime"
+        assert (tmp_path / ".todo-index.json").is_file()
+        assert [t.text for t in store.todos("completed")] == ["Two"]
+
+    def test_rewritten_history_falls_back_to_scan(self, todo_repo, git_cmd):
+        """Verify an indexed HEAD that no longer exists triggers a full scan."""
+        store = TodoStore(todo_repo)
+        store.update()
+        store.head = "0" * 40
+        store.save()
+        store = TodoStore(todo_repo)
+        store.update()
+        assert store.method == "mtime"
+
+
+class TestCli:
+    """Test the command line interface."""
+
+    def test_view_find_and_stats(self, todo_repo, capsys):
+        """Verify CLI output formats and exit codes."""
+        assert main(["--repo", str(todo_repo), "view", "completed"]) == 0
+        assert capsys.readouterr().out == "Monday 5 January:\n[x] Review PR #42 (a1b2c3d)\n"
+        assert main(["--repo", str(todo_repo), "--format", "json", "find", "2e9d244"]) == 0
+        assert json.loads(capsys.readouterr().out)[0]["date"] == "2026.01.05"
+        assert main(["--repo", str(todo_repo), "find", "fffffff"]) == 1
+        assert main(["--repo", str(todo_repo), "--format", "json", "stats"]) == 0
+        stats = json.loads(capsys.readouterr().out)
+        assert stats["incomplete"] == 3 and stats["missing_ids"] == 1
+
+
+class TestReview:
+    """Test the watermarked daily review."""
+
+    def review(self, repo, day, apply=True):
+        store = TodoStore(repo)
+        store.update()
+        return store, store.review(day, apply)
+
+    def test_moves_overdue_todos_to_later(self, todo_repo):
+        """Verify incomplete past todos move to later.txt, completed ones stay."""
+        store, result = self.review(todo_repo, date(2026, 1, 7))
+        assert result.examined == ["2026.01.05.txt", "2026.01.06.txt"]
+        assert [t.text for t in result.overdue] == ["Buy groceries", "Fix bug in login"]
+        assert (todo_repo / "2026.01.05.txt").read_text() == "[x] Review PR #42 (a1b2c3d)\n"
+        assert (todo_repo / "2026.01.06.txt").read_text() == ""
+        assert (todo_repo / "later.txt").read_text() == (
+            "[ ] Learn Rust\n[ ] Buy groceries (2e9d244)\n[ ] Fix bug in login (b3c4d5e)\n"
+        )
+        assert [t.text for t in store.todos(day="later")] == [
+            "Learn Rust", "Buy groceries", "Fix bug in login",
+        ]
+        assert store.watermark["swept_through"] == "2026.01.06"
+
+    def test_watermark_limits_later_reviews(self, todo_repo, git_cmd):
+        """Verify swept files are skipped unless newer or changed since the sweep."""
+        self.review(todo_repo, date(2026, 1, 7))
+        git_cmd(todo_repo, "commit", "-qam", "Review")
+        assert self.review(todo_repo, date(2026, 1, 7))[1].examined == []
+
+        (todo_repo / "2026.01.07.txt").write_text("[ ] Call bank (d4e5f60)\n")
+        (todo_repo / "2026.01.05.txt").write_text("[ ] Moved back (e5f6071)\n")
+        git_cmd(todo_repo, "add", "-A")
+        git_cmd(todo_repo, "commit", "-qm", "More")
+        _, result = self.review(todo_repo, date(2026, 1, 8), apply=False)
+        assert result.examined == ["2026.01.05.txt", "2026.01.07.txt"]
+        assert len(result.overdue) == 2 and not result.moved
+
+        # A dry run with overdue todos leaves the watermark where it was
+        _, again = self.review(todo_repo, date(2026, 1, 8), apply=False)
+        assert again.examined == result.examined
+
+    def test_watermark_without_git(self, tmp_path):
+        """Verify the sweep time stands in for HEAD outside git."""
+        (tmp_path / "2026.01.05.txt").write_text("[ ] One\n")
+        self.review(tmp_path, date(2026, 1, 6))
+        assert self.review(tmp_path, date(2026, 1, 6))[1].examined == []
+        touch_later(tmp_path / "2026.01.05.txt", "[ ] Two\n")
+        assert self.review(tmp_path, date(2026, 1, 6))[1].examined == ["2026.01.05.txt"]
+
+    def test_cli_review(self, todo_repo, capsys):
+        """Verify the review command reports and applies moves."""
+        assert main(["--repo", str(todo_repo), "--format", "json", "review",
+                     "--today", "2026.01.06"]) == 0
+        report = json.loads(capsys.readouterr().out)
+        assert report["examined"] == ["2026.01.05.txt"] and not report["moved"]
+        assert main(["--repo", str(todo_repo), "review", "--today", "2026.01.06", "--apply"]) == 0
+        assert capsys.readouterr().out == "Monday 5 January:\n[ ] Buy groceries (2e9d244)\n"
+        assert main(["--repo", str(todo_repo), "review", "--today", "bad"]) == 1
+
+
+class TestApply:
+    """Test the all-or-nothing bulk-operation API."""
+
+    def test_add_complete_move_remove(self, todo_repo):
+        """Verify a batch of operations lands in the right files."""
+        store = TodoStore(todo_repo)
+        store.update()
+        batch = store.apply([
+            {"op": "add", "text": "Write report", "date": "2026.01.07"},
+            {"op": "add", "text": "Call mum"},
+            {"op": "complete", "id": "2e9d244"},
+            {"op": "move", "id": "b3c4d5e", "date": "later"},
+            {"op": "remove", "text": "Learn Rust"},
+        ], today=date(2026, 1, 6))
+
+        assert batch.files == ["2026.01.05.txt", "2026.01.06.txt", "2026.01.07.txt",
+                               "later.txt"]
+        assert batch.messages[0] == "Add: Write report to 2026.01.07"
+        assert batch.messages[1:] == [
+            "Add: Call mum", "Complete: Buy groceries", "Move: Fix bug in login to later",
+            "Remove: Learn Rust",
+        ]
+        report, call = batch.added
+        assert len(report.id) == 7 and report.line == 1
+        assert (todo_repo / "2026.01.06.txt").read_text() == f"[ ] Call mum ({call.id})\n"
+        assert (todo_repo / "later.txt").read_text() == "[ ] Fix bug in login (b3c4d5e)\n"
+        assert store.find("2e9d244")[0].done
+        assert store.find("b3c4d5e")[0].file == "later.txt"
+
+    @pytest.mark.parametrize("operation", [
+        {"op": "complete", "id": "fffffff"},
+        {"op": "move", "id": "2e9d244", "date": "next week"},
+        {"op": "rename", "id": "2e9d244"},
+    ])
+    def test_bad_operation_writes_nothing(self, todo_repo, operation):
+        """Verify one invalid operation leaves every file untouched."""
+        before = {p.name: p.read_text() for p in todo_repo.glob("*.txt")}
+        store = TodoStore(todo_repo)
+        store.update()
+        with pytest.raises(ValueError):
+            store.apply([{"op": "add", "text": "Kept out"},
+                         {"op": "complete", "id": "b3c4d5e"}, operation])
+        assert {p.name: p.read_text() for p in todo_repo.glob("*.txt")} == before
+
+    def test_add_then_move_in_one_batch(self, todo_repo):
+        """Verify a todo added and moved in one batch ends up only in the target."""
+        store = TodoStore(todo_repo)
+        store.update()
+        batch = store.apply([
+            {"op": "add", "text": "Write report", "date": "2026.01.07"},
+            {"op": "move", "text": "Write report", "date": "later"},
+        ], today=date(2026, 1, 6))
+
+        assert batch.files == ["later.txt"]
+        assert not (todo_repo / "2026.01.07.txt").exists()
+        (report,) = batch.added
+        assert report.file == "later.txt"
+        assert store.find(report.id)[0].line == report.line
+
+    def test_add_then_remove_in_one_batch(self, todo_repo):
+        """Verify a todo added and removed in one batch leaves nothing behind."""
+        store = TodoStore(todo_repo)
+        store.update()
+        batch = store.apply([
+            {"op": "add", "text": "Write report", "date": "2026.01.07"},
+            {"op": "remove", "text": "Write report"},
+        ], today=date(2026, 1, 6))
+
+        assert batch.files == []
+        assert batch.added == []
+        assert batch.messages == ["Add: Write report to 2026.01.07", "Remove: Write report"]
+        assert not (todo_repo / "2026.01.07.txt").exists()
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+Batch and streaming JSON queries for the perplexity-cli skill.
+
+`batch` reads questions, one per line, from a file or stdin and answers
+them concurrently. Each answer is written as one JSON line in the
+`format_version` 1.0 schema as soon as it completes, so long runs can be
+consumed while they are still going:
+
+    {"format_version": "1.0", "answer": "...", "references": [...],
+     "id": 3, "question": "...", "attempts": 1, "elapsed_seconds": 2.41}
+
+A failed question gives the same document with "answer": null and an
+"error" object, and the exit status is 1.
+
+Lines may also be JSON objects, {"id": ..., "question": ...}; blank lines
+and lines starting with # are skipped.
+
+Requests go through a token bucket (--rate, e.g. 50/min, with --burst)
+shared by all workers (--jobs). "Rate limit exceeded" (HTTP 429), server
+errors and network failures are retried with exponential backoff and
+jitter. A Retry-After from the server pauses the whole bucket, not just
+the one worker.
+
+`stream` answers one question as JSON Lines events while the answer is
+still arriving, so a pipeline can start on the first words:
+
+    {"type": "delta", "text": "Python is"}
+    {"type": "reference", "index": 1, "title": "...", "url": "...", "snippet": "..."}
+    {"type": "final", "format_version": "1.0", "answer": "...", "references": [...],
+     "time_to_first_token_seconds": 0.84, "total_seconds": 4.2}
+
+Deltas concatenate to the answer. Each reference is sent once, when it
+first appears. The final event is the format_version 1.0 document with
+`type` and the timings added. If the stream fails, the last event is
+{"type": "error", ...} and the exit status is 1. A request refused before
+anything was sent is retried like a batch question.
+
+Backends:
+- api: Perplexity's HTTP API (PERPLEXITY_API_KEY; PERPLEXITY_API_BASE,
+  default https://api.perplexity.ai, can point anywhere compatible)
+- cli: one `perplexity-cli query --format json` per question, using the
+  authenticated session
+The default is api when PERPLEXITY_API_KEY is set, otherwise cli. Only
+the api backend streams incrementally; with cli the answer arrives as one
+delta once perplexity-cli has finished.
+
+Usage:
+    python3 scripts/pplx.py [--backend api|cli] batch [FILE|-] [--jobs N]
+                            [--rate N/min] [--burst N] [--retries N]
+    python3 scripts/pplx.py [--backend api|cli] stream "QUESTION" [--retries N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Iterable, Iterator, TextIO
+
+FORMAT_VERSION = "1.0"
+DEFAULT_BASE = "https://api.perplexity.ai"
+DEFAULT_MODEL = "sonar"
+DEFAULT_RATE = "50/min"
+DEFAULT_JOBS = 4
+DEFAULT_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+REQUEST_TIMEOUT = 120
+RATE_UNITS = {"s": 1, "sec": 1, "min": 60, "h": 3600, "hour": 3600}
+
+
+class QueryError(Exception):
+    """A failed question; retryable errors are worth another attempt."""
+
+    def __init__(self, message: str, status: int | None = None,
+                 retryable: bool = False, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class Question:
+    id: object
+    text: str
+
+
+def parse_rate(value: str) -> float:
+    """Requests per second from "N/min", "N/s", "N/hour" or a bare number per second."""
+    count, _, unit = value.partition("/")
+    try:
+        rate = float(count) / RATE_UNITS[unit or "s"]
+    except (ValueError, KeyError):
+        raise ValueError(f"Rate must look like 50/min or 2/s, not {value!r}") from None
+    if rate <= 0:
+        raise ValueError("Rate must be positive")
+    return rate
+
+
+def read_questions(lines: Iterable[str]) -> Iterator[Question]:
+    """Questions from text lines or {"id", "question"} JSON lines."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                item = json.loads(line)
+                yield Question(item.get("id", number), str(item["question"]))
+                continue
+            except (ValueError, KeyError, TypeError, AttributeError):
+                raise ValueError(f"line {number}: expected {{\"question\": ...}}") from None
+        yield Question(number, line)
+
+
+def parse_sse(lines: Iterable[bytes]) -> Iterator[dict]:
+    """JSON payloads of server-sent events, until the stream ends or sends [DONE]."""
+    data: list[str] = []
+    for raw in lines:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        if line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif line == "" and data:
+            payload, data = "\n".join(data), []
+            if payload == "[DONE]":
+                return
+            try:
+                yield json.loads(payload)
+            except ValueError:
+                continue
+    if data and data != ["[DONE]"]:
+        try:
+            yield json.loads("\n".join(data))
+        except ValueError:
+            pass
+
+
+def document(answer: str | None, references: list[dict], **extra) -> dict:
+    """A format_version 1.0 document, with batch fields after the standard ones."""
+    return {"format_version": FORMAT_VERSION, "answer": answer, "references": references,
+            **extra}
+
+
+# Scheduling
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, and burst at once."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _wait(self) -> float:
+        """Take a token and return 0, or return how long to wait for one."""
+        with self.lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self) -> None:
+        while (wait := self._wait()) > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for seconds (the server asked us to slow down)."""
+        with self.lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+def backoff(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter for the given retry (1, 2, ...)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+# Backends
+
+
+def _references(body: dict) -> list[dict]:
+    """format_version references from API search_results, or bare citations."""
+    results = body.get("search_results") or []
+    if results:
+        return [
+            {"index": index, "title": item.get("title") or item.get("url", ""),
+             "url": item.get("url", ""), "snippet": item.get("snippet", "")}
+            for index, item in enumerate(results, 1)
+        ]
+    return [
+        {"index": index, "title": url, "url": url, "snippet": ""}
+        for index, url in enumerate(body.get("citations") or [], 1)
+    ]
+
+
+class ApiBackend:
+    """Perplexity's chat completions HTTP API."""
+
+    def __init__(self, base: str, api_key: str, model: str = DEFAULT_MODEL,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.url = base.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def request(self, question: str, stream: bool = False):
+        """Open a request for question; raises QueryError."""
+        payload = {"model": self.model, "messages": [{"role": "user", "content": question}]}
+        if stream:
+            payload["stream"] = True
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream" if stream else "application/json",
+            },
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After") if e.headers else None
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            message = "Rate limit exceeded" if e.code == 429 else f"HTTP {e.code}: {e.reason}"
+            raise QueryError(message, e.code, e.code == 429 or e.code >= 500,
+                             retry_after) from None
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            reason = getattr(e, "reason", e)
+            raise QueryError(f"Network error: {reason}", retryable=True) from None
+
+    def stream(self, question: str) -> Iterator[tuple[str, object]]:
+        """("delta", text) and ("references", list) as the answer arrives."""
+        with self.request(question, stream=True) as response:
+            try:
+                for chunk in parse_sse(response):
+                    for choice in chunk.get("choices") or []:
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            yield "delta", text
+                    references = _references(chunk)
+                    if references:
+                        yield "references", references
+            except (OSError, http.client.HTTPException) as e:
+                raise QueryError(f"Stream interrupted: {e}", retryable=True) from None
+
+    def ask(self, question: str) -> dict:
+        with self.request(question) as response:
+            try:
+                body = json.load(response)
+                answer = body["choices"][0]["message"]["content"]
+            except (OSError, http.client.HTTPException) as e:
+                raise QueryError(f"Response interrupted: {e}", retryable=True) from None
+            except (ValueError, KeyError, IndexError, TypeError):
+                raise QueryError("Malformed response from the API") from None
+        return document(answer, _references(body))
+
+
+class CliBackend:
+    """The perplexity-cli command, using its authenticated session."""
+
+    def __init__(self, command: list[str] | None = None, timeout: float = REQUEST_TIMEOUT):
+        self.command = command or ["perplexity-cli"]
+        self.timeout = timeout
+
+    def ask(self, question: str) -> dict:
+        try:
+            result = subprocess.run([*self.command, "query", "--format", "json", question],
+                                    capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise QueryError("Timed out", retryable=True) from None
+        except OSError as e:
+            raise QueryError(f"Cannot run {self.command[0]}: {e}") from None
+        if result.returncode != 0:
+            message = result.stderr.strip().splitlines()[-1] if result.stderr.strip() \
+                else f"exit status {result.returncode}"
+            lowered = result.stderr.lower()
+            rate_limited = "rate limit" in lowered
+            retryable = rate_limited or "network error" in lowered
+            raise QueryError(message, 429 if rate_limited else None, retryable)
+        try:
+            data = json.loads(result.stdout)
+        except ValueError:
+            raise QueryError("perplexity-cli did not print JSON") from None
+        return document(data.get("answer"), data.get("references", []))
+
+    def stream(self, question: str) -> Iterator[tuple[str, object]]:
+        """The whole answer as one delta: perplexity-cli's JSON is not incremental."""
+        result = self.ask(question)
+        yield "delta", result["answer"] or ""
+        yield "references", result["references"]
+
+
+# Batch
+
+
+class Batch:
+    """Runs questions through a backend under a shared token bucket."""
+
+    def __init__(self, backend, bucket: TokenBucket, retries: int = DEFAULT_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, sleep: Callable[[float], None] = time.sleep):
+        self.backend = backend
+        self.bucket = bucket
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.sleep = sleep
+
+    def answer(self, question: Question) -> dict:
+        """One question, retried as needed; always returns a document."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            self.bucket.acquire()
+            try:
+                result = self.backend.ask(question.text)
+                error = None
+            except QueryError as e:
+                result, error = None, e
+            if error is None or not error.retryable or attempt > self.retries:
+                break
+            if error.retry_after is not None:
+                self.bucket.pause(error.retry_after)
+            self.sleep(backoff(attempt, self.backoff_base))
+
+        extra = {"id": question.id, "question": question.text, "attempts": attempt,
+                 "elapsed_seconds": round(time.monotonic() - started, 3)}
+        if error is not None:
+            return document(None, [], **extra,
+                            error={"message": str(error), "status": error.status})
+        return {**result, **extra}
+
+    def run(self, questions: Iterable[Question], jobs: int = DEFAULT_JOBS) -> Iterator[dict]:
+        """Answers in the order they complete."""
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(self.answer, question) for question in questions]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def stream_events(
+    backend,
+    question: str,
+    retries: int = DEFAULT_RETRIES,
+    backoff_base: float = BACKOFF_BASE,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[dict]:
+    """Delta, reference and final (or error) events for one question."""
+    started = clock()
+    first = None
+    parts: list[str] = []
+    references: dict[str, dict] = {}
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            for kind, value in backend.stream(question):
+                if kind == "delta":
+                    if first is None:
+                        first = clock() - started
+                    parts.append(value)
+                    yield {"type": "delta", "text": value}
+                    continue
+                for reference in value:
+                    key = reference.get("url") or reference.get("title")
+                    if key in references:
+                        continue
+                    reference = {"index": len(references) + 1,
+                                 **{k: v for k, v in reference.items() if k != "index"}}
+                    references[key] = reference
+                    yield {"type": "reference", **reference}
+            break
+        except QueryError as e:
+            # Once anything was sent a retry would repeat it: report instead
+            if parts or references or not e.retryable or attempt > retries:
+                yield {"type": "error", "message": str(e), "status": e.status,
+                       "partial_answer": "".join(parts)}
+                return
+            sleep(e.retry_after if e.retry_after is not None else backoff(attempt, backoff_base))
+
+    total = clock() - started
+    yield {
+        "type": "final",
+        **document("".join(parts), list(references.values())),
+        "time_to_first_token_seconds": round(first if first is not None else total, 3),
+        "total_seconds": round(total, 3),
+    }
+
+
+def make_backend(name: str | None, model: str):
+    api_key = os.environ.get("PERPLEXITY_API_KEY")
+    name = name or ("api" if api_key else "cli")
+    if name == "cli":
+        return CliBackend()
+    if not api_key:
+        raise ValueError("The api backend needs PERPLEXITY_API_KEY")
+    return ApiBackend(os.environ.get("PERPLEXITY_API_BASE", DEFAULT_BASE), api_key, model)
+
+
+def _open_input(path: str) -> ContextManager[TextIO]:
+    """The questions file, or stdin for "-" (left open on exit)."""
+    return nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=("api", "cli"),
+                        help="default: api if PERPLEXITY_API_KEY is set, otherwise cli")
+    parser.add_argument("--model", default=os.environ.get("PERPLEXITY_MODEL", DEFAULT_MODEL),
+                        help="model for the api backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="answer many questions as JSON Lines")
+    batch.add_argument("input", nargs="?", default="-",
+                       help="file of questions, or - for stdin (default)")
+    batch.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                       help="questions in flight at once")
+    batch.add_argument("--rate", default=DEFAULT_RATE,
+                       help="requests allowed, e.g. 50/min or 2/s")
+    batch.add_argument("--burst", type=int, default=1,
+                       help="requests allowed at once before the rate applies")
+    batch.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                       help="retries per question for rate limits and transient errors")
+    batch.add_argument("--backoff", type=float, default=BACKOFF_BASE,
+                       help="first backoff in seconds, doubled on each retry")
+
+    stream = commands.add_parser("stream", help="answer one question as JSON Lines events")
+    stream.add_argument("question")
+    stream.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="retries for rate limits and transient errors before output")
+    stream.add_argument("--backoff", type=float, default=BACKOFF_BASE,
+                        help="first backoff in seconds, doubled on each retry")
+    args = parser.parse_args(argv)
+
+    try:
+        backend = make_backend(args.backend, args.model)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "stream":
+        failed = False
+        for event in stream_events(backend, args.question, args.retries, args.backoff):
+            failed = event["type"] == "error"
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+        if failed:
+            print(f"Error: {event['message']}", file=sys.stderr)
+        return 1 if failed else 0
+
+    try:
+        bucket = TokenBucket(parse_rate(args.rate), args.burst)
+        with _open_input(args.input) as source:
+            questions = list(read_questions(source))
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    failed = 0
+    runner = Batch(backend, bucket, args.retries, args.backoff)
+    for result in runner.run(questions, max(args.jobs, 1)):
+        failed += result.get("error") is not None
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+    if failed:
+        print(f"Error: {failed} of {len(questions)} question(s) failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
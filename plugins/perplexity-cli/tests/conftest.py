@@ -0,0 +1,121 @@
+"""
+Pytest configuration and fixtures for perplexity-cli testing.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+PLUGIN_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PLUGIN_ROOT / "skills" / "perplexity-cli" / "scripts"))
+
+
+class StubApi(ThreadingHTTPServer):
+    """
+    A local stand-in for the chat completions API.
+
+    Questions containing "slow" take `delay` seconds; `failures[question]`
+    lists status codes to return before answering; questions in `truncated`
+    get a body that stops short of its Content-Length; every request is
+    recorded with its arrival time. Streaming requests get the answer word
+    by word as server-sent events, `stream_delay` seconds apart.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.failures: dict[str, list[int]] = {}
+        self.truncated: set[str] = set()
+        self.retry_after: str | None = None
+        self.delay = 0.3
+        self.stream_delay = 0.1
+        self.requests: list[tuple[float, str]] = []
+        self.lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        question = body["messages"][-1]["content"]
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), question))
+            pending = server.failures.get(question, [])
+            status = pending.pop(0) if pending else 200
+        if status != 200:
+            self.send_response(status)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+            self.end_headers()
+            return
+        if "slow" in question:
+            time.sleep(server.delay)
+        answer = f"Answer to {question}"
+        if body.get("stream"):
+            self.stream(answer)
+            return
+        if question in server.truncated:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b'{"choices": [')
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": answer}}],
+            "search_results": [
+                {"title": "Docs", "url": "https://example.com/docs", "snippet": "From docs"},
+            ],
+            "citations": ["https://example.com/docs"],
+        }).encode())
+
+    def stream(self, answer):
+        """Send answer in word chunks; the second reference arrives with the last word."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        docs = {"title": "Docs", "url": "https://example.com/docs", "snippet": "From docs"}
+        guide = {"title": "Guide", "url": "https://example.com/guide", "snippet": "A guide"}
+        words = answer.split(" ")
+        for number, word in enumerate(words):
+            last = number == len(words) - 1
+            chunk = {
+                "choices": [{"delta": {"content": word if number == 0 else " " + word}}],
+                "search_results": [docs, guide] if last else [docs],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if not last:
+                time.sleep(self.server.stream_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    """A running StubApi, with the api backend pointed at it."""
+    server = StubApi()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05},
+                              daemon=True)
+    thread.start()
+    monkeypatch.setenv("PERPLEXITY_API_KEY", "test-key")
+    monkeypatch.setenv("PERPLEXITY_API_BASE", server.base)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,259 @@
+"""
+Tests for scripts/pplx.py (batch and streaming queries).
+"""
+
+import io
+import json
+import stat
+import sys
+
+import pytest
+
+import pplx
+from pplx import Batch, CliBackend, Question, TokenBucket
+
+pytestmark = pytest.mark.unit
+
+
+class Clock:
+    """A clock that only moves when slept on."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def batch(tmp_path, capsys):
+    """Run `pplx.py batch` on some questions; returns (exit code, documents in order)."""
+
+    def run(lines, *args):
+        path = tmp_path / "questions.txt"
+        path.write_text("\n".join(lines) + "\n")
+        code = pplx.main(["batch", str(path), "--backoff", "0", *args])
+        out = capsys.readouterr().out
+        return code, [json.loads(line) for line in out.splitlines()]
+
+    return run
+
+
+class TestInput:
+    """Test reading questions and rates."""
+
+    def test_reads_lines_and_json_objects(self):
+        """Verify blank and comment lines are skipped and JSON lines keep their id."""
+        questions = list(pplx.read_questions([
+            "# header", "first question", "", '{"id": "q7", "question": "second"}',
+        ]))
+        assert questions == [Question(2, "first question"), Question("q7", "second")]
+
+    def test_rejects_json_without_question(self):
+        """Verify a JSON line without a question is an error, not a question."""
+        with pytest.raises(ValueError, match="line 1"):
+            list(pplx.read_questions(['{"id": 1}']))
+
+    def test_parse_rate(self):
+        """Verify rates are converted to requests per second."""
+        assert pplx.parse_rate("120/min") == 2
+        assert pplx.parse_rate("3") == 3
+        with pytest.raises(ValueError):
+            pplx.parse_rate("fast")
+
+
+class TestTokenBucket:
+    """Test the shared rate limiter."""
+
+    def test_burst_then_rate(self):
+        """Verify burst requests go at once and the rest are spaced by the rate."""
+        clock = Clock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+        times = []
+        for _ in range(4):
+            bucket.acquire()
+            times.append(clock.now)
+        assert times == [0, 0, 0.5, 1.0]
+
+    def test_pause_holds_every_caller(self):
+        """Verify a server's Retry-After stops all tokens until it has passed."""
+        clock = Clock()
+        bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+        bucket.pause(3)
+        bucket.acquire()
+        assert clock.now == pytest.approx(3.1)
+
+
+class TestBatch:
+    """Test batch runs against a local stub API."""
+
+    def test_answers_in_format_version_schema(self, stub_api, batch):
+        """Verify each question gives one format_version 1.0 document."""
+        code, results = batch(["How do I undo a commit?", "What is a rebase?"], "--rate", "100/s")
+        assert code == 0
+        assert sorted(r["id"] for r in results) == [1, 2]
+        result = next(r for r in results if r["id"] == 1)
+        assert result["format_version"] == "1.0"
+        assert result["answer"] == "Answer to How do I undo a commit?"
+        assert result["references"] == [
+            {"index": 1, "title": "Docs", "url": "https://example.com/docs",
+             "snippet": "From docs"},
+        ]
+        assert result["attempts"] == 1
+
+    def test_streams_results_as_they_complete(self, stub_api, batch):
+        """Verify a fast question is written before an earlier, slower one."""
+        code, results = batch(["slow question", "quick question"],
+                              "--jobs", "2", "--rate", "100/s", "--burst", "2")
+        assert code == 0
+        assert [r["question"] for r in results] == ["quick question", "slow question"]
+
+    def test_retries_rate_limits_and_server_errors(self, stub_api, batch):
+        """Verify 429 and 5xx responses are retried until an answer arrives."""
+        stub_api.failures["flaky"] = [429, 503]
+        code, results = batch(["flaky"], "--rate", "100/s")
+        assert code == 0
+        assert results[0]["attempts"] == 3
+        assert results[0]["answer"] == "Answer to flaky"
+
+    def test_reports_failures_without_stopping(self, stub_api, batch):
+        """Verify exhausted retries and client errors become error documents."""
+        stub_api.failures["down"] = [500] * 10
+        stub_api.failures["bad"] = [400]
+        code, results = batch(["down", "bad", "fine"], "--rate", "100/s", "--retries", "2")
+        assert code == 1
+        by_question = {r["question"]: r for r in results}
+        assert by_question["down"]["attempts"] == 3
+        assert by_question["down"]["error"]["status"] == 500
+        assert by_question["down"]["answer"] is None
+        assert by_question["bad"]["attempts"] == 1
+        assert by_question["fine"]["answer"] == "Answer to fine"
+
+    def test_truncated_response_becomes_error_document(self, stub_api, batch):
+        """Verify a body cut short is retried and reported, not raised."""
+        stub_api.truncated.add("cut")
+        code, results = batch(["cut", "fine"], "--rate", "100/s", "--retries", "1")
+        assert code == 1
+        by_question = {r["question"]: r for r in results}
+        assert by_question["cut"]["attempts"] == 2
+        assert by_question["cut"]["answer"] is None
+        assert by_question["cut"]["error"]["message"].startswith("Response interrupted")
+        assert by_question["fine"]["answer"] == "Answer to fine"
+
+    def test_reads_stdin_without_closing_it(self, stub_api, monkeypatch, capsys):
+        """Verify "-" reads questions from stdin and leaves it open."""
+        stdin = io.StringIO("from stdin\n")
+        monkeypatch.setattr(sys, "stdin", stdin)
+        assert pplx.main(["batch", "-", "--backoff", "0", "--rate", "100/s"]) == 0
+        assert json.loads(capsys.readouterr().out)["answer"] == "Answer to from stdin"
+        assert not stdin.closed
+
+    def test_rate_limits_concurrent_workers(self, stub_api, batch):
+        """Verify the token bucket spaces requests even with many workers."""
+        code, _ = batch([f"question {n}" for n in range(5)], "--jobs", "5", "--rate", "20/s")
+        assert code == 0
+        times = sorted(when for when, _ in stub_api.requests)
+        assert times[-1] - times[0] >= 0.18
+
+    def test_retry_after_pauses_the_bucket(self, stub_api):
+        """Verify Retry-After delays the next request from any worker."""
+        stub_api.failures["limited"] = [429]
+        stub_api.retry_after = "0.3"
+        backend = pplx.make_backend("api", "sonar")
+        runner = Batch(backend, TokenBucket(100, 1), retries=3, backoff_base=0)
+        result = runner.answer(Question(1, "limited"))
+        assert result["attempts"] == 2
+        (first, _), (second, _) = stub_api.requests
+        assert second - first >= 0.3
+
+
+@pytest.fixture
+def stream(capsys):
+    """Run `pplx.py stream QUESTION`; returns (exit code, events)."""
+
+    def run(question, *args):
+        code = pplx.main(["stream", question, "--backoff", "0", *args])
+        out = capsys.readouterr().out
+        return code, [json.loads(line) for line in out.splitlines()]
+
+    return run
+
+
+class TestStream:
+    """Test streaming JSON Lines events against a local stub API."""
+
+    def test_parse_sse(self):
+        """Verify events are split on blank lines and end at [DONE]."""
+        lines = [b": keep-alive\n", b"data: {\"a\": 1}\n", b"\n", b"data: {\"b\":\n",
+                 b"data: 2}\n", b"\n", b"data: [DONE]\n", b"\n", b"data: {\"c\": 3}\n"]
+        assert list(pplx.parse_sse(lines)) == [{"a": 1}, {"b": 2}]
+
+    def test_deltas_references_and_final(self, stub_api, stream):
+        """Verify deltas build the answer and the final event is the 1.0 document."""
+        code, events = stream("What is Rust?")
+        assert code == 0
+        deltas = [e["text"] for e in events if e["type"] == "delta"]
+        assert "".join(deltas) == "Answer to What is Rust?"
+        assert len(deltas) == 5
+        references = [e for e in events if e["type"] == "reference"]
+        assert [(r["index"], r["url"]) for r in references] == [
+            (1, "https://example.com/docs"), (2, "https://example.com/guide"),
+        ]
+        final = events[-1]
+        assert final["type"] == "final"
+        assert final["format_version"] == "1.0"
+        assert final["answer"] == "Answer to What is Rust?"
+        assert [r["title"] for r in final["references"]] == ["Docs", "Guide"]
+        assert {k: v for k, v in references[0].items() if k != "type"} == final["references"][0]
+
+    def test_first_token_before_the_answer_ends(self, stub_api, stream):
+        """Verify the first delta is emitted before the rest of the answer arrives."""
+        stub_api.stream_delay = 0.15
+        _, events = stream("What is Rust?")
+        final = events[-1]
+        assert final["total_seconds"] >= 0.45
+        assert final["time_to_first_token_seconds"] < 0.15
+
+    def test_retries_before_output(self, stub_api, stream):
+        """Verify a rate limit before anything was sent is retried."""
+        stub_api.failures["What is Rust?"] = [429]
+        code, events = stream("What is Rust?")
+        assert code == 0
+        assert events[-1]["type"] == "final"
+        assert len(stub_api.requests) == 2
+
+    def test_error_event(self, stub_api, stream):
+        """Verify a refused request ends the stream with an error event."""
+        stub_api.failures["What is Rust?"] = [400]
+        code, events = stream("What is Rust?")
+        assert code == 1
+        assert events == [{"type": "error", "message": "HTTP 400: Bad Request",
+                           "status": 400, "partial_answer": ""}]
+
+
+class TestCliBackend:
+    """Test the perplexity-cli backend."""
+
+    def test_reads_cli_json_and_rate_limit_errors(self, tmp_path):
+        """Verify CLI output is used as-is and "Rate limit exceeded" is retryable."""
+        script = tmp_path / "perplexity-cli"
+        script.write_text(
+            f"#!{sys.executable}\n"
+            "import json, sys\n"
+            "if sys.argv[-1] == 'limited':\n"
+            "    print('Error: Rate limit exceeded', file=sys.stderr)\n"
+            "    sys.exit(1)\n"
+            "print(json.dumps({'format_version': '1.0', 'answer': 'yes',\n"
+            "                  'references': [{'index': 1, 'title': 't', 'url': 'u',\n"
+            "                                  'snippet': 's'}]}))\n"
+        )
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        backend = CliBackend([str(script)])
+        assert backend.ask("anything")["references"][0]["url"] == "u"
+        assert [kind for kind, _ in backend.stream("anything")] == ["delta", "references"]
+        with pytest.raises(pplx.QueryError) as error:
+            backend.ask("limited")
+        assert error.value.retryable and error.value.status == 429
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Generate .claude-plugin/marketplace.json and its search index.
+
+The catalog is built from the plugins themselves: each directory under
+`plugins/` contributes one entry from its `.claude-plugin/plugin.json`, or
+from its SKILL.md frontmatter when it is a bare skill. Top-level fields
+(name, description, owner) are kept from the existing marketplace.json.
+
+Builds are incremental: per-plugin content hashes and the entry and index
+terms built from them are kept in `.cache/build-marketplace.json`, and only
+plugins whose hashes changed are parsed again. Output files are rewritten
+only when their content changes.
+
+Alongside the catalog, `.claude-plugin/marketplace-index.json` holds an
+inverted index from terms (from names, keywords and descriptions) to the
+plugins that mention them, weighted by field, so clients can search the
+marketplace without fetching every plugin.
+
+Usage:
+    python3 scripts/build_marketplace.py [--root .] [--check] [--no-cache]
+    python3 scripts/build_marketplace.py --search "QUERY"
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from plugin_model import (
+    MARKETPLACE_PATH,
+    REPO_ROOT,
+    TEST_PATHS,
+    file_hashes,
+    load_plugin,
+    plugin_dirs,
+    tree_digest,
+)
+
+INDEX_PATH = Path(".claude-plugin") / "marketplace-index.json"
+CACHE_PATH = Path(".cache") / "build-marketplace.json"
+INDEX_VERSION = 1
+DEFAULT_REPO = "jamiemills/plugin-marketplace"
+
+# Bumped when entries or index terms are built differently
+BUILD_VERSION = 1
+
+# A match in a name counts more than one in a keyword, then a description
+FIELD_WEIGHTS = {"name": 3, "keywords": 2, "description": 1}
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into",
+    "is", "it", "its", "of", "on", "only", "or", "the", "their", "this", "to",
+    "when", "with", "your", "you",
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words of two or more characters, without stopwords."""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _terms(entry: dict) -> dict[str, int]:
+    """Map each term in an entry to its best field weight."""
+    fields = {
+        "name": [entry["name"]],
+        "keywords": entry.get("keywords", []),
+        "description": [entry.get("description", "")],
+    }
+    terms: dict[str, int] = {}
+    for field, values in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for value in values:
+            # Hyphenated names and keywords are searchable whole and by part
+            words = tokenize(value)
+            if field != "description" and "-" in value:
+                words.append(value.lower())
+            for word in words:
+                terms[word] = max(terms.get(word, 0), weight)
+    return terms
+
+
+def build_entry(root: Path, hashes: dict[str, list], repo: str, owner: dict) -> dict:
+    """Build one catalog entry from a plugin directory."""
+    plugin = load_plugin(root, hashes)
+    manifest = plugin.manifest if isinstance(plugin.manifest, dict) else {}
+    skill = plugin.skills[0].frontmatter if plugin.skills else {}
+
+    author = manifest.get("author")
+    entry = {
+        "name": manifest.get("name") or skill.get("name") or plugin.name,
+        "source": {
+            "source": "github",
+            "repo": repo,
+            "path": f"plugins/{plugin.name}",
+        },
+        "description": manifest.get("description") or skill.get("description") or "",
+    }
+    if manifest.get("version"):
+        entry["version"] = manifest["version"]
+    entry["author"] = {
+        "name": author.get("name") if isinstance(author, dict) else owner.get("name", "")
+    }
+    keywords = manifest.get("keywords") or skill.get("keywords") or []
+    entry["keywords"] = [k for k in keywords if isinstance(k, str)]
+    if plugin.kind == "skill":
+        # No plugin.json: the marketplace entry is the whole definition
+        entry["strict"] = False
+        entry["skills"] = ["./"]
+    return entry
+
+
+def build_index(entries: list[dict], terms: dict[str, dict[str, int]]) -> dict:
+    """Invert per-plugin terms into {term: [[position, weight], ...]}."""
+    names = [entry["name"] for entry in entries]
+    inverted: dict[str, list[list[int]]] = defaultdict(list)
+    for position, name in enumerate(names):
+        for term, weight in terms[name].items():
+            inverted[term].append([position, weight])
+    return {
+        "version": INDEX_VERSION,
+        "weights": FIELD_WEIGHTS,
+        "plugins": [
+            {"name": e["name"], "description": e["description"], "version": e.get("version")}
+            for e in entries
+        ],
+        "terms": dict(sorted(inverted.items())),
+    }
+
+
+def search(index: dict, query: str, limit: int = 10) -> list[tuple[str, int]]:
+    """
+    Rank plugins for a query using the index alone.
+
+    Each query word matches terms it is a prefix of; a plugin scores the
+    weight of its best matching term for every query word.
+    """
+    # Terms are stored sorted, so a prefix's matches are one contiguous run
+    terms = list(index["terms"])
+    scores: dict[int, int] = defaultdict(int)
+    for word in tokenize(query):
+        best: dict[int, int] = {}
+        start = bisect.bisect_left(terms, word)
+        for term in terms[start:bisect.bisect_left(terms, word + "\uffff", start)]:
+            for position, weight in index["terms"][term]:
+                best[position] = max(best.get(position, 0), weight)
+        for position, weight in best.items():
+            scores[position] += weight
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(index["plugins"][position]["name"], score) for position, score in ranked[:limit]]
+
+
+def _load_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data.get("plugins", {}) if data.get("version") == BUILD_VERSION else {}
+
+
+def _render(data: dict, compact: bool = False) -> str:
+    if compact:
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False) + "\n"
+    return json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+
+
+def build(repo: Path = REPO_ROOT, use_cache: bool = True) -> tuple[dict, dict, list[str]]:
+    """
+    Build the catalog and index for repo.
+
+    Returns (marketplace, index, rebuilt), where rebuilt names the plugins
+    that had to be parsed again.
+    """
+    try:
+        current = json.loads((repo / MARKETPLACE_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        current = {}
+    header = {key: value for key, value in current.items() if key != "plugins"}
+    header.setdefault("name", repo.name)
+    header.setdefault("owner", {"name": ""})
+    existing = [e for e in current.get("plugins", []) if isinstance(e, dict)]
+    repo_slug = next(
+        (e["source"]["repo"] for e in existing
+         if isinstance(e.get("source"), dict) and e["source"].get("repo")),
+        DEFAULT_REPO,
+    )
+
+    cache_path = repo / CACHE_PATH
+    cache = _load_cache(cache_path) if use_cache else {}
+    fresh, rebuilt = {}, []
+    for root in plugin_dirs(repo):
+        cached = cache.get(root.name, {})
+        # Only what is published counts; editing a plugin's tests changes nothing here
+        hashes = file_hashes(root, cached.get("files"), exclude=TEST_PATHS)
+        digest = tree_digest(hashes)
+        context = [repo_slug, header["owner"]]
+        if cached.get("digest") == digest and cached.get("context") == context:
+            fresh[root.name] = {**cached, "files": hashes}
+            continue
+        entry = build_entry(root, hashes, repo_slug, header["owner"])
+        fresh[root.name] = {
+            "digest": digest,
+            "files": hashes,
+            "context": context,
+            "entry": entry,
+            "terms": _terms(entry),
+        }
+        rebuilt.append(root.name)
+
+    entries = [fresh[name]["entry"] for name in sorted(fresh)]
+    terms = {fresh[name]["entry"]["name"]: fresh[name]["terms"] for name in fresh}
+    marketplace = {**header, "plugins": entries}
+    index = build_index(entries, terms)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"version": BUILD_VERSION, "plugins": fresh}) + "\n")
+    return marketplace, index, rebuilt
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Write content unless the file already holds it; return whether it was written."""
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", type=Path, default=REPO_ROOT,
+                        help="marketplace repository root")
+    parser.add_argument("--check", action="store_true",
+                        help="fail if the generated files are out of date instead of writing")
+    parser.add_argument("--no-cache", action="store_true", help="rebuild every plugin")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="search the generated index instead of building")
+    args = parser.parse_args(argv)
+    repo = args.root.resolve()
+
+    if args.search is not None:
+        try:
+            index = json.loads((repo / INDEX_PATH).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read {INDEX_PATH}: {e}", file=sys.stderr)
+            return 1
+        for name, score in search(index, args.search):
+            print(f"{score:3d}  {name}")
+        return 0
+
+    marketplace, index, rebuilt = build(repo, not args.no_cache)
+    # The index is for machines and grows with the catalog, so keep it compact
+    outputs = {MARKETPLACE_PATH: _render(marketplace), INDEX_PATH: _render(index, compact=True)}
+
+    if args.check:
+        stale = []
+        for path, content in outputs.items():
+            try:
+                if (repo / path).read_text(encoding="utf-8") != content:
+                    stale.append(path)
+            except OSError:
+                stale.append(path)
+        for path in stale:
+            print(f"Error: {path} is out of date; run scripts/build_marketplace.py",
+                  file=sys.stderr)
+        return 1 if stale else 0
+
+    written = [path for path, content in outputs.items() if write_if_changed(repo / path, content)]
+    print(f"Built {len(marketplace['plugins'])} plugin(s), rebuilt {len(rebuilt)}"
+          + (f" ({', '.join(rebuilt)})" if rebuilt else "")
+          + f"; wrote {', '.join(str(p) for p in written) if written else 'nothing'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Content-addressed plugin bundles for offline and repeat installs.
+
+`pack` turns each plugin in the marketplace into a bundle in a mirror
+directory:
+
+    MIRROR/marketplace.json                     catalog, with a "bundles" map
+                                                (version -> bundle) per entry
+    MIRROR/bundles/NAME/VERSION-DIGEST.tar.gz   reproducible archive
+    MIRROR/bundles/NAME/VERSION-DIGEST.json     file list: path, sha256, mode
+    MIRROR/objects/ab/cdef...                   one blob per file content
+
+Bundles are named by the plugin's content digest, so packing an unchanged
+plugin does nothing and every published version stays available. Changed
+content under a version that is already published is refused; bump the
+version first. A plugin's own tests (tests/ and pytest.ini) are not packed.
+
+`install` copies a plugin out of a mirror into a destination directory
+through a local object cache (PLUGIN_BUNDLE_CACHE, default
+~/.cache/plugin-marketplace). Files already in the cache are hardlinked
+into place read-only (executables, --copy and cross-filesystem installs
+are copied); only missing objects are read from the mirror, one by one,
+falling back to the archive. Updating
+an installed plugin touches only the files whose content changed. The
+mirror is a local directory, so installs work with no network at all.
+
+Usage:
+    python3 scripts/plugin_bundle.py pack --mirror DIR [--root .]
+    python3 scripts/plugin_bundle.py install NAME --mirror DIR --dest DIR
+                                     [--version V] [--cache DIR] [--copy]
+    python3 scripts/plugin_bundle.py verify --dest DIR
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+
+from build_marketplace import build
+from plugin_model import REPO_ROOT, TEST_PATHS, file_hashes, plugin_dirs, tree_digest
+
+BUNDLE_FORMAT = 1
+CATALOG_NAME = "marketplace.json"
+INSTALLED_NAME = ".bundle.json"
+DEFAULT_CACHE = Path.home() / ".cache" / "plugin-marketplace"
+
+
+class BundleError(Exception):
+    """A bundle, mirror or install that cannot be used."""
+
+
+@dataclass
+class InstallResult:
+    name: str
+    version: str
+    linked: list[str] = field(default_factory=list)
+    copied: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    fetched: int = 0
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def object_path(store: Path, sha: str) -> Path:
+    """Where the blob for sha lives in an object store."""
+    return store / "objects" / sha[:2] / sha[2:]
+
+
+def _store_object(store: Path, sha: str, data: bytes | None = None,
+                  source: Path | None = None) -> Path:
+    """Add a blob to a store, verifying its hash; objects are read-only."""
+    target = object_path(store, sha)
+    if target.exists():
+        return target
+    if data is None:
+        data = source.read_bytes()
+    if hashlib.sha256(data).hexdigest() != sha:
+        raise BundleError(f"Object {sha[:12]} does not match its hash")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.name}.{os.getpid()}")
+    partial.write_bytes(data)
+    partial.chmod(0o444)
+    os.replace(partial, target)
+    return target
+
+
+def _archive(root: Path, files: list[dict]) -> bytes:
+    """A reproducible tar.gz of files: sorted, zero mtimes and owners."""
+    buffer = io.BytesIO()
+    # mtime=0 in the gzip header too, so identical content gives identical bytes
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0, filename="") as gz, \
+            tarfile.open(fileobj=gz, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for item in files:
+            data = (root / item["path"]).read_bytes()
+            info = tarfile.TarInfo(item["path"])
+            info.size = len(data)
+            info.mode = item["mode"]
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def pack(mirror: Path, repo: Path = REPO_ROOT) -> list[str]:
+    """Write bundles for every plugin into mirror; return the ones created."""
+    marketplace, _, _ = build(repo)
+    catalog_path = mirror / CATALOG_NAME
+    try:
+        previous = {e["name"]: e for e in json.loads(catalog_path.read_text())["plugins"]}
+    except (OSError, ValueError, KeyError):
+        previous = {}
+
+    roots = {root.name: root for root in plugin_dirs(repo)}
+    created = []
+    entries = []
+    for entry in marketplace["plugins"]:
+        root = roots[Path(entry["source"]["path"]).name]
+        hashes = file_hashes(root, exclude=TEST_PATHS)
+        digest = tree_digest(hashes)
+        # Bare skills have no version of their own; their digest stands in
+        version = entry.get("version") or f"0+{digest[:12]}"
+        label = f"{version}-{digest[:12]}" if entry.get("version") else digest[:12]
+        stem = f"bundles/{entry['name']}/{label}"
+        bundles = dict(previous.get(entry["name"], {}).get("bundles", {}))
+        published = bundles.get(version)
+        if published and published["digest"] != digest:
+            # Nothing is published until the catalog is written below
+            raise BundleError(f"{entry['name']} {version} is already published with "
+                              f"different content; bump its version")
+        files = [
+            {
+                "path": path,
+                "sha256": hashes[path][2],
+                "size": hashes[path][1],
+                "mode": 0o755 if (root / path).stat().st_mode & 0o111 else 0o644,
+            }
+            for path in sorted(hashes)
+        ]
+
+        archive = mirror / f"{stem}.tar.gz"
+        if not archive.exists():
+            archive.parent.mkdir(parents=True, exist_ok=True)
+            archive.write_bytes(_archive(root, files))
+            (mirror / f"{stem}.json").write_text(json.dumps({
+                "format": BUNDLE_FORMAT,
+                "name": entry["name"],
+                "version": version,
+                "digest": digest,
+                "files": files,
+            }, indent=1) + "\n")
+            for item in files:
+                _store_object(mirror, item["sha256"], source=root / item["path"])
+            created.append(f"{entry['name']}@{version}")
+
+        bundles[version] = {
+            "archive": f"{stem}.tar.gz",
+            "sha256": sha256_file(archive),
+            "manifest": f"{stem}.json",
+            "digest": digest,
+        }
+        entries.append({**entry, "bundles": bundles})
+
+    catalog_path.parent.mkdir(parents=True, exist_ok=True)
+    catalog_path.write_text(json.dumps({**marketplace, "plugins": entries}, indent=2) + "\n")
+    return created
+
+
+def _bundle(mirror: Path, name: str, version: str | None) -> tuple[str, dict, dict]:
+    """Find a plugin's bundle in a mirror: (version, bundle, file manifest)."""
+    try:
+        catalog = json.loads((mirror / CATALOG_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Cannot read {mirror / CATALOG_NAME}: {e}") from None
+    entry = next((e for e in catalog.get("plugins", []) if e.get("name") == name), None)
+    if entry is None:
+        raise BundleError(f"No plugin {name!r} in {mirror}")
+    bundles = entry.get("bundles", {})
+    version = version or entry.get("version") or next(reversed(bundles), None)
+    if version not in bundles:
+        raise BundleError(f"No bundle for {name} {version} in {mirror}")
+    bundle = bundles[version]
+    manifest = json.loads((mirror / bundle["manifest"]).read_text())
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"Unsupported bundle format {manifest.get('format')}")
+    return version, bundle, manifest
+
+
+def _fetch_missing(mirror: Path, cache: Path, bundle: dict, missing: set[str]) -> int:
+    """Bring missing objects into the cache, from mirror objects or the archive."""
+    remaining = set()
+    for sha in missing:
+        source = object_path(mirror, sha)
+        if source.exists():
+            _store_object(cache, sha, source=source)
+        else:
+            remaining.add(sha)
+    if remaining:
+        archive = mirror / bundle["archive"]
+        if sha256_file(archive) != bundle["sha256"]:
+            raise BundleError(f"{archive} does not match its recorded hash")
+        with tarfile.open(archive) as tar:
+            for member in tar.getmembers():
+                data = tar.extractfile(member).read() if member.isfile() else None
+                sha = hashlib.sha256(data).hexdigest() if data is not None else None
+                if sha in remaining:
+                    _store_object(cache, sha, data=data)
+                    remaining.discard(sha)
+    if remaining:
+        raise BundleError(f"{len(remaining)} object(s) missing from {mirror}")
+    return len(missing)
+
+
+def _target(dest: Path, path: str) -> Path:
+    """Where a manifest path goes under dest; anything outside is refused."""
+    relative = PurePosixPath(path)
+    if not path or relative.is_absolute() or ".." in relative.parts:
+        raise BundleError(f"Unsafe path {path!r} in bundle manifest")
+    target = dest / relative
+    if not target.resolve().is_relative_to(dest.resolve()):
+        raise BundleError(f"Unsafe path {path!r} in bundle manifest")
+    return target
+
+
+def _place(source: Path, target: Path, mode: int, copy: bool) -> bool:
+    """Hardlink (or copy) a cached object to target; return True if linked."""
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # A hardlink shares the object's read-only, non-executable mode, so
+    # executables (and anything across filesystems) are copied instead
+    if not copy and not mode & 0o111:
+        try:
+            os.link(source, target)
+            return True
+        except OSError:
+            pass
+    shutil.copyfile(source, target)
+    target.chmod(mode if copy else mode & ~0o222)
+    return False
+
+
+def install(
+    name: str,
+    mirror: Path,
+    dest: Path,
+    cache: Path = DEFAULT_CACHE,
+    version: str | None = None,
+    copy: bool = False,
+) -> InstallResult:
+    """Install or update a plugin from a mirror into dest through the cache."""
+    version, bundle, manifest = _bundle(mirror, name, version)
+    result = InstallResult(name, version)
+    try:
+        installed = json.loads((dest / INSTALLED_NAME).read_text())
+    except (OSError, ValueError):
+        installed = {"files": []}
+    current = {item["path"]: item for item in installed.get("files", [])}
+    wanted = {item["path"]: item for item in manifest["files"]}
+    # Check every path before anything is written or removed
+    targets = {path: _target(dest, path) for path in set(current) | set(wanted)}
+
+    unchanged = {
+        path for path, item in wanted.items()
+        if current.get(path, {}).get("sha256") == item["sha256"]
+        and current[path].get("mode") == item["mode"]
+        and targets[path].exists()
+    }
+    missing = {
+        item["sha256"] for path, item in wanted.items()
+        if path not in unchanged and not object_path(cache, item["sha256"]).exists()
+    }
+    result.fetched = _fetch_missing(mirror, cache, bundle, missing)
+
+    for path, item in sorted(wanted.items()):
+        if path in unchanged:
+            result.unchanged.append(path)
+            continue
+        source = object_path(cache, item["sha256"])
+        linked = _place(source, targets[path], item["mode"], copy)
+        (result.linked if linked else result.copied).append(path)
+
+    for path in sorted(set(current) - set(wanted)):
+        target = targets[path]
+        if target.exists():
+            target.unlink()
+        result.removed.append(path)
+
+    (dest / INSTALLED_NAME).write_text(json.dumps({
+        "name": name,
+        "version": version,
+        "digest": manifest["digest"],
+        "files": manifest["files"],
+    }, indent=1) + "\n")
+    return result
+
+
+def verify(dest: Path) -> list[str]:
+    """Return the installed files that are missing or were modified."""
+    try:
+        installed = json.loads((dest / INSTALLED_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise BundleError(f"{dest} is not a bundle install: {e}") from None
+    problems = []
+    for item in installed["files"]:
+        path = _target(dest, item["path"])
+        if not path.is_file():
+            problems.append(f"{item['path']}: missing")
+        elif sha256_file(path) != item["sha256"]:
+            problems.append(f"{item['path']}: modified")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = commands.add_parser("pack", help="write bundles into a mirror directory")
+    pack_parser.add_argument("--mirror", type=Path, required=True)
+    pack_parser.add_argument("--root", type=Path, default=REPO_ROOT,
+                             help="marketplace repository root")
+
+    install_parser = commands.add_parser("install", help="install a plugin from a mirror")
+    install_parser.add_argument("name")
+    install_parser.add_argument("--mirror", type=Path, required=True)
+    install_parser.add_argument("--dest", type=Path, required=True,
+                                help="plugin directory to create or update")
+    install_parser.add_argument("--version")
+    install_parser.add_argument("--cache", type=Path,
+                                default=Path(os.environ.get("PLUGIN_BUNDLE_CACHE",
+                                                            DEFAULT_CACHE)))
+    install_parser.add_argument("--copy", action="store_true",
+                                help="copy files instead of hardlinking them")
+
+    verify_parser = commands.add_parser("verify", help="check an install against its bundle")
+    verify_parser.add_argument("--dest", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "pack":
+            created = pack(args.mirror, args.root.resolve())
+            print(f"Packed {len(created)} new bundle(s)"
+                  + (f": {', '.join(created)}" if created else ""))
+        elif args.command == "install":
+            result = install(args.name, args.mirror, args.dest, args.cache,
+                             args.version, args.copy)
+            print(f"Installed {result.name} {result.version}: "
+                  f"{len(result.linked)} linked, {len(result.copied)} copied, "
+                  f"{len(result.unchanged)} unchanged, {len(result.removed)} removed; "
+                  f"fetched {result.fetched} object(s)")
+        else:
+            problems = verify(args.dest)
+            for problem in problems:
+                print(problem)
+            return 1 if problems else 0
+    except BundleError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
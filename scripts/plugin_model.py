@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Parse-once model of the plugins in this marketplace.
+
+Each directory under `plugins/` is read once into a Plugin: its manifest
+(`.claude-plugin/plugin.json`), its commands, agents and skills (markdown
+with YAML frontmatter), and a content digest over every file. Models are
+cached in memory by path and digest, so the validator, the marketplace
+builder and the tests all share one parse.
+
+Frontmatter is parsed by a small YAML subset parser rather than string
+splitting: `key: value` pairs with plain or quoted scalars, flow lists
+(`[Read, Glob]`), block lists (`- item`) and `|` / `>` block scalars.
+Anything outside that subset is reported with its line number.
+
+Usage:
+    python3 scripts/plugin_model.py PLUGIN_DIR [FIELD]
+
+FIELD is a dotted path into the model, for example `manifest.version` or
+`commands.handoff.frontmatter.description`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MARKETPLACE_PATH = Path(".claude-plugin") / "marketplace.json"
+MANIFEST_PATH = Path(".claude-plugin") / "plugin.json"
+SKIP_DIRS = {".git", "__pycache__", ".pytest_cache", "node_modules", ".venv", "venv",
+             "test-reports", "htmlcov"}
+# A plugin's own test suite, left out of what the marketplace publishes
+TEST_PATHS = {"tests", "pytest.ini"}
+
+KEY_PATTERN = re.compile(r"^([A-Za-z0-9_][A-Za-z0-9_.-]*)\s*:(?:\s+(.*))?$")
+
+
+class FrontmatterError(ValueError):
+    """Frontmatter that is missing, unterminated or outside the supported YAML."""
+
+    def __init__(self, message: str, line: int | None = None):
+        self.line = line
+        super().__init__(f"line {line}: {message}" if line else message)
+
+
+def _scalar(text: str, line: int) -> str | bool | int | float | None:
+    """Parse one plain or quoted YAML scalar."""
+    text = text.strip()
+    if not text:
+        return ""
+    if text[0] in "\"'":
+        quote = text[0]
+        if len(text) < 2 or text[-1] != quote:
+            raise FrontmatterError("unterminated quoted string", line)
+        inner = text[1:-1]
+        if quote == "'":
+            return inner.replace("''", "'")
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise FrontmatterError(f"invalid double-quoted string {text}", line) from None
+    if text[0] in "{&*!%@`":
+        raise FrontmatterError(f"unsupported YAML value {text!r}", line)
+    # A comment needs whitespace before the #
+    text = re.split(r"\s+#", text, maxsplit=1)[0].rstrip()
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "~"):
+        return None
+    if re.fullmatch(r"-?\d+", text):
+        return int(text)
+    if re.fullmatch(r"-?\d+\.\d+", text):
+        return float(text)
+    return text
+
+
+def _flow_list(text: str, line: int) -> list:
+    """Parse a one-line flow sequence such as [Read, "Glob", Bash]."""
+    inner = text.strip()[1:-1].strip()
+    if not inner:
+        return []
+    items, current, quote = [], "", None
+    for char in inner:
+        if quote:
+            current += char
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+            current += char
+        elif char == ",":
+            items.append(current)
+            current = ""
+        elif char in "[]{}":
+            raise FrontmatterError("nested collections are not supported", line)
+        else:
+            current += char
+    if quote:
+        raise FrontmatterError("unterminated quoted string", line)
+    items.append(current)
+    return [_scalar(item, line) for item in items]
+
+
+def parse_frontmatter(text: str) -> tuple[dict[str, Any], str, int]:
+    """
+    Split a markdown document into (frontmatter, body, body_line).
+
+    body_line is the 1-based line the body starts on. Raises
+    FrontmatterError when the document has no frontmatter or it is invalid.
+    """
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        raise FrontmatterError("document does not start with --- frontmatter", 1)
+    try:
+        end = next(i for i in range(1, len(lines)) if lines[i].strip() in ("---", "..."))
+    except StopIteration:
+        raise FrontmatterError("frontmatter is not closed with ---", 1) from None
+
+    data: dict[str, Any] = {}
+    position = 1
+    while position < end:
+        number = position + 1
+        raw = lines[position]
+        position += 1
+        if not raw.strip() or raw.lstrip().startswith("#"):
+            continue
+        if raw[0].isspace():
+            raise FrontmatterError("unexpected indentation", number)
+        match = KEY_PATTERN.match(raw.rstrip())
+        if not match:
+            raise FrontmatterError(f"expected 'key: value', got {raw.strip()!r}", number)
+        key, value = match.group(1), (match.group(2) or "").strip()
+        if key in data:
+            raise FrontmatterError(f"duplicate key {key!r}", number)
+
+        if value in ("|", ">", "|-", ">-"):
+            block = []
+            while position < end and (
+                not lines[position].strip() or lines[position][0].isspace()
+            ):
+                block.append(lines[position].strip())
+                position += 1
+            while block and not block[-1]:
+                block.pop()
+            joined = "\n".join(block) if value[0] == "|" else " ".join(b for b in block if b)
+            data[key] = joined if value.endswith("-") or not joined else joined + "\n"
+        elif value.startswith("["):
+            if not value.rstrip().endswith("]"):
+                raise FrontmatterError("flow list must close on the same line", number)
+            data[key] = _flow_list(value, number)
+        elif not value:
+            items = []
+            while position < end and lines[position].lstrip().startswith("- "):
+                items.append(_scalar(lines[position].lstrip()[2:], position + 1))
+                position += 1
+            if position < end and lines[position].strip() and lines[position][0].isspace():
+                raise FrontmatterError("nested mappings are not supported", position + 1)
+            data[key] = items if items else None
+        else:
+            data[key] = _scalar(value, number)
+
+    body = "\n".join(lines[end + 1:])
+    if text.endswith("\n"):
+        body += "\n"
+    return data, body, end + 2
+
+
+@dataclass
+class Document:
+    """A markdown component (command, agent or skill) of a plugin."""
+
+    path: str
+    name: str
+    frontmatter: dict[str, Any] = field(default_factory=dict)
+    body: str = ""
+    error: str | None = None
+
+
+@dataclass
+class Plugin:
+    """Everything the tools need to know about one plugin directory."""
+
+    name: str
+    root: Path
+    digest: str
+    files: dict[str, str]
+    manifest: dict[str, Any] | None = None
+    manifest_error: str | None = None
+    commands: list[Document] = field(default_factory=list)
+    agents: list[Document] = field(default_factory=list)
+    skills: list[Document] = field(default_factory=list)
+    json_errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def kind(self) -> str:
+        """Whether this is a full plugin (has a manifest) or a bare skill."""
+        if self.manifest is not None or self.manifest_error:
+            return "plugin"
+        return "skill" if self.skills else "unknown"
+
+    def command(self, name: str) -> Document | None:
+        return next((c for c in self.commands if c.name == name), None)
+
+    def to_dict(self) -> dict:
+        def docs(items):
+            return {d.name: {"path": d.path, "frontmatter": d.frontmatter, "error": d.error}
+                    for d in items}
+
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "digest": self.digest,
+            "manifest": self.manifest,
+            "manifest_error": self.manifest_error,
+            "commands": docs(self.commands),
+            "agents": docs(self.agents),
+            "skills": docs(self.skills),
+            "files": sorted(self.files),
+        }
+
+
+def file_hashes(
+    root: Path, previous: dict[str, list] | None = None, exclude: set[str] = frozenset()
+) -> dict[str, list]:
+    """
+    Map each file under root to [mtime_ns, size, sha256].
+
+    Entries in previous whose mtime and size still match are reused without
+    reading the file again. Top-level names in exclude are skipped.
+    """
+    previous = previous or {}
+    hashes = {}
+    for directory, dirs, names in os.walk(root):
+        top = Path(directory) == root
+        dirs[:] = sorted(
+            d for d in dirs if d not in SKIP_DIRS and not (top and d in exclude)
+        )
+        for name in sorted(names):
+            if top and name in exclude:
+                continue
+            path = Path(directory) / name
+            relative = path.relative_to(root).as_posix()
+            stat = path.stat()
+            cached = previous.get(relative)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                hashes[relative] = cached
+            else:
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                hashes[relative] = [stat.st_mtime_ns, stat.st_size, digest]
+    return hashes
+
+
+def tree_digest(hashes: dict[str, list]) -> str:
+    """Combine per-file hashes into one digest for the directory."""
+    combined = hashlib.sha256()
+    for relative in sorted(hashes):
+        combined.update(f"{relative}\0{hashes[relative][2]}\n".encode())
+    return combined.hexdigest()
+
+
+def _document(root: Path, relative: str, name: str) -> Document:
+    document = Document(relative, name)
+    try:
+        text = (root / relative).read_text(encoding="utf-8")
+        document.frontmatter, document.body, _ = parse_frontmatter(text)
+    except (OSError, UnicodeDecodeError, FrontmatterError) as e:
+        document.error = str(e)
+    return document
+
+
+_cache: dict[tuple[Path, str], Plugin] = {}
+
+
+def load_plugin(root: Path, hashes: dict[str, list] | None = None) -> Plugin:
+    """Parse a plugin directory, reusing the cached model if nothing changed."""
+    root = root.resolve()
+    hashes = hashes if hashes is not None else file_hashes(root)
+    digest = tree_digest(hashes)
+    key = (root, digest)
+    if key in _cache:
+        return _cache[key]
+
+    plugin = Plugin(root.name, root, digest, {k: v[2] for k, v in hashes.items()})
+    manifest = MANIFEST_PATH.as_posix()
+    if manifest in hashes:
+        try:
+            plugin.manifest = json.loads((root / manifest).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            plugin.manifest_error = str(e)
+
+    for relative in sorted(hashes):
+        parts = relative.split("/")
+        if len(parts) == 2 and parts[0] == "commands" and parts[1].endswith(".md"):
+            plugin.commands.append(_document(root, relative, parts[1][:-3]))
+        elif len(parts) == 2 and parts[0] == "agents" and parts[1].endswith(".md"):
+            plugin.agents.append(_document(root, relative, parts[1][:-3]))
+        elif relative == "SKILL.md":
+            plugin.skills.append(_document(root, relative, root.name))
+        elif len(parts) == 3 and parts[0] == "skills" and parts[2] == "SKILL.md":
+            plugin.skills.append(_document(root, relative, parts[1]))
+        elif relative in ("hooks/hooks.json", ".mcp.json"):
+            try:
+                json.loads((root / relative).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                plugin.json_errors[relative] = str(e)
+
+    _cache[key] = plugin
+    return plugin
+
+
+def plugin_dirs(repo: Path = REPO_ROOT) -> list[Path]:
+    """Return every plugin directory under plugins/, sorted by name."""
+    base = repo / "plugins"
+    if not base.is_dir():
+        return []
+    return sorted(p for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def load_marketplace(repo: Path = REPO_ROOT) -> dict[str, Any]:
+    """Read .claude-plugin/marketplace.json."""
+    return json.loads((repo / MARKETPLACE_PATH).read_text(encoding="utf-8"))
+
+
+def lookup(data: Any, dotted: str) -> Any:
+    """Follow a dotted path through nested dicts."""
+    for part in dotted.split(".") if dotted else []:
+        if not isinstance(data, dict) or part not in data:
+            raise KeyError(dotted)
+        data = data[part]
+    return data
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if not args or args[0] in ("-h", "--help"):
+        print(__doc__.strip())
+        return 0 if args else 2
+    root = Path(args[0])
+    if not root.is_dir():
+        print(f"Error: {root} is not a directory", file=sys.stderr)
+        return 1
+    try:
+        value = lookup(load_plugin(root).to_dict(), args[1] if len(args) > 1 else "")
+    except KeyError as e:
+        print(f"Error: no field {e.args[0]!r}", file=sys.stderr)
+        return 1
+    print(value if isinstance(value, str) else json.dumps(value, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
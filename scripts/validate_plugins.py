@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Validate every plugin in the marketplace, and the marketplace itself.
+
+Plugins under `plugins/` are hashed and checked in parallel, each parsed
+once through plugin_model. Results are cached in
+`.cache/validate-plugins.json` by content digest, so a plugin whose files
+have not changed since the last run (and whose rules have not changed) is
+skipped and its previous result reused. `.claude-plugin/marketplace.json`
+is always checked against the current plugins.
+
+Errors fail the run; warnings only fail it with --strict.
+
+Usage:
+    python3 scripts/validate_plugins.py [--root .] [--plugin NAME ...]
+                                        [--jobs N] [--no-cache] [--strict]
+                                        [--format text|json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from plugin_model import (
+    MANIFEST_PATH,
+    MARKETPLACE_PATH,
+    REPO_ROOT,
+    Plugin,
+    file_hashes,
+    load_plugin,
+    plugin_dirs,
+    tree_digest,
+)
+
+CACHE_PATH = Path(".cache") / "validate-plugins.json"
+
+# Rules live in this file and the model; changing either invalidates the cache
+ENGINE_VERSION = hashlib.sha256(
+    Path(__file__).read_bytes() + (Path(__file__).parent / "plugin_model.py").read_bytes()
+).hexdigest()[:16]
+
+MANIFEST_REQUIRED = ("name", "version", "description")
+SEMVER = re.compile(r"^\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.+-]+)?$")
+NAME_PATTERN = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+SKILL_NAME_MAX = 64
+SKILL_DESCRIPTION_MAX = 1024
+JUNK_NAMES = {".DS_Store", "Thumbs.db"}
+JUNK_SUFFIXES = (".swp", ".swo", "~")
+
+
+@dataclass(frozen=True)
+class Issue:
+    level: str
+    target: str
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.level}: {self.message}"
+
+
+@dataclass
+class Report:
+    issues: list[Issue] = field(default_factory=list)
+    checked: list[str] = field(default_factory=list)
+    cached: list[str] = field(default_factory=list)
+
+    @property
+    def errors(self) -> list[Issue]:
+        return [i for i in self.issues if i.level == "error"]
+
+    @property
+    def warnings(self) -> list[Issue]:
+        return [i for i in self.issues if i.level == "warning"]
+
+
+def _non_empty_string(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def validate_plugin(plugin: Plugin) -> list[Issue]:
+    """Check one plugin's manifest, components and files."""
+    issues = []
+    base = f"plugins/{plugin.name}"
+
+    def error(path: str, message: str, level: str = "error") -> None:
+        issues.append(Issue(level, plugin.name, f"{base}/{path}" if path else base, message))
+
+    if plugin.kind == "unknown":
+        error("", f"neither {MANIFEST_PATH.as_posix()} nor SKILL.md found")
+
+    manifest_path = MANIFEST_PATH.as_posix()
+    if plugin.manifest_error:
+        error(manifest_path, f"invalid JSON: {plugin.manifest_error}")
+    elif plugin.manifest is not None:
+        manifest = plugin.manifest
+        if not isinstance(manifest, dict):
+            error(manifest_path, "must be a JSON object")
+            manifest = {}
+        for key in MANIFEST_REQUIRED:
+            if not _non_empty_string(manifest.get(key)):
+                error(manifest_path, f"missing required field {key!r}")
+        name = manifest.get("name")
+        if _non_empty_string(name):
+            if not NAME_PATTERN.match(name):
+                error(manifest_path, f"name {name!r} must be lowercase words joined by -")
+            if name != plugin.name:
+                error(manifest_path, f"name {name!r} does not match directory {plugin.name!r}")
+        version = manifest.get("version")
+        if _non_empty_string(version) and not SEMVER.match(version):
+            error(manifest_path, f"version {version!r} is not semantic (X.Y.Z)")
+        keywords = manifest.get("keywords", [])
+        if not isinstance(keywords, list) or not all(_non_empty_string(k) for k in keywords):
+            error(manifest_path, "keywords must be a list of strings")
+        author = manifest.get("author")
+        if author is not None and not (isinstance(author, dict)
+                                       and _non_empty_string(author.get("name"))):
+            error(manifest_path, "author must be an object with a name")
+
+        extra = sorted(
+            path for path in plugin.files
+            if path.startswith(".claude-plugin/") and path != manifest_path
+        )
+        for path in extra:
+            error(path, ".claude-plugin should only contain plugin.json")
+
+    for command in plugin.commands:
+        if command.error:
+            error(command.path, f"invalid frontmatter: {command.error}")
+            continue
+        meta = command.frontmatter
+        if not _non_empty_string(meta.get("description")):
+            error(command.path, "frontmatter needs a description")
+        if "argument-hint" in meta and not _non_empty_string(meta["argument-hint"]):
+            error(command.path, "argument-hint must be a non-empty string")
+        tools = meta.get("allowed-tools")
+        if tools is not None and not (
+            _non_empty_string(tools)
+            or (isinstance(tools, list) and all(_non_empty_string(t) for t in tools))
+        ):
+            error(command.path, "allowed-tools must be a list of tool names")
+        if not command.body.strip():
+            error(command.path, "command has no instructions after the frontmatter")
+
+    for agent in plugin.agents:
+        if agent.error:
+            error(agent.path, f"invalid frontmatter: {agent.error}")
+            continue
+        for key in ("name", "description"):
+            if not _non_empty_string(agent.frontmatter.get(key)):
+                error(agent.path, f"frontmatter needs a {key}")
+
+    for skill in plugin.skills:
+        if skill.error:
+            error(skill.path, f"invalid frontmatter: {skill.error}")
+            continue
+        name = skill.frontmatter.get("name")
+        description = skill.frontmatter.get("description")
+        if not _non_empty_string(name):
+            error(skill.path, "frontmatter needs a name")
+        elif not NAME_PATTERN.match(name) or len(name) > SKILL_NAME_MAX:
+            error(skill.path, f"skill name {name!r} must be lowercase words joined by -, "
+                              f"at most {SKILL_NAME_MAX} characters")
+        if not _non_empty_string(description):
+            error(skill.path, "frontmatter needs a description")
+        elif len(description) > SKILL_DESCRIPTION_MAX:
+            error(skill.path, f"description is over {SKILL_DESCRIPTION_MAX} characters")
+
+    for path, message in sorted(plugin.json_errors.items()):
+        error(path, f"invalid JSON: {message}")
+
+    for path in sorted(plugin.files):
+        name = path.rsplit("/", 1)[-1]
+        if name in JUNK_NAMES or name.endswith(JUNK_SUFFIXES):
+            error(path, "stray system or editor file")
+
+    return issues
+
+
+def plugin_summary(plugin: Plugin) -> dict:
+    """The parts of a plugin the marketplace checks need, kept in the cache."""
+    manifest = plugin.manifest if isinstance(plugin.manifest, dict) else {}
+    skill = plugin.skills[0].frontmatter if plugin.skills else {}
+    return {
+        "kind": plugin.kind,
+        "name": manifest.get("name") or plugin.name,
+        "version": manifest.get("version"),
+        "description": manifest.get("description") or skill.get("description"),
+    }
+
+
+def validate_marketplace(repo: Path, summaries: dict[str, dict]) -> list[Issue]:
+    """Check marketplace.json and that it agrees with the plugins on disk."""
+    path = MARKETPLACE_PATH.as_posix()
+    issues = []
+
+    def error(message: str, level: str = "error") -> None:
+        issues.append(Issue(level, "marketplace", path, message))
+
+    try:
+        data = json.loads((repo / MARKETPLACE_PATH).read_text(encoding="utf-8"))
+    except OSError:
+        error("not found")
+        return issues
+    except ValueError as e:
+        error(f"invalid JSON: {e}")
+        return issues
+    if not isinstance(data, dict):
+        error("must be a JSON object")
+        return issues
+
+    if not _non_empty_string(data.get("name")):
+        error("missing required field 'name'")
+    owner = data.get("owner")
+    if not (isinstance(owner, dict) and _non_empty_string(owner.get("name"))):
+        error("owner must be an object with a name")
+    entries = data.get("plugins")
+    if not isinstance(entries, list):
+        error("plugins must be a list")
+        return issues
+
+    seen = set()
+    for position, entry in enumerate(entries):
+        label = f"plugins[{position}]"
+        if not isinstance(entry, dict) or not _non_empty_string(entry.get("name")):
+            error(f"{label} needs a name")
+            continue
+        name = entry["name"]
+        label = f"plugin {name!r}"
+        if name in seen:
+            error(f"{label} is listed more than once")
+        seen.add(name)
+
+        source = entry.get("source")
+        if isinstance(source, str):
+            directory = source
+        elif isinstance(source, dict) and _non_empty_string(source.get("source")):
+            directory = source.get("path")
+        else:
+            error(f"{label} needs a source")
+            continue
+        if directory is None:
+            continue
+        directory = Path(directory.removeprefix("./")).as_posix()
+        summary = summaries.get(Path(directory).name)
+        if not (repo / directory).is_dir() or summary is None:
+            error(f"{label} source path {directory!r} is not a plugin directory")
+            continue
+        if summary["kind"] == "plugin" and summary["name"] != name:
+            error(f"{label} does not match its manifest name {summary['name']!r}")
+        if entry.get("version") and summary["version"] and entry["version"] != summary["version"]:
+            error(f"{label} version {entry['version']} does not match its manifest "
+                  f"version {summary['version']}")
+        if not _non_empty_string(entry.get("description")):
+            error(f"{label} needs a description")
+
+    listed = {
+        Path(str(e.get("source") if isinstance(e.get("source"), str)
+                 else (e.get("source") or {}).get("path", ""))).name
+        for e in entries if isinstance(e, dict)
+    }
+    for name in sorted(set(summaries) - listed):
+        error(f"plugins/{name} is not listed", level="warning")
+    return issues
+
+
+def _check(root: Path, cached: dict | None, use_cache: bool) -> tuple[dict, bool]:
+    """Validate one plugin directory, or reuse its cached result."""
+    hashes = file_hashes(root, cached.get("files") if cached else None)
+    digest = tree_digest(hashes)
+    if use_cache and cached and cached.get("digest") == digest:
+        return {**cached, "files": hashes}, True
+    plugin = load_plugin(root, hashes)
+    return {
+        "digest": digest,
+        "files": hashes,
+        "summary": plugin_summary(plugin),
+        "issues": [asdict(i) for i in validate_plugin(plugin)],
+    }, False
+
+
+def _load_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data.get("plugins", {}) if data.get("engine") == ENGINE_VERSION else {}
+
+
+def run(
+    repo: Path = REPO_ROOT,
+    names: list[str] | None = None,
+    jobs: int | None = None,
+    use_cache: bool = True,
+) -> Report:
+    """Validate the selected plugins (default: all) and the marketplace."""
+    cache_path = repo / CACHE_PATH
+    cache = _load_cache(cache_path)
+    roots = [p for p in plugin_dirs(repo) if names is None or p.name in names]
+    missing = sorted(set(names or []) - {p.name for p in roots})
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(
+            lambda root: _check(root, cache.get(root.name), use_cache), roots
+        ))
+
+    report = Report()
+    for name in missing:
+        report.issues.append(Issue("error", name, f"plugins/{name}", "no such plugin"))
+    entries = {}
+    for root, (entry, was_cached) in zip(roots, results):
+        entries[root.name] = entry
+        (report.cached if was_cached else report.checked).append(root.name)
+        report.issues.extend(Issue(**issue) for issue in entry["issues"])
+
+    if names is None:
+        summaries = {name: entry["summary"] for name, entry in entries.items()}
+        report.issues.extend(validate_marketplace(repo, summaries))
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache.update(entries)
+    cache_path.write_text(json.dumps({"engine": ENGINE_VERSION, "plugins": cache}) + "\n")
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", type=Path, default=REPO_ROOT,
+                        help="marketplace repository root")
+    parser.add_argument("--plugin", action="append", dest="plugins", metavar="NAME",
+                        help="validate only this plugin (repeatable; skips marketplace.json)")
+    parser.add_argument("--jobs", type=int, help="parallel workers (default: automatic)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="re-validate plugins even if unchanged")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    report = run(args.root.resolve(), args.plugins, args.jobs, not args.no_cache)
+    failed = bool(report.errors or (args.strict and report.warnings))
+
+    if args.format == "json":
+        print(json.dumps({
+            "ok": not failed,
+            "checked": report.checked,
+            "cached": report.cached,
+            "issues": [asdict(i) for i in report.issues],
+        }, indent=2))
+        return 1 if failed else 0
+
+    for issue in report.issues:
+        print(issue)
+    scope = "" if args.plugins else " and the marketplace"
+    print(f"Validated {len(report.checked) + len(report.cached)} plugin(s){scope}: "
+          f"{len(report.errors)} error(s), {len(report.warnings)} warning(s)"
+          + (f"; {len(report.cached)} unchanged" if report.cached else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
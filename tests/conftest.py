@@ -0,0 +1,44 @@
+"""
+Pytest configuration and fixtures for the marketplace tooling.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+
+@pytest.fixture
+def make_plugin(tmp_path):
+    """Create a plugin under tmp_path/plugins from a {path: content} mapping."""
+
+    def make(name, files):
+        root = tmp_path / "plugins" / name
+        for relative, content in files.items():
+            path = root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not isinstance(content, str):
+                content = json.dumps(content)
+            path.write_text(content)
+        return root
+
+    return make
+
+
+@pytest.fixture
+def marketplace(tmp_path):
+    """Write tmp_path/.claude-plugin/marketplace.json listing the given entries."""
+
+    def write(entries, **fields):
+        path = tmp_path / ".claude-plugin" / "marketplace.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"name": "test-marketplace", "owner": {"name": "Tester"}, **fields,
+                "plugins": entries}
+        path.write_text(json.dumps(data))
+        return path
+
+    return write
@@ -0,0 +1,119 @@
+"""
+Unit tests for the generated marketplace catalog and search index.
+"""
+
+import json
+
+import pytest
+
+from build_marketplace import INDEX_PATH, build, main, search, tokenize
+from plugin_model import MARKETPLACE_PATH, REPO_ROOT
+
+
+pytestmark = pytest.mark.unit
+
+MANIFEST = {
+    "name": "demo",
+    "version": "1.2.0",
+    "description": "Deploy previews for pull requests",
+    "author": {"name": "Tester", "email": "t@example.com"},
+    "keywords": ["deploy", "preview-env"],
+}
+SKILL = "---\nname: notes\ndescription: Keep meeting notes in git\n---\nBody\n"
+
+
+@pytest.fixture
+def catalog(tmp_path, make_plugin, marketplace):
+    """A marketplace with one full plugin, one bare skill and a stale entry."""
+    make_plugin("demo", {".claude-plugin/plugin.json": MANIFEST})
+    make_plugin("notes", {"SKILL.md": SKILL})
+    marketplace(
+        [{"name": "old", "source": {"source": "github", "repo": "me/market", "path": "x"}}],
+        description="Test plugins",
+    )
+    return tmp_path
+
+
+class TestBuild:
+    """Test building catalog entries from plugins."""
+
+    def test_entries_come_from_plugins(self, catalog):
+        """Verify entries are generated from manifests and SKILL.md, header kept."""
+        marketplace, _, rebuilt = build(catalog)
+        assert marketplace["description"] == "Test plugins"
+        assert marketplace["owner"] == {"name": "Tester"}
+        assert rebuilt == ["demo", "notes"]
+        demo, notes = marketplace["plugins"]
+        assert demo == {
+            "name": "demo",
+            "source": {"source": "github", "repo": "me/market", "path": "plugins/demo"},
+            "description": "Deploy previews for pull requests",
+            "version": "1.2.0",
+            "author": {"name": "Tester"},
+            "keywords": ["deploy", "preview-env"],
+        }
+        assert notes["description"] == "Keep meeting notes in git"
+        assert notes["author"] == {"name": "Tester"}
+        assert notes["strict"] is False and "version" not in notes
+
+    def test_only_changed_plugins_are_rebuilt(self, catalog):
+        """Verify the hash cache skips unchanged plugins."""
+        build(catalog)
+        assert build(catalog)[2] == []
+        (catalog / "plugins" / "notes" / "SKILL.md").write_text(
+            SKILL.replace("meeting notes", "standup notes")
+        )
+        marketplace, index, rebuilt = build(catalog)
+        assert rebuilt == ["notes"]
+        assert "standup" in index["terms"]
+        assert build(catalog, use_cache=False)[2] == ["demo", "notes"]
+
+    def test_plugin_tests_do_not_trigger_rebuilds(self, catalog):
+        """Verify editing a plugin's tests/ or pytest.ini leaves it cached."""
+        build(catalog)
+        root = catalog / "plugins" / "notes"
+        (root / "tests").mkdir()
+        (root / "tests" / "test_notes.py").write_text("def test_notes():\n    pass\n")
+        (root / "pytest.ini").write_text("[pytest]\n")
+        assert build(catalog)[2] == []
+
+    def test_cli_writes_and_checks(self, catalog, capsys):
+        """Verify the CLI writes both files, then --check passes until a change."""
+        assert main(["--root", str(catalog), "--check"]) == 1
+        assert main(["--root", str(catalog)]) == 0
+        written = (catalog / MARKETPLACE_PATH).stat().st_mtime_ns
+        assert main(["--root", str(catalog)]) == 0
+        assert (catalog / MARKETPLACE_PATH).stat().st_mtime_ns == written
+        assert main(["--root", str(catalog), "--check"]) == 0
+        assert json.loads((catalog / INDEX_PATH).read_text())["version"] == 1
+
+        capsys.readouterr()
+        assert main(["--root", str(catalog), "--search", "deploy"]) == 0
+        assert "demo" in capsys.readouterr().out
+
+
+class TestSearch:
+    """Test the inverted index."""
+
+    def test_tokenize(self):
+        """Verify stopwords and single characters are dropped."""
+        words = tokenize("Keep the notes in a Git repo, v2")
+        assert words == ["keep", "notes", "git", "repo", "v2"]
+
+    def test_ranking_by_field(self, catalog):
+        """Verify name matches outrank keyword and description matches."""
+        _, index, _ = build(catalog)
+        assert index["terms"]["preview-env"] == [[0, 2]]
+        assert search(index, "notes") == [("notes", 3)]
+        assert search(index, "deploy") == [("demo", 2)]
+        assert search(index, "git deploy") == [("demo", 2), ("notes", 1)]
+
+    def test_prefix_matching(self, catalog):
+        """Verify query words match the terms they begin."""
+        _, index, _ = build(catalog)
+        assert search(index, "prev") == [("demo", 2)]
+        assert search(index, "unrelated") == []
+
+    def test_repository_catalog_is_current(self):
+        """Verify marketplace.json and its index match the plugins in this repository."""
+        assert main(["--root", str(REPO_ROOT), "--check"]) == 0
@@ -0,0 +1,205 @@
+"""
+Unit tests for content-addressed plugin bundles.
+"""
+
+import json
+import shutil
+
+import pytest
+
+from plugin_bundle import (
+    BundleError,
+    INSTALLED_NAME,
+    install,
+    main,
+    object_path,
+    pack,
+    verify,
+)
+
+
+pytestmark = pytest.mark.unit
+
+MANIFEST = {"name": "demo", "version": "1.0.0", "description": "Demo"}
+
+
+@pytest.fixture
+def repo(tmp_path, make_plugin, marketplace):
+    """A marketplace with one plugin holding a script, a command and docs."""
+    root = make_plugin("demo", {
+        ".claude-plugin/plugin.json": MANIFEST,
+        "commands/run.md": "---\ndescription: Run\n---\nRun it\n",
+        "README.md": "# Demo\n",
+        "scripts/tool.sh": "#!/bin/sh\necho hi\n",
+    })
+    (root / "scripts" / "tool.sh").chmod(0o755)
+    marketplace([])
+    return tmp_path
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    return tmp_path / "mirror", tmp_path / "cache"
+
+
+def release(repo, version, readme):
+    """Give the demo plugin a new version and README."""
+    root = repo / "plugins" / "demo"
+    manifest = {**MANIFEST, "version": version}
+    (root / ".claude-plugin" / "plugin.json").write_text(json.dumps(manifest))
+    (root / "README.md").write_text(readme)
+
+
+class TestPack:
+    """Test writing bundles into a mirror."""
+
+    def test_pack_writes_catalog_archive_and_objects(self, repo, dirs):
+        """Verify the mirror catalog lists a hashed bundle per version."""
+        mirror, _ = dirs
+        assert pack(mirror, repo) == ["demo@1.0.0"]
+        catalog = json.loads((mirror / "marketplace.json").read_text())
+        bundle = catalog["plugins"][0]["bundles"]["1.0.0"]
+        assert (mirror / bundle["archive"]).is_file()
+        files = json.loads((mirror / bundle["manifest"]).read_text())["files"]
+        assert {f["path"]: f["mode"] for f in files}["scripts/tool.sh"] == 0o755
+        assert all(object_path(mirror, f["sha256"]).is_file() for f in files)
+
+    def test_pack_leaves_out_plugin_tests(self, repo, dirs):
+        """Verify tests/ and pytest.ini are neither packed nor hashed."""
+        mirror, _ = dirs
+        root = repo / "plugins" / "demo"
+        (root / "tests").mkdir()
+        (root / "tests" / "test_tool.py").write_text("def test_tool():\n    pass\n")
+        (root / "pytest.ini").write_text("[pytest]\n")
+        pack(mirror, repo)
+        catalog = json.loads((mirror / "marketplace.json").read_text())
+        bundle = catalog["plugins"][0]["bundles"]["1.0.0"]
+        files = json.loads((mirror / bundle["manifest"]).read_text())["files"]
+        assert not [f["path"] for f in files if f["path"].startswith(("tests/", "pytest.ini"))]
+
+        (root / "tests" / "test_tool.py").write_text("def test_tool():\n    assert 1\n")
+        assert pack(mirror, repo) == []
+
+    def test_pack_is_incremental_and_reproducible(self, repo, dirs):
+        """Verify unchanged plugins are not repacked and versions accumulate."""
+        mirror, _ = dirs
+        pack(mirror, repo)
+        archive = next((mirror / "bundles" / "demo").glob("*.tar.gz")).read_bytes()
+        assert pack(mirror, repo) == []
+
+        release(repo, "1.1.0", "# Demo 1.1\n")
+        assert pack(mirror, repo) == ["demo@1.1.0"]
+        catalog = json.loads((mirror / "marketplace.json").read_text())
+        assert sorted(catalog["plugins"][0]["bundles"]) == ["1.0.0", "1.1.0"]
+
+        other = mirror.parent / "other"
+        release(repo, "1.0.0", "# Demo\n")
+        pack(other, repo)
+        assert next((other / "bundles" / "demo").glob("*.tar.gz")).read_bytes() == archive
+
+    def test_refuses_changed_content_under_a_published_version(self, repo, dirs):
+        """Verify a published version's bundle is never replaced."""
+        mirror, _ = dirs
+        pack(mirror, repo)
+        catalog = (mirror / "marketplace.json").read_text()
+        release(repo, "1.0.0", "# Demo, edited\n")
+        with pytest.raises(BundleError, match="demo 1.0.0 is already published"):
+            pack(mirror, repo)
+        assert (mirror / "marketplace.json").read_text() == catalog
+
+
+class TestInstall:
+    """Test installing and updating through the object cache."""
+
+    def test_first_and_repeat_installs(self, repo, dirs, tmp_path):
+        """Verify a second install hardlinks from the cache without fetching."""
+        mirror, cache = dirs
+        pack(mirror, repo)
+        first = install("demo", mirror, tmp_path / "a", cache)
+        assert first.fetched == 4
+        assert verify(tmp_path / "a") == []
+
+        second = install("demo", mirror, tmp_path / "b", cache)
+        assert second.fetched == 0
+        assert sorted(second.linked) == [".claude-plugin/plugin.json", "README.md",
+                                         "commands/run.md"]
+        assert second.copied == ["scripts/tool.sh"]
+        readme = tmp_path / "b" / "README.md"
+        assert readme.stat().st_nlink > 1
+        assert not readme.stat().st_mode & 0o222
+        assert (tmp_path / "b" / "scripts" / "tool.sh").stat().st_mode & 0o111
+
+    def test_update_touches_only_changed_files(self, repo, dirs, tmp_path):
+        """Verify an update fetches and replaces only changed content."""
+        mirror, cache = dirs
+        pack(mirror, repo)
+        dest = tmp_path / "dest"
+        install("demo", mirror, dest, cache)
+
+        release(repo, "1.1.0", "# Demo 1.1\n")
+        (repo / "plugins" / "demo" / "commands" / "run.md").unlink()
+        pack(mirror, repo)
+        result = install("demo", mirror, dest, cache)
+        assert result.version == "1.1.0"
+        assert result.fetched == 2
+        assert sorted(result.linked) == [".claude-plugin/plugin.json", "README.md"]
+        assert result.removed == ["commands/run.md"]
+        assert sorted(result.unchanged) == ["scripts/tool.sh"]
+        assert (dest / "README.md").read_text() == "# Demo 1.1\n"
+        assert json.loads((dest / INSTALLED_NAME).read_text())["version"] == "1.1.0"
+
+        older = install("demo", mirror, dest, cache, version="1.0.0")
+        assert older.fetched == 0 and (dest / "commands" / "run.md").is_file()
+
+    def test_falls_back_to_archive_without_objects(self, repo, dirs, tmp_path):
+        """Verify a mirror holding only archives still installs, checking hashes."""
+        mirror, cache = dirs
+        pack(mirror, repo)
+        shutil.rmtree(mirror / "objects")
+        assert install("demo", mirror, tmp_path / "dest", cache, copy=True).fetched == 4
+        assert verify(tmp_path / "dest") == []
+
+        archive = next((mirror / "bundles" / "demo").glob("*.tar.gz"))
+        archive.write_bytes(archive.read_bytes() + b"tampered")
+        with pytest.raises(BundleError, match="does not match"):
+            install("demo", mirror, tmp_path / "other", tmp_path / "empty-cache")
+
+    @pytest.mark.parametrize("path", ["../outside.md", "/tmp/outside.md", "a/../../outside.md"])
+    def test_rejects_paths_outside_dest(self, repo, dirs, tmp_path, path):
+        """Verify manifest paths cannot write or delete outside the install."""
+        mirror, cache = dirs
+        pack(mirror, repo)
+        manifest_path = next((mirror / "bundles" / "demo").glob("*.json"))
+        manifest = json.loads(manifest_path.read_text())
+        manifest["files"][0]["path"] = path
+        manifest_path.write_text(json.dumps(manifest))
+        dest = tmp_path / "dest"
+        with pytest.raises(BundleError, match="Unsafe path"):
+            install("demo", mirror, dest, cache)
+        assert not (tmp_path / "outside.md").exists()
+
+        victim = tmp_path / "victim.txt"
+        victim.write_text("keep me\n")
+        dest.mkdir()
+        (dest / INSTALLED_NAME).write_text(json.dumps(
+            {"files": [{"path": "../victim.txt", "sha256": "0" * 64, "mode": 0o644}]}))
+        with pytest.raises(BundleError, match="Unsafe path"):
+            verify(dest)
+        manifest["files"].pop(0)
+        manifest_path.write_text(json.dumps(manifest))
+        with pytest.raises(BundleError, match="Unsafe path"):
+            install("demo", mirror, dest, cache)
+        assert victim.read_text() == "keep me\n"
+
+    def test_verify_and_cli(self, repo, dirs, tmp_path, capsys):
+        """Verify modified installs are reported and the CLI exit codes."""
+        mirror, cache = dirs
+        assert main(["pack", "--mirror", str(mirror), "--root", str(repo)]) == 0
+        dest = tmp_path / "dest"
+        assert main(["install", "demo", "--mirror", str(mirror), "--dest", str(dest),
+                     "--cache", str(cache), "--copy"]) == 0
+        (dest / "README.md").write_text("edited\n")
+        assert main(["verify", "--dest", str(dest)]) == 1
+        assert "README.md: modified" in capsys.readouterr().out
+        assert main(["install", "missing", "--mirror", str(mirror), "--dest", str(dest),
+                     "--cache", str(cache)]) == 1
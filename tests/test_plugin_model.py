@@ -0,0 +1,155 @@
+"""
+Unit tests for the parse-once plugin model.
+"""
+
+import pytest
+
+from plugin_model import (
+    REPO_ROOT,
+    FrontmatterError,
+    file_hashes,
+    load_plugin,
+    lookup,
+    main,
+    parse_frontmatter,
+    plugin_dirs,
+)
+
+
+pytestmark = pytest.mark.unit
+
+
+class TestParseFrontmatter:
+    """Test the YAML subset used by commands, agents and skills."""
+
+    def test_scalars_and_lists(self):
+        """Verify plain, quoted and typed scalars and both list styles."""
+        data, body, line = parse_frontmatter(
+            "---\n"
+            "description: Extract context: the useful parts\n"
+            "argument-hint: \"<goal>\"\n"
+            "quoted: 'it''s'\n"
+            "allowed-tools: [Read, \"Bash(git:*)\", Glob]\n"
+            "keywords:\n"
+            "  - one\n"
+            "  - two\n"
+            "enabled: true\n"
+            "count: 3\n"
+            "---\n"
+            "# Body\n"
+        )
+        assert data == {
+            "description": "Extract context: the useful parts",
+            "argument-hint": "<goal>",
+            "quoted": "it's",
+            "allowed-tools": ["Read", "Bash(git:*)", "Glob"],
+            "keywords": ["one", "two"],
+            "enabled": True,
+            "count": 3,
+        }
+        assert body == "# Body\n"
+        assert line == 12
+
+    def test_block_scalars(self):
+        """Verify | keeps newlines and > folds them."""
+        data, _, _ = parse_frontmatter(
+            "---\nliteral: |\n  one\n  two\nfolded: >-\n  one\n  two\n---\n"
+        )
+        assert data == {"literal": "one\ntwo\n", "folded": "one two"}
+
+    @pytest.mark.parametrize("text, message", [
+        ("# no frontmatter\n", "does not start"),
+        ("---\nname: x\n", "not closed"),
+        ("---\nname: x\nname: y\n---\n", "duplicate key"),
+        ("---\nname x\n---\n", "expected 'key: value'"),
+        ("---\nmeta:\n  nested: 1\n---\n", "nested mappings"),
+        ("---\ntools: [Read\n---\n", "flow list"),
+        ("---\nname: \"open\n---\n", "unterminated"),
+    ])
+    def test_invalid_frontmatter(self, text, message):
+        """Verify malformed frontmatter is rejected with a line number."""
+        with pytest.raises(FrontmatterError, match=message) as error:
+            parse_frontmatter(text)
+        assert error.value.line is not None
+
+
+class TestLoadPlugin:
+    """Test loading plugin directories into the model."""
+
+    def test_full_plugin(self, make_plugin):
+        """Verify manifest, commands, agents and skills are all parsed."""
+        root = make_plugin("demo", {
+            ".claude-plugin/plugin.json": {"name": "demo", "version": "1.0.0"},
+            "commands/run.md": "---\ndescription: Run it\n---\nDo the thing\n",
+            "agents/helper.md": "---\nname: helper\ndescription: Helps\n---\n",
+            "skills/tool/SKILL.md": "---\nname: tool\ndescription: A tool\n---\n",
+            "hooks/hooks.json": "{not json",
+        })
+        plugin = load_plugin(root)
+        assert plugin.kind == "plugin"
+        assert plugin.manifest["version"] == "1.0.0"
+        assert plugin.command("run").frontmatter == {"description": "Run it"}
+        assert plugin.command("run").body == "Do the thing\n"
+        assert [a.name for a in plugin.agents] == ["helper"]
+        assert [s.name for s in plugin.skills] == ["tool"]
+        assert "hooks/hooks.json" in plugin.json_errors
+
+    def test_bare_skill(self, make_plugin):
+        """Verify a directory with only SKILL.md is a skill."""
+        root = make_plugin("notes", {"SKILL.md": "---\nname: notes\ndescription: d\n---\n"})
+        plugin = load_plugin(root)
+        assert plugin.kind == "skill"
+        assert plugin.skills[0].name == "notes"
+
+    def test_bad_documents_are_recorded_not_raised(self, make_plugin):
+        """Verify parse failures are kept on the document for the validator."""
+        root = make_plugin("broken", {
+            ".claude-plugin/plugin.json": "{",
+            "commands/run.md": "no frontmatter\n",
+        })
+        plugin = load_plugin(root)
+        assert plugin.manifest_error
+        assert "does not start" in plugin.command("run").error
+
+    def test_model_is_parsed_once_per_digest(self, make_plugin):
+        """Verify an unchanged plugin returns the cached model."""
+        root = make_plugin("demo", {"SKILL.md": "---\nname: demo\ndescription: d\n---\n"})
+        first = load_plugin(root)
+        assert load_plugin(root) is first
+        (root / "SKILL.md").write_text("---\nname: demo\ndescription: changed\n---\n")
+        second = load_plugin(root)
+        assert second is not first
+        assert second.skills[0].frontmatter["description"] == "changed"
+
+    def test_file_hashes_reuse_unchanged_stats(self, make_plugin):
+        """Verify files whose mtime and size match are not re-hashed."""
+        root = make_plugin("demo", {"a.txt": "one"})
+        previous = {"a.txt": [(root / "a.txt").stat().st_mtime_ns, 3, "cached"]}
+        assert file_hashes(root, previous)["a.txt"][2] == "cached"
+        assert file_hashes(root)["a.txt"][2] != "cached"
+
+
+class TestRepository:
+    """Test the model against this repository's plugins."""
+
+    def test_every_plugin_loads(self):
+        """Verify each plugin here is a recognised kind with parseable documents."""
+        dirs = plugin_dirs(REPO_ROOT)
+        assert dirs
+        for root in dirs:
+            plugin = load_plugin(root)
+            assert plugin.kind in ("plugin", "skill"), root.name
+            for document in plugin.commands + plugin.agents + plugin.skills:
+                assert document.error is None, f"{root.name}/{document.path}"
+
+    def test_field_lookup_cli(self, capsys):
+        """Verify the CLI prints one field of the model."""
+        assert main([str(REPO_ROOT / "plugins" / "handoff"), "manifest.name"]) == 0
+        assert capsys.readouterr().out == "handoff\n"
+        assert main([str(REPO_ROOT / "plugins" / "handoff"), "manifest.missing"]) == 1
+
+    def test_lookup(self):
+        """Verify dotted lookups through nested dicts."""
+        assert lookup({"a": {"b": 1}}, "a.b") == 1
+        with pytest.raises(KeyError):
+            lookup({"a": 1}, "a.b")
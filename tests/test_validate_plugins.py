@@ -0,0 +1,143 @@
+"""
+Unit tests for the marketplace-wide plugin validator.
+"""
+
+import json
+
+import pytest
+
+from plugin_model import REPO_ROOT, load_plugin
+from validate_plugins import CACHE_PATH, main, run, validate_plugin
+
+
+pytestmark = pytest.mark.unit
+
+MANIFEST = {
+    "name": "demo",
+    "version": "1.0.0",
+    "description": "A demo plugin",
+    "author": {"name": "Tester"},
+}
+COMMAND = "---\ndescription: Run it\nallowed-tools: [Read]\n---\nDo the thing\n"
+
+
+def messages(issues, level="error"):
+    return [i.message for i in issues if i.level == level]
+
+
+class TestValidatePlugin:
+    """Test the per-plugin rules."""
+
+    def test_valid_plugin(self, make_plugin):
+        """Verify a well-formed plugin has no issues."""
+        root = make_plugin("demo", {
+            ".claude-plugin/plugin.json": MANIFEST,
+            "commands/run.md": COMMAND,
+        })
+        assert validate_plugin(load_plugin(root)) == []
+
+    def test_manifest_rules(self, make_plugin):
+        """Verify missing fields, bad versions and name mismatches are errors."""
+        root = make_plugin("demo", {
+            ".claude-plugin/plugin.json": {"name": "other", "version": "1.0"},
+            ".claude-plugin/extra.json": {},
+        })
+        found = messages(validate_plugin(load_plugin(root)))
+        assert "missing required field 'description'" in found
+        assert "version '1.0' is not semantic (X.Y.Z)" in found
+        assert "name 'other' does not match directory 'demo'" in found
+        assert ".claude-plugin should only contain plugin.json" in found
+
+    def test_command_rules(self, make_plugin):
+        """Verify command frontmatter problems are errors with paths."""
+        root = make_plugin("demo", {
+            ".claude-plugin/plugin.json": MANIFEST,
+            "commands/empty.md": "---\nargument-hint: \"\"\nallowed-tools: [\"\"]\n---\n",
+            "commands/broken.md": "no frontmatter\n",
+        })
+        issues = validate_plugin(load_plugin(root))
+        by_path = {}
+        for issue in issues:
+            by_path.setdefault(issue.path, []).append(issue.message)
+        assert by_path["plugins/demo/commands/empty.md"] == [
+            "frontmatter needs a description",
+            "argument-hint must be a non-empty string",
+            "allowed-tools must be a list of tool names",
+            "command has no instructions after the frontmatter",
+        ]
+        assert by_path["plugins/demo/commands/broken.md"][0].startswith("invalid frontmatter")
+
+    def test_skill_rules(self, make_plugin):
+        """Verify skill names and descriptions are checked."""
+        root = make_plugin("notes", {
+            "SKILL.md": f"---\nname: Notes_Skill\ndescription: {'x' * 1025}\n---\n",
+        })
+        found = messages(validate_plugin(load_plugin(root)))
+        assert any("Notes_Skill" in m for m in found)
+        assert "description is over 1024 characters" in found
+
+    def test_stray_files_and_unknown_layout(self, make_plugin):
+        """Verify editor files and directories that are not plugins are errors."""
+        root = make_plugin("junk", {".DS_Store": "", "notes.md.swp": ""})
+        found = messages(validate_plugin(load_plugin(root)))
+        assert found.count("stray system or editor file") == 2
+        assert any("nor SKILL.md" in m for m in found)
+
+
+class TestMarketplace:
+    """Test marketplace.json checks and the cached parallel run."""
+
+    def test_marketplace_must_agree_with_plugins(self, tmp_path, make_plugin, marketplace):
+        """Verify mismatched names, versions, sources and unlisted plugins."""
+        make_plugin("demo", {".claude-plugin/plugin.json": MANIFEST})
+        make_plugin("notes", {"SKILL.md": "---\nname: notes\ndescription: d\n---\n"})
+        marketplace([
+            {"name": "renamed", "source": "./plugins/demo", "version": "2.0.0",
+             "description": "d"},
+            {"name": "gone", "source": "./plugins/gone", "description": "d"},
+        ])
+        report = run(tmp_path, use_cache=False)
+        assert messages(report.issues) == [
+            "plugin 'renamed' does not match its manifest name 'demo'",
+            "plugin 'renamed' version 2.0.0 does not match its manifest version 1.0.0",
+            "plugin 'gone' source path 'plugins/gone' is not a plugin directory",
+        ]
+        assert messages(report.issues, "warning") == ["plugins/notes is not listed"]
+
+    def test_unchanged_plugins_are_skipped(self, tmp_path, make_plugin, marketplace):
+        """Verify the hash cache skips unchanged plugins and catches edits."""
+        demo = make_plugin("demo", {".claude-plugin/plugin.json": MANIFEST})
+        make_plugin("notes", {"SKILL.md": "---\nname: notes\ndescription: d\n---\n"})
+        marketplace([
+            {"name": "demo", "source": "./plugins/demo", "description": "d"},
+            {"name": "notes", "source": "./plugins/notes", "description": "d"},
+        ])
+
+        first = run(tmp_path, jobs=2)
+        assert sorted(first.checked) == ["demo", "notes"] and first.issues == []
+        assert (tmp_path / CACHE_PATH).is_file()
+
+        second = run(tmp_path, jobs=2)
+        assert second.checked == [] and sorted(second.cached) == ["demo", "notes"]
+
+        (demo / ".claude-plugin" / "plugin.json").write_text(json.dumps({**MANIFEST,
+                                                                         "version": "x"}))
+        third = run(tmp_path, jobs=2)
+        assert third.checked == ["demo"] and third.cached == ["notes"]
+        assert messages(third.issues) == ["version 'x' is not semantic (X.Y.Z)"]
+
+    def test_cli_exit_codes(self, tmp_path, make_plugin, marketplace, capsys):
+        """Verify errors fail the run and warnings fail it only with --strict."""
+        make_plugin("demo", {".claude-plugin/plugin.json": MANIFEST})
+        marketplace([])
+        assert main(["--root", str(tmp_path)]) == 0
+        assert main(["--root", str(tmp_path), "--strict"]) == 1
+        assert main(["--root", str(tmp_path), "--plugin", "missing"]) == 1
+        capsys.readouterr()
+        assert main(["--root", str(tmp_path), "--format", "json"]) == 0
+        assert json.loads(capsys.readouterr().out)["ok"] is True
+
+    def test_repository_has_no_errors(self):
+        """Verify every plugin in this repository passes without errors."""
+        report = run(REPO_ROOT, use_cache=False)
+        assert [str(i) for i in report.errors] == []